@@ -0,0 +1,126 @@
+"""
+Load test for the appointment scheduler.
+
+Starts several processes, each with several threads, that book the earliest
+free slot of a pool of doctors as fast as they can against one temporary
+SQLite database. It reports booking attempts per second, then checks the
+invariants: no slot booked twice, every taken slot points at its live
+appointment, and booking ids are unique. Exits non-zero on any violation.
+
+Usage:
+    python benchmarks/appointment_load.py [--processes 4] [--threads 8] [--doctors 50] [--attempts 500]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+def worker(db_path: str, doctors: int, threads: int, attempts: int, start_event, results):
+    os.environ["METADATA_DB_PATH"] = db_path
+    from storage.appointment_scheduler import get_scheduler
+
+    scheduler = get_scheduler()
+    booked, failed = [], [0]
+
+    def run(thread_no: int):
+        for i in range(attempts):
+            doctor_id = f"load-doc-{(thread_no + i) % doctors}"
+            booking = scheduler.book(doctor_id, f"patient-{os.getpid()}-{thread_no}-{i}")
+            if booking is None:
+                failed[0] += 1
+            else:
+                booked.append(booking["booking_id"])
+
+    start_event.wait()
+    pool = [threading.Thread(target=run, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put({"booked": booked, "failed": failed[0]})
+
+def check_invariants(db_path: str, booking_ids: list) -> list:
+    db = sqlite3.connect(db_path)
+    problems = []
+    doubles = db.execute(
+        "SELECT doctor_id, start_ts, COUNT(*) FROM appointments WHERE status = 'booked' "
+        "GROUP BY doctor_id, start_ts HAVING COUNT(*) > 1"
+    ).fetchall()
+    if doubles:
+        problems.append(f"{len(doubles)} slots booked more than once")
+    mismatched = db.execute(
+        "SELECT COUNT(*) FROM appointments a LEFT JOIN appointment_slots s "
+        "ON s.doctor_id = a.doctor_id AND s.start_ts = a.start_ts "
+        "WHERE a.status = 'booked' AND (s.booking_id IS NULL OR s.booking_id != a.booking_id)"
+    ).fetchone()[0]
+    if mismatched:
+        problems.append(f"{mismatched} appointments not recorded on their slot")
+    dangling = db.execute(
+        "SELECT COUNT(*) FROM appointment_slots s LEFT JOIN appointments a ON a.booking_id = s.booking_id "
+        "WHERE s.booking_id IS NOT NULL AND (a.status IS NULL OR a.status != 'booked')"
+    ).fetchone()[0]
+    if dangling:
+        problems.append(f"{dangling} slots held by no live appointment")
+    if len(set(booking_ids)) != len(booking_ids):
+        problems.append(f"{len(booking_ids) - len(set(booking_ids))} duplicate booking ids")
+    stored = db.execute("SELECT COUNT(*) FROM appointments WHERE status = 'booked'").fetchone()[0]
+    if stored != len(booking_ids):
+        problems.append(f"{stored} appointments stored but {len(booking_ids)} confirmed")
+    db.close()
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent booking load test for the appointment scheduler")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--attempts", type=int, default=500, help="Booking attempts per thread")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="appointment_load_") as tmp:
+        db_path = os.path.join(tmp, "metadata.db")
+        # Generate calendars up front so the timed run measures booking only
+        os.environ["METADATA_DB_PATH"] = db_path
+        from storage.appointment_scheduler import get_scheduler
+        for d in range(args.doctors):
+            get_scheduler().ensure_availability(f"load-doc-{d}")
+
+        ctx = multiprocessing.get_context("spawn")
+        start_event, results = ctx.Event(), ctx.Queue()
+        procs = [
+            ctx.Process(target=worker, args=(db_path, args.doctors, args.threads, args.attempts, start_event, results))
+            for _ in range(args.processes)
+        ]
+        for p in procs:
+            p.start()
+        time.sleep(1)  # let workers import before the clock starts
+        started = time.perf_counter()
+        start_event.set()
+        outcomes = [results.get() for _ in procs]
+        elapsed = time.perf_counter() - started
+        for p in procs:
+            p.join()
+
+        booking_ids = [b for o in outcomes for b in o["booked"]]
+        failed = sum(o["failed"] for o in outcomes)
+        attempts = len(booking_ids) + failed
+        print(f"{args.processes} processes x {args.threads} threads, {args.doctors} doctors")
+        print(f"{attempts} attempts in {elapsed:.2f}s = {attempts / elapsed:,.0f} attempts/s")
+        print(f"{len(booking_ids)} booked, {failed} without a free slot")
+
+        problems = check_invariants(db_path, booking_ids)
+        for problem in problems:
+            print(f"VIOLATION: {problem}")
+        if problems:
+            sys.exit(1)
+        print("No double bookings, all booking ids unique")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Compare the PyTorch fp32 MiniLM with the int8 ONNX runtime.
+
+Texts come from the recorded health history (or --texts-file, one text per
+line). Each runtime runs in its own interpreter so resident memory is
+measured cleanly. Reports load time, throughput and RSS for both, plus the
+cosine agreement of the int8 vectors with the fp32 ones, and exits 1 if
+agreement or speedup fall below the thresholds.
+
+Usage:
+    python -m storage.onnx_embedder          # export once
+    python benchmarks/embedding_runtime.py [--limit 2000] [--min-cosine 0.99]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+import numpy as np
+
+SAMPLE_TEXTS = [
+    "BMI: 27.4\nCalorie Target: 2100 kcal\nNutrition Guidance: Focus on lean protein and vegetables...",
+    "Workout Type: Home Workout (No Equipment)\nIntensity: 3/5\nDay 1: Full body (300 kcal)",
+    "Total Calories: 1850\n\nOatmeal with berries (400 kcal): Cook oats in milk and top with berries",
+    "HAEMATOLOGY COMPLETE BLOOD COUNT Hemoglobin 13.5 g/dL WBC 7.2 x 10^3/uL Platelets 250 x 10^3/uL",
+]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_history_texts(limit: int) -> list:
+    from storage.chroma_db import scan_history
+    texts = []
+    for record in scan_history(include=["documents"]):
+        if record["document"]:
+            texts.append(record["document"])
+        if len(texts) >= limit:
+            break
+    return texts
+
+
+def worker(backend: str, texts_path: str, out_path: str, batch_size: int):
+    with open(texts_path, encoding="utf-8") as f:
+        texts = json.load(f)
+    base_rss = rss_mb()
+
+    started = time.perf_counter()
+    if backend == "onnx":
+        from storage.onnx_embedder import OnnxMiniLM
+        model = OnnxMiniLM()
+        encode = lambda batch: model.encode(batch, batch_size=batch_size)
+    else:
+        from sentence_transformers import SentenceTransformer
+        from utils.config import SENTENCE_TRANSFORMER_MODEL
+        model = SentenceTransformer(SENTENCE_TRANSFORMER_MODEL, device="cpu")
+        encode = lambda batch: model.encode(batch, batch_size=batch_size, convert_to_numpy=True,
+                                            normalize_embeddings=True)
+    load_s = time.perf_counter() - started
+
+    encode(texts[:batch_size])  # warm-up
+    started = time.perf_counter()
+    vectors = np.asarray(encode(texts), dtype=np.float32)
+    encode_s = time.perf_counter() - started
+
+    np.save(out_path, vectors)
+    print(json.dumps({
+        "backend": backend,
+        "load_s": load_s,
+        "texts_per_s": len(texts) / max(encode_s, 1e-9),
+        "rss_mb": rss_mb() - base_rss
+    }))
+
+
+def run_worker(backend: str, texts_path: str, batch_size: int, tmpdir: str):
+    out_path = os.path.join(tmpdir, f"{backend}.npy")
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", backend, "--texts-path", texts_path,
+         "--out", out_path, "--batch-size", str(batch_size)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{backend} worker failed:\n{proc.stderr[-2000:]}")
+    stats = json.loads(proc.stdout.strip().splitlines()[-1])
+    return stats, np.load(out_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fp32 PyTorch vs int8 ONNX MiniLM")
+    parser.add_argument("--limit", type=int, default=2000, help="History texts to embed")
+    parser.add_argument("--texts-file", help="Use these texts (one per line) instead of the history DB")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Required mean cosine agreement")
+    parser.add_argument("--min-speedup", type=float, default=1.0, help="Required ONNX/fp32 throughput ratio")
+    parser.add_argument("--worker", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--texts-path", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.texts_path, args.out, args.batch_size)
+        return
+
+    if args.texts_file:
+        with open(args.texts_file, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()][:args.limit]
+    else:
+        texts = load_history_texts(args.limit)
+    if len(texts) < args.batch_size:
+        print(f"Only {len(texts)} recorded texts found, padding with sample history texts")
+        texts += [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(args.limit - len(texts))]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        texts_path = os.path.join(tmpdir, "texts.json")
+        with open(texts_path, "w", encoding="utf-8") as f:
+            json.dump(texts, f)
+        torch_stats, torch_vectors = run_worker("torch", texts_path, args.batch_size, tmpdir)
+        onnx_stats, onnx_vectors = run_worker("onnx", texts_path, args.batch_size, tmpdir)
+
+    cosine = np.sum(torch_vectors * onnx_vectors, axis=1)
+    speedup = onnx_stats["texts_per_s"] / max(torch_stats["texts_per_s"], 1e-9)
+
+    print(f"Texts: {len(texts)}, batch size {args.batch_size}\n")
+    print(f"{'runtime':<10}{'load s':>10}{'texts/s':>12}{'RSS MB':>10}")
+    for stats in (torch_stats, onnx_stats):
+        print(f"{stats['backend']:<10}{stats['load_s']:>10.2f}{stats['texts_per_s']:>12.1f}{stats['rss_mb']:>10.0f}")
+    print(f"\nSpeedup: {speedup:.2f}x")
+    print(f"Cosine agreement: mean {cosine.mean():.4f}, min {cosine.min():.4f}, p1 {np.percentile(cosine, 1):.4f}")
+
+    failed = cosine.mean() < args.min_cosine or speedup < args.min_speedup
+    print("\nFAIL" if failed else "\nPASS")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Recall/latency benchmark of the HNSW profiles in utils/config.py.
+
+Generates a synthetic corpus of unit vectors shaped like MiniLM embeddings
+(384-d, clustered) at each size, builds a Chroma collection per profile in
+a temporary directory and reports build time, memory, on-disk size, query
+p50/p99 and recall@k against exact (brute-force) search. Every profile runs
+in its own interpreter so its memory is measured cleanly.
+
+Usage:
+    python benchmarks/hnsw_profiles.py [--sizes 10000,100000,1000000] [--profiles fast,balanced,accurate]
+                                       [--queries 200] [--k 10]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+import numpy as np
+
+DIM = 384
+CLUSTERS = 256
+SPREAD = 0.8  # noise norm around each cluster centre
+CHUNK = 50000
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def dir_size_mb(path: str) -> float:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(dirpath, f)) for f in filenames)
+    return total / 1024 / 1024
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+def generate_corpus(path: str, size: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors written in chunks to a .npy memmap."""
+    rng = np.random.default_rng(seed)
+    centers = _normalize(rng.standard_normal((CLUSTERS, DIM)))
+    corpus = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(size, DIM))
+    for start in range(0, size, CHUNK):
+        n = min(CHUNK, size - start)
+        labels = rng.integers(0, CLUSTERS, n)
+        corpus[start:start + n] = _normalize(centers[labels] + SPREAD * rng.standard_normal((n, DIM)) / np.sqrt(DIM))
+    corpus.flush()
+    return np.load(path, mmap_mode="r")
+
+def make_queries(corpus: np.ndarray, n: int, seed: int = 1) -> np.ndarray:
+    """Queries near random corpus points, like a user asking about a stored record."""
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(corpus), n, replace=False)
+    return _normalize(corpus[np.sort(picks)] + SPREAD / 2 * rng.standard_normal((n, DIM)) / np.sqrt(DIM))
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force nearest neighbours (max dot product = min L2 for unit vectors)."""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for start in range(0, len(corpus), CHUNK):
+        scores = queries @ np.asarray(corpus[start:start + CHUNK]).T
+        all_scores = np.hstack([best_scores, scores])
+        all_ids = np.hstack([best_ids, np.arange(start, start + scores.shape[1])[None, :].repeat(len(queries), 0)])
+        top = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(all_scores, top, 1)
+        best_ids = np.take_along_axis(all_ids, top, 1)
+    return best_ids
+
+def worker(profile: str, data_dir: str, k: int) -> dict:
+    import chromadb
+    from storage.chroma_client import hnsw_configuration
+
+    corpus = np.load(os.path.join(data_dir, "corpus.npy"), mmap_mode="r")
+    queries = np.load(os.path.join(data_dir, "queries.npy"))
+    db_dir = tempfile.mkdtemp(prefix=f"hnsw_{profile}_")
+    try:
+        base_rss = rss_mb()
+        client = chromadb.PersistentClient(path=db_dir)
+        collection = client.create_collection(
+            name=f"bench_{profile}", configuration={"hnsw": hnsw_configuration(profile)}, embedding_function=None
+        )
+        batch = client.get_max_batch_size()
+        started = time.perf_counter()
+        for start in range(0, len(corpus), batch):
+            chunk = np.asarray(corpus[start:start + batch])
+            collection.add(ids=[str(i) for i in range(start, start + len(chunk))], embeddings=chunk)
+        build_s = time.perf_counter() - started
+
+        collection.query(query_embeddings=queries[:1], n_results=k)  # warm-up
+        latencies, found = [], []
+        for q in queries:
+            t = time.perf_counter()
+            res = collection.query(query_embeddings=q[None, :], n_results=k, include=[])
+            latencies.append((time.perf_counter() - t) * 1000)
+            found.append([int(i) for i in res["ids"][0]])
+        return {
+            "profile": profile,
+            "build_s": build_s,
+            "rss_mb": rss_mb() - base_rss,
+            "disk_mb": dir_size_mb(db_dir),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "found": found
+        }
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+def run_profile(profile: str, data_dir: str, k: int) -> dict:
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", profile, "--data-dir", data_dir, "--k", str(k)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{profile} worker failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HNSW profiles: build time, memory, latency, recall@k")
+    parser.add_argument("--sizes", default="10000,100000", help="Comma-separated corpus sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--profiles", default=None, help="Comma-separated profiles (default: all)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.data_dir, args.k)))
+        return
+
+    from utils.config import HNSW_PROFILES
+    profiles = args.profiles.split(",") if args.profiles else list(HNSW_PROFILES)
+    print(f"{'size':>9} {'profile':<10}{'build s':>9}{'RSS MB':>9}{'disk MB':>9}{'p50 ms':>9}{'p99 ms':>9}{f'recall@{args.k}':>11}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory(prefix="hnsw_data_") as data_dir:
+            corpus = generate_corpus(os.path.join(data_dir, "corpus.npy"), size)
+            queries = make_queries(corpus, min(args.queries, size))
+            np.save(os.path.join(data_dir, "queries.npy"), queries)
+            truth = exact_top_k(corpus, queries, args.k)
+            for profile in profiles:
+                r = run_profile(profile, data_dir, args.k)
+                recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(r["found"], truth.tolist())])
+                print(f"{size:>9} {profile:<10}{r['build_s']:>9.1f}{r['rss_mb']:>9.0f}{r['disk_mb']:>9.0f}"
+                      f"{r['p50_ms']:>9.2f}{r['p99_ms']:>9.2f}{recall:>11.3f}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Import-time budget check for the Streamlit pages.
+
+For every page in interface/pages the project modules it imports (storage,
+prognosis, utils, ...) are imported in a fresh interpreter under
+`python -X importtime`. Streamlit itself is not measured because the server
+has already loaded it before any page runs. The script exits non-zero when
+a page goes over the budget.
+
+Usage:
+    python benchmarks/import_time.py [--budget-ms 500] [--repeat 3] [pages...]
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PAGES_DIR = os.path.join(PROJECT_ROOT, "interface", "pages")
+PROJECT_PACKAGES = {"storage", "prognosis", "utils", "workflows", "data_extraction"}
+
+
+def page_imports(page_path: str) -> list:
+    """Project modules imported at the top level of a page."""
+    with open(page_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=page_path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        elif isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        else:
+            continue
+        modules.extend(n for n in names if n.split(".")[0] in PROJECT_PACKAGES)
+    return modules
+
+
+def run_importtime(code: str) -> list:
+    """Run code under -X importtime and return (level, self_us, cumulative_us, module) rows."""
+    # A module that still opens Chroma at import must not touch the real data
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT, CHROMA_PERSIST_DIR=tempfile.mkdtemp(prefix="importtime_"))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        errors = [l for l in proc.stderr.splitlines() if l.strip() and not l.startswith("import time:")]
+        raise RuntimeError(errors[-1] if errors else "import failed")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        level = (len(name) - len(name.lstrip())) // 2
+        rows.append((level, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def measure(modules: list, baseline: set) -> tuple:
+    """Total import cost in ms of the given modules and the five slowest modules (self time)."""
+    code = "; ".join(f"import {m}" for m in modules) or "pass"
+    rows = run_importtime(code)
+    new_rows = [r for r in rows if r[3] not in baseline]
+    total_ms = sum(r[2] for r in new_rows if r[0] == 0) / 1000
+    heaviest = sorted(new_rows, key=lambda r: r[1], reverse=True)[:5]
+    return total_ms, [(name, self_us / 1000) for _, self_us, _, name in heaviest]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if page import cost goes over budget")
+    parser.add_argument("pages", nargs="*", help="Page files (default: all of interface/pages)")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", 500)))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per page; the fastest is kept")
+    args = parser.parse_args()
+
+    pages = args.pages or sorted(
+        os.path.join(PAGES_DIR, f) for f in os.listdir(PAGES_DIR) if f.endswith(".py")
+    )
+    baseline = {r[3] for r in run_importtime("pass")}
+
+    failures = 0
+    for page in pages:
+        modules = page_imports(page)
+        name = os.path.basename(page)
+        if not modules:
+            print(f"{name:<22} no project imports")
+            continue
+        try:
+            runs = [measure(modules, baseline) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<22} ERROR  {e}")
+            failures += 1
+            continue
+        total_ms, heaviest = min(runs, key=lambda r: r[0])
+        status = "ok" if total_ms <= args.budget_ms else "OVER"
+        failures += status == "OVER"
+        print(f"{name:<22} {total_ms:8.1f} ms  [{status}]  ({', '.join(modules)})")
+        if status == "OVER":
+            for module, ms in heaviest:
+                print(f"{'':<24}{ms:8.1f} ms  {module}")
+
+    print(f"\nBudget: {args.budget_ms:.0f} ms per page, {failures} page(s) over")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
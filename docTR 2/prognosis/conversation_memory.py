@@ -0,0 +1,107 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils.config import CHAT_MEMORY_TURNS, CHAT_TURN_TOKENS, CHAT_SUMMARY_TOKENS
+from utils.logger import setup_logger
+from prognosis.llm_client import get_llm_manager
+from prognosis.prompt_templates import compress_text, trim_to_tokens
+
+logger = setup_logger("conversation_memory")
+
+# Summaries are updated off the request path; one update at a time per conversation
+_summary_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+
+def summarize_exchanges(summary: str, exchanges: list, max_tokens: int = CHAT_SUMMARY_TOKENS) -> str:
+    """
+    Fold exchanges [(user, assistant)] into a running summary. If the LLM
+    call fails the questions are kept as a list instead, newest first.
+    """
+    transcript = "\n".join(f"User: {user}\nAssistant: {assistant}" for user, assistant in exchanges)
+    messages = [
+        {"role": "system", "content": "You keep a brief running summary of a health and fitness chat."},
+        {"role": "user", "content": (
+            f"Current summary:\n{summary or '(empty)'}\n\n"
+            f"New exchanges:\n{transcript}\n\n"
+            f"Rewrite the summary to include the new exchanges in at most {int(max_tokens * 0.7)} words of plain "
+            "text. Keep facts the user shared about themselves, their questions and preferences, and the advice given."
+        )}
+    ]
+    try:
+        completion = get_llm_manager().chat(messages, max_tokens=max_tokens)
+        text = completion.choices[0].message.content.strip()
+    except Exception as e:
+        logger.error(f"Chat summary update failed, keeping questions only: {e}")
+        asked = "\n".join(f"- User asked: {user}" for user, _ in reversed(exchanges))
+        text = f"{asked}\n{summary}"
+    return trim_to_tokens(compress_text(text), max_tokens)
+
+class ConversationMemory:
+    """
+    Chat memory of fixed size.
+
+    The last max_turns exchanges are kept verbatim (each message capped at
+    turn_tokens); older exchanges are folded into a rolling summary of at
+    most summary_tokens. Summary updates run in the background, so adding an
+    exchange never waits on the LLM; until an update lands, the prompt
+    carries the previous summary.
+    """
+
+    def __init__(self, max_turns: int = CHAT_MEMORY_TURNS, turn_tokens: int = CHAT_TURN_TOKENS,
+                 summary_tokens: int = CHAT_SUMMARY_TOKENS):
+        self.max_turns = max_turns
+        self.turn_tokens = turn_tokens
+        self.summary_tokens = summary_tokens
+        self.turns = deque()  # (user, assistant), oldest first
+        self.summary = ""
+        self.summarized = 0   # exchanges folded into the summary so far
+        self._pending = []    # dropped from turns, not yet in the summary
+        self._updating = False
+        self._generation = 0  # bumped by clear() so an update in flight is discarded
+        self._lock = threading.Lock()
+
+    def add_exchange(self, user: str, assistant: str):
+        with self._lock:
+            self.turns.append((trim_to_tokens(user, self.turn_tokens), trim_to_tokens(assistant, self.turn_tokens)))
+            while len(self.turns) > self.max_turns:
+                self._pending.append(self.turns.popleft())
+            if self._pending and not self._updating:
+                self._updating = True
+                _summary_pool.submit(self._update_summary)
+
+    def _update_summary(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._updating = False
+                    return
+                batch, self._pending = self._pending, []
+                summary, generation = self.summary, self._generation
+            updated = summarize_exchanges(summary, batch, self.summary_tokens)
+            with self._lock:
+                if generation != self._generation:
+                    continue
+                self.summary = updated
+                self.summarized += len(batch)
+            logger.info(f"Chat summary updated with {len(batch)} exchange(s), {self.summarized} in total")
+
+    def messages(self) -> list:
+        """Remembered exchanges as chat messages, oldest first."""
+        with self._lock:
+            turns = list(self.turns)
+        messages = []
+        for user, assistant in turns:
+            messages.append({"role": "user", "content": user})
+            messages.append({"role": "assistant", "content": assistant})
+        return messages
+
+    def summary_text(self) -> str:
+        with self._lock:
+            return self.summary
+
+    def clear(self):
+        with self._lock:
+            self.turns.clear()
+            self._pending = []
+            self.summary = ""
+            self.summarized = 0
+            self._generation += 1
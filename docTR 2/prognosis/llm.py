@@ -1,264 +1,520 @@
-import re
-from huggingface_hub import InferenceClient
-from utils.config import HUGGINGFACE_TOKEN, OPENBIOLLM_MODEL
-from utils.logger import setup_logger
-from prognosis.prompt_templates import get_health_prompt, get_workout_prompt
-
-logger = setup_logger("llm")
-
-def init_llm():
-    """Initialize Hugging Face InferenceClient for OpenBioLLM."""
-    try:
-        client = InferenceClient(
-            model=OPENBIOLLM_MODEL,
-            token=HUGGINGFACE_TOKEN,
-            provider="nebius"
-        )
-        logger.info(f"LLM client initialized: {OPENBIOLLM_MODEL}")
-        return client
-    except Exception as e:
-        logger.error(f"LLM initialization error: {e}")
-        return None
-
-def parse_health_response(text: str) -> dict:
-    """
-    Parse LLM response for health recommendations, handling Markdown and flexible formatting.
-    """
-    # Normalize the text for easier parsing
-    text = re.sub(r'\*\*', '', text)  # Remove bold markers
-    text = re.sub(r'\s+', ' ', text)  # Collapse multiple spaces
-    
-    # Extract key sections using more robust parsing
-    sections = {
-        "bmi": r"BMI:\s*([\d.]+)",
-        "weight_status": r"Weight Status:\s*([\w\s]+)",
-        "calorie_target": r"Daily Calorie Target:\s*([\d,]+)\s*kcal",
-        "macro_breakdown": r"Macro Breakdown:\s*([\s\S]+?)(?=Nutrition Guidance:|$)",
-        "nutrition_guidance": r"Nutrition Guidance:\s*([\s\S]+?)(?=3-Day Meal Plan:|$)",
-        "meal_plan": r"3-Day Meal Plan:\s*([\s\S]+?)(?=Grocery List:|$)",
-        "grocery_list": r"Grocery List:\s*([\s\S]+?)(?=Needs Doctor:|$)",
-        "needs_doctor": r"Needs Doctor:\s*(yes|no|true|false)"
-    }
-    
-    parsed = {}
-    for key, pattern in sections.items():
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            parsed[key] = match.group(1).strip()
-        else:
-            # Try more flexible matching without section headers
-            fallback = re.search(pattern.replace(r"\s*", r"\s*"), text, re.IGNORECASE)
-            parsed[key] = fallback.group(1).strip() if fallback else None
-    
-    # Process special cases
-    try:
-        parsed["bmi"] = float(parsed["bmi"]) if parsed["bmi"] else 0.0
-    except (ValueError, TypeError):
-        parsed["bmi"] = 0.0
-        
-    # Process needs_doctor field
-    if parsed["needs_doctor"]:
-        parsed["needs_doctor"] = parsed["needs_doctor"].lower() in ["yes", "true"]
-    else:
-        parsed["needs_doctor"] = False
-    
-    # Validate weight status
-    valid_weight_statuses = {"Underweight", "Normal weight", "Overweight", "Obese"}
-    if parsed["weight_status"] and parsed["weight_status"] not in valid_weight_statuses:
-        logger.warning(f"Invalid weight status '{parsed['weight_status']}', setting to Unknown")
-        parsed["weight_status"] = "Unknown"
-
-    logger.info(f"Parsed health response: BMI={parsed['bmi']}, Calories={parsed['calorie_target']}")
-    return parsed
-
-def parse_workout_response(text: str) -> dict:
-    """
-    Parse LLM response for workout plan, handling Markdown and flexible formatting.
-    """
-    text = re.sub(r'\s+', ' ', text.strip())
-    text = re.sub(r'\*\*', '', text)
-
-    # Extract key sections with improved patterns
-    sections = {
-        "calorie_burn_target": r"calorie burn target[:\s]*([\d,]+)\s*kcal",
-        "overview": r"overview[:\s]*([\s\S]+?)(?=\n\s*Schedule:|$)",
-        "schedule": r"schedule[:\s]*([\s\S]+?)(?=\n\s*Explanation:|$)",
-        "explanation": r"explanation[:\s]*([\s\S]+)"
-    }
-    
-    parsed = {}
-    for key, pattern in sections.items():
-        match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-        parsed[key] = match.group(1).strip() if match else None
-    
-    # Parse schedule into days
-    if parsed["schedule"]:
-        days = []
-        day_pattern = r"Day \d+:(.+?)(?=(Day \d+:|$))"
-        day_matches = re.finditer(day_pattern, parsed["schedule"], re.IGNORECASE | re.DOTALL)
-        
-        for match in day_matches:
-            day_text = match.group(1).strip()
-            day_data = {
-                "focus": re.search(r"Focus[:\s]*(.+)", day_text).group(1).strip() if re.search(r"Focus", day_text) else "General Fitness",
-                "duration": re.search(r"Duration[:\s]*(.+)", day_text).group(1).strip() if re.search(r"Duration", day_text) else "30-45 minutes",
-                "calorie_burn": re.search(r"Calorie Burn[:\s]*([\d,]+)\s*kcal", day_text).group(1).strip() if re.search(r"Calorie Burn", day_text) else "Unknown",
-                "details": day_text
-            }
-            days.append(day_data)
-        
-        parsed["schedule"] = days
-    else:
-        parsed["schedule"] = []
-
-    logger.info(f"Parsed workout response: Days={len(parsed['schedule'])}")
-    return parsed
-def process_health_data(health_data: dict, client=None) -> dict:
-    """
-    Generate health recommendations using OpenBioLLM based on health profile and goal.
-    """
-    if client is None:
-        client = init_llm()
-    if client is None:
-        logger.warning("No LLM client available.")
-        return {
-            "bmi": 0.0,
-            "weight_status": "Unknown",
-            "calorie_target": "Unknown",
-            "macro_breakdown": "Unknown",
-            "nutrition_guidance": "LLM init failed",
-            "meal_plan": [],
-            "grocery_list": "No grocery list provided",
-            "needs_doctor": False
-        }
-
-    prompt = get_health_prompt(health_data)
-    messages = [
-        {"role": "system", "content": "You are a health advisor with expertise in nutrition and fitness."},
-        {"role": "user", "content": prompt}
-    ]
-
-    try:
-        completion = client.chat.completions.create(
-            model=OPENBIOLLM_MODEL,
-            messages=messages,
-            max_tokens=1500  # Increased for detailed meal plans
-        )
-        text = completion.choices[0].message.content.strip()
-        logger.info(f"Health response:\n{text[:500]}...")
-        return parse_health_response(text)
-
-    except Exception as e:
-        logger.error(f"Health recommendation generation error: {e}")
-        return {
-            "bmi": 0.0,
-            "weight_status": "Unknown",
-            "calorie_target": "Unknown",
-            "macro_breakdown": "Unknown",
-            "nutrition_guidance": str(e),
-            "meal_plan": [],
-            "grocery_list": "No grocery list provided",
-            "needs_doctor": False
-        }
-
-def process_workout_data(workout_data: dict, client=None) -> dict:
-    """
-    Generate a workout plan using OpenBioLLM based on health profile, goal, and recommendations.
-    """
-    if client is None:
-        client = init_llm()
-    if client is None:
-        logger.warning("No LLM client available.")
-        return {
-            "calorie_burn_target": "Unknown",
-            "overview": "No workout plan provided",
-            "schedule": [],
-            "explanation": "LLM init failed."
-        }
-
-    prompt = get_workout_prompt(workout_data)
-    messages = [
-        {"role": "system", "content": "You are a fitness advisor with expertise in creating workout plans."},
-        {"role": "user", "content": prompt}
-    ]
-
-    try:
-        completion = client.chat.completions.create(
-            model=OPENBIOLLM_MODEL,
-            messages=messages,
-            max_tokens=1200  # Increased for detailed schedules
-        )
-        text = completion.choices[0].message.content.strip()
-        logger.info(f"Workout response:\n{text[:500]}...")
-        return parse_workout_response(text)
-
-    except Exception as e:
-        logger.error(f"Workout plan generation error: {e}")
-        return {
-            "calorie_burn_target": "Unknown",
-            "overview": "No workout plan provided",
-            "schedule": [],
-            "explanation": str(e)
-        }
-
-def generate_chat_response(user_query: str, health_context: dict, client=None) -> str:
-    """
-    Generate a response to a user's health-related question.
-    """
-    if client is None:
-        client = init_llm()
-    if client is None:
-        logger.warning("No LLM client available.")
-        return "Sorry, I couldn't process your question due to a technical issue."
-    
-    # Build context string
-    context_str = (
-        f"Health Profile:\n"
-        f"- Age: {health_context['profile']['age']}\n"
-        f"- Gender: {health_context['profile']['gender']}\n"
-        f"- Height: {health_context['profile']['height']} m\n"
-        f"- Weight: {health_context['profile']['weight']} kg\n"
-        f"- Activity Level: {health_context['profile']['activity_level']}\n\n"
-        
-        f"Health Goal:\n"
-        f"{health_context['goal']['description']}\n\n"
-        
-        f"Current Recommendations:\n"
-        f"- Calorie Target: {health_context.get('recommendation', {}).get('calorie_target', 'Unknown')} kcal\n"
-        f"- Nutrition Guidance: {health_context.get('recommendation', {}).get('nutrition_guidance', '')[:100]}...\n"
-    )
-    
-    prompt = f"""
-You are a health advisor with expertise in nutrition and fitness. Answer the user's question based on their health profile, goals, and current recommendations. Provide accurate, personalized advice in a friendly, conversational tone.
-
-**Health Context**:
-{context_str}
-
-**User Question**:
-{user_query}
-
-**Response Guidelines**:
-1. Be specific to the user's profile and goals
-2. Keep responses concise but informative
-3. Offer practical, actionable advice
-4. Avoid medical disclaimers unless necessary
-5. Use bullet points for complex information
-
-**Response**:
-"""
-    messages = [
-        {"role": "system", "content": "You are a health advisor with expertise in nutrition and fitness."},
-        {"role": "user", "content": prompt}
-    ]
-    try:
-        completion = client.chat.completions.create(
-            model=OPENBIOLLM_MODEL,
-            messages=messages,
-            max_tokens=512
-        )
-        response = completion.choices[0].message.content.strip()
-        logger.info(f"Chat response:\n{response[:300]}...")
-        return response
-    except Exception as e:
-        logger.error(f"Chat response generation error: {e}")
-        return "Sorry, I couldn't process your question. Please try again later."
\ No newline at end of file
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.config import LLM_MAX_CONCURRENCY, STRUCTURED_OUTPUT
+from utils.logger import setup_logger
+from utils.nutrition import nutrition_targets
+from prognosis.prompt_templates import get_health_prompt, get_workout_prompt, get_chat_context
+from prognosis.llm_client import get_llm_manager
+from prognosis.response_cache import get_response_cache, prompt_hash
+from prognosis.plan_schema import (
+    HEALTH_PLAN_SCHEMA, WORKOUT_PLAN_SCHEMA, schema_instructions, sub_schema, extract_json, validate_plan,
+    health_plan_fields, workout_plan_fields
+)
+from prognosis.stream_parser import (
+    HEALTH_SECTIONS, WORKOUT_SECTIONS, parse_sections, health_fields, workout_fields
+)
+
+logger = setup_logger("llm")
+
+# Background generations (e.g. the workout plan while the health plan streams);
+# the LLM manager's semaphore still bounds how many reach the API at once
+_plan_pool = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="plan")
+
+class _Flight:
+    """One in-flight generation; every caller reads the same tokens as they arrive."""
+
+    def __init__(self):
+        self.parts = []
+        self.done = False
+        self.error = None
+        self.callers = 1
+        self._cond = threading.Condition()
+
+    def publish(self, token: str):
+        with self._cond:
+            self.parts.append(token)
+            self._cond.notify_all()
+
+    def finish(self, error: Exception = None):
+        with self._cond:
+            self.done, self.error = True, error
+            self._cond.notify_all()
+
+    def follow(self):
+        """Yield the tokens from the first one; raises the producer's error once they run out."""
+        seen = 0
+        while True:
+            with self._cond:
+                while seen == len(self.parts) and not self.done:
+                    self._cond.wait()
+                parts, done, error = self.parts[seen:], self.done, self.error
+            seen += len(parts)
+            yield from parts
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+    def result(self) -> str:
+        return "".join(self.follow())
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+def single_flight(key: str, produce) -> _Flight:
+    """
+    Join the generation in flight for key, or start produce(publish) for it.
+
+    produce runs on its own thread and publishes tokens (or one whole text)
+    as it goes, so identical requests from any session share one LLM call,
+    and a caller that stops reading (e.g. a Streamlit rerun) does not cancel
+    it for the others.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight is not None:
+            flight.callers += 1
+            logger.info(f"Joined in-flight generation {key[:12]} ({flight.callers} callers)")
+            return flight
+        flight = _flights[key] = _Flight()
+
+    def run():
+        error = None
+        try:
+            produce(flight.publish)
+        except Exception as e:
+            error = e
+        finally:
+            with _flights_lock:
+                _flights.pop(key, None)
+            flight.finish(error)
+
+    threading.Thread(target=run, name=f"flight-{key[:8]}", daemon=True).start()
+    return flight
+
+def _shared_text(namespace: str, messages: list, generate) -> str:
+    """Text of generate() for these messages, shared with identical calls already in flight."""
+    return single_flight(prompt_hash(namespace, messages), lambda publish: publish(generate())).result()
+
+def init_llm():
+    """Return the shared OpenBioLLM InferenceClient (None if it cannot be created)."""
+    return get_llm_manager().client
+
+def parse_health_response(text: str, targets: dict = None) -> dict:
+    """
+    Parse LLM response for health recommendations, handling Markdown and flexible formatting.
+    The numeric fields come from targets (see health_targets) when given.
+    """
+    parsed = health_fields(parse_sections(text, HEALTH_SECTIONS).sections)
+    parsed.update(targets or {})
+    logger.info(f"Parsed health response: BMI={parsed['bmi']}, Calories={parsed['calorie_target']}")
+    return parsed
+
+def parse_workout_response(text: str) -> dict:
+    """
+    Parse LLM response for workout plan, handling Markdown and flexible formatting.
+    """
+    parser = parse_sections(text, WORKOUT_SECTIONS, days=True)
+    parsed = workout_fields(parser.sections, parser.days)
+    logger.info(f"Parsed workout response: Days={len(parsed['schedule'])}")
+    return parsed
+
+def _bucket(value, step: float):
+    try:
+        return round(round(float(value) / step) * step, 2)
+    except (TypeError, ValueError):
+        return value
+
+def _profile_guard(profile: dict) -> dict:
+    """Profile fields a cached plan must share: exact where it matters, bucketed body measures."""
+    return {
+        "age": _bucket(profile.get("age"), 5),
+        "height": _bucket(profile.get("height"), 0.05),
+        "weight": _bucket(profile.get("weight"), 2.5),
+        "gender": profile.get("gender"),
+        "activity_level": profile.get("activity_level"),
+        "medical_history": profile.get("medical_history")
+    }
+
+def _goal_guard(goal: dict) -> dict:
+    """Parsed Step 4 goal fields a cached plan must share; only the wording may differ."""
+    timeline = goal.get("timeline")
+    return {
+        "goal_type": goal.get("type"),
+        "target_weight": _bucket(goal.get("target_weight"), 0.1),
+        "timeline": f"{timeline.get('value')} {timeline.get('unit')}" if isinstance(timeline, dict) else timeline
+    }
+
+def health_cache_keys(health_data: dict) -> dict:
+    """
+    Semantic cache guard and text for a health plan: same profile buckets,
+    labs and history, similar goal wording. guard_key only keeps a hash, so
+    the report and history texts are not held in the cache.
+    """
+    profile, goal = health_data["profile"], health_data["goal"]
+    guard = {**_profile_guard(profile), **_goal_guard(goal)}
+    guard.update({
+        "allergies": profile.get("allergies"),
+        # Raw prompt context: the fitted sections are derived from it
+        "blood_report_data": profile.get("blood_report_data"),
+        "history_context": health_data.get("history_context") or ""
+    })
+    return {"guard": guard, "semantic_text": goal.get("description")}
+
+def workout_cache_keys(workout_data: dict) -> dict:
+    """Semantic cache guard and text for a workout plan."""
+    recommendation = workout_data.get("health_recommendation", {})
+    guard = {**_profile_guard(workout_data["profile"]), **_goal_guard(workout_data["goal"])}
+    guard.update({
+        "calorie_target": recommendation.get("calorie_target"),
+        "weight_status": recommendation.get("weight_status"),
+        "health_status": recommendation.get("health_status")
+    })
+    return {"guard": guard, "semantic_text": workout_data["goal"].get("description")}
+
+def _cache_lookup(namespace: str, messages: list, keys: dict):
+    """Cached plan text for these messages, or None."""
+    hit = get_response_cache().lookup(namespace, messages, **keys)
+    if hit is None:
+        return None
+    logger.info(f"{namespace.title()} plan served from cache: {hit['provenance']}")
+    return hit["text"]
+
+def _health_fallback(message: str, targets: dict) -> dict:
+    """Health result when no plan could be generated; the local targets still apply."""
+    return {
+        "bmi": 0.0,
+        "weight_status": "Unknown",
+        "calorie_target": "Unknown",
+        "macro_breakdown": "Unknown",
+        "nutrition_guidance": message,
+        "meal_plan": [],
+        "grocery_list": "No grocery list provided",
+        "needs_doctor": False,
+        **targets
+    }
+
+def _workout_fallback(message: str) -> dict:
+    return {
+        "calorie_burn_target": "Unknown",
+        "overview": "No workout plan provided",
+        "schedule": [],
+        "explanation": message
+    }
+
+def _plan_spec(namespace: str) -> tuple:
+    """(schema, message builder, cache keys, max_tokens) of a plan kind."""
+    if namespace == "health":
+        return HEALTH_PLAN_SCHEMA, build_health_messages, health_cache_keys, 1500
+    return WORKOUT_PLAN_SCHEMA, build_workout_messages, workout_cache_keys, 1200
+
+def _complete_json(messages: list, schema: dict, name: str, max_tokens: int, client=None) -> str:
+    kwargs = {}
+    if STRUCTURED_OUTPUT == "grammar":
+        kwargs["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": name, "schema": schema, "strict": True}
+        }
+    completion = get_llm_manager().chat(messages, max_tokens=max_tokens, client=client, **kwargs)
+    return completion.choices[0].message.content.strip()
+
+def repair_plan(namespace: str, data: dict, missing: list, client=None) -> dict:
+    """
+    Ask only for the missing top-level fields of a plan (same context, a
+    schema with just those fields). Returns the fields that came back valid.
+    """
+    schema, build, _, max_tokens = _plan_spec(namespace)
+    partial = sub_schema(schema, missing)
+    logger.warning(f"{namespace.title()} plan missing {missing}, requesting only those fields")
+    try:
+        messages = build(data, schema_instructions(partial))
+        text = _shared_text(f"{namespace}-repair", messages, lambda: _complete_json(
+            messages, partial, f"{namespace}_plan_repair", max_tokens, client
+        ))
+    except Exception as e:
+        logger.error(f"{namespace.title()} plan repair failed: {e}")
+        return {}
+    repaired, still_missing = validate_plan(extract_json(text), partial)
+    if still_missing:
+        logger.warning(f"{namespace.title()} plan repair did not return {still_missing}")
+    return repaired
+
+def generate_structured_plan(namespace: str, data: dict, client=None) -> tuple:
+    """
+    Generate a plan as JSON, validate it against its schema in one pass and
+    repair only the fields that are missing or invalid. Raises if the
+    generation call itself fails.
+
+    Returns:
+        tuple: (dict of valid plan fields, list of fields still missing)
+    """
+    schema, build, cache_keys, max_tokens = _plan_spec(namespace)
+    namespace_key = f"{namespace}-json"  # never mixed with Markdown plans in the cache
+    messages = build(data, schema_instructions(schema))
+    keys = cache_keys(data)
+    text = _cache_lookup(namespace_key, messages, keys)
+    cached = text is not None
+    if not cached:
+        text = _shared_text(namespace_key, messages, lambda: _complete_json(
+            messages, schema, f"{namespace}_plan", max_tokens, client
+        ))
+        logger.info(f"{namespace.title()} response:\n{text[:500]}...")
+
+    plan, missing = validate_plan(extract_json(text), schema)
+    if missing:
+        plan.update(repair_plan(namespace, data, missing, client))
+        plan, missing = validate_plan(plan, schema)
+    if not cached and not missing:
+        get_response_cache().store(namespace_key, messages, json.dumps(plan), **keys)
+    return plan, missing
+
+def complete_health_fields(health_data: dict, fields: dict, client=None) -> dict:
+    """Fill in narrative health fields a parsed (e.g. streamed) plan lacks with one targeted call."""
+    missing = [key for key in ("nutrition_guidance", "meal_plan", "grocery_list") if not fields.get(key)]
+    if missing:
+        repaired = health_plan_fields(repair_plan("health", health_data, missing, client))
+        fields.update({key: repaired[key] for key in missing if repaired.get(key)})
+    return fields
+
+def build_health_messages(health_data: dict, response_format: str = None) -> list:
+    return [
+        {"role": "system", "content": "You are a health advisor with expertise in nutrition and fitness."},
+        {"role": "user", "content": get_health_prompt(health_data, response_format)}
+    ]
+
+def process_health_data(health_data: dict, client=None) -> dict:
+    """
+    Generate health recommendations using OpenBioLLM based on health profile and goal.
+    """
+    targets = health_targets(health_data["profile"], health_data["goal"])
+    if STRUCTURED_OUTPUT != "markdown":
+        try:
+            plan, _ = generate_structured_plan("health", health_data, client)
+            parsed = {**health_fields({}), **health_plan_fields(plan), **targets}
+            logger.info(f"Parsed health plan: BMI={parsed['bmi']}, Calories={parsed['calorie_target']}")
+            return parsed
+        except Exception as e:
+            logger.error(f"Health recommendation generation error: {e}")
+            return _health_fallback(str(e), targets)
+
+    messages = build_health_messages(health_data)
+    cached = _cache_lookup("health", messages, health_cache_keys(health_data))
+    if cached is not None:
+        return parse_health_response(cached, targets)
+
+    if client is None:
+        client = init_llm()
+    if client is None:
+        logger.warning("No LLM client available.")
+        return _health_fallback("LLM init failed", targets)
+
+    try:
+        text = _shared_text("health", messages, lambda: get_llm_manager().chat(
+            messages,
+            max_tokens=1500,  # Increased for detailed meal plans
+            client=client
+        ).choices[0].message.content.strip())
+        logger.info(f"Health response:\n{text[:500]}...")
+        get_response_cache().store("health", messages, text, **health_cache_keys(health_data))
+        return parse_health_response(text, targets)
+
+    except Exception as e:
+        logger.error(f"Health recommendation generation error: {e}")
+        return _health_fallback(str(e), targets)
+
+def build_workout_messages(workout_data: dict, response_format: str = None) -> list:
+    return [
+        {"role": "system", "content": "You are a fitness advisor with expertise in creating workout plans."},
+        {"role": "user", "content": get_workout_prompt(workout_data, response_format)}
+    ]
+
+def process_workout_data(workout_data: dict, client=None) -> dict:
+    """
+    Generate a workout plan using OpenBioLLM based on health profile, goal, and recommendations.
+    """
+    if STRUCTURED_OUTPUT != "markdown":
+        try:
+            plan, _ = generate_structured_plan("workout", workout_data, client)
+            parsed = workout_plan_fields(plan)
+            logger.info(f"Parsed workout plan: Days={len(parsed['schedule'])}")
+            return parsed
+        except Exception as e:
+            logger.error(f"Workout plan generation error: {e}")
+            return _workout_fallback(str(e))
+
+    messages = build_workout_messages(workout_data)
+    cached = _cache_lookup("workout", messages, workout_cache_keys(workout_data))
+    if cached is not None:
+        return parse_workout_response(cached)
+
+    if client is None:
+        client = init_llm()
+    if client is None:
+        logger.warning("No LLM client available.")
+        return _workout_fallback("LLM init failed.")
+
+    try:
+        text = _shared_text("workout", messages, lambda: get_llm_manager().chat(
+            messages,
+            max_tokens=1200,  # Increased for detailed schedules
+            client=client
+        ).choices[0].message.content.strip())
+        logger.info(f"Workout response:\n{text[:500]}...")
+        get_response_cache().store("workout", messages, text, **workout_cache_keys(workout_data))
+        return parse_workout_response(text)
+
+    except Exception as e:
+        logger.error(f"Workout plan generation error: {e}")
+        return _workout_fallback(str(e))
+
+def health_targets(profile: dict, goal: dict) -> dict:
+    """Locally calculated BMI, weight status, calorie target and macros ({} if the profile is incomplete)."""
+    try:
+        return nutrition_targets(profile, goal)
+    except (TypeError, ValueError) as e:
+        logger.error(f"Could not calculate nutrition targets: {e}")
+        return {}
+
+def estimate_workout_inputs(profile: dict, goal: dict) -> dict:
+    """
+    Calorie target and weight status for the workout prompt, computed from the
+    profile so the workout plan need not wait for the health plan.
+    """
+    targets = health_targets(profile, goal)
+    return {
+        "calorie_target": targets.get("calorie_target", "Unknown"),
+        "weight_status": targets.get("weight_status", "Unknown")
+    }
+
+def build_workout_request(profile: dict, goal: dict, workout_type: str = "🏠 Home Workout (No Equipment)",
+                          intensity: int = 3) -> dict:
+    """workout_data for process_workout_data with locally estimated health inputs."""
+    return {
+        "profile": profile,
+        "goal": goal,
+        "health_recommendation": estimate_workout_inputs(profile, goal),
+        "workout_type": workout_type,
+        "intensity": intensity
+    }
+
+def submit_workout_plan(workout_data: dict, client=None):
+    """Start process_workout_data in the background; returns a Future of the parsed plan."""
+    return _plan_pool.submit(process_workout_data, workout_data, client)
+
+def build_chat_messages(user_query: str, health_context: dict, memory=None) -> list:
+    """
+    Chat prompt: health context, then, with a ConversationMemory, the rolling
+    summary and the recent exchanges as prior turns, so the size is bounded.
+    """
+    # Build context string
+    context_str = get_chat_context(health_context)
+    summary = memory.summary_text() if memory is not None else ""
+    if summary:
+        context_str += f"\nEarlier In This Conversation:\n{summary}\n"
+    
+    prompt = f"""
+You are a health advisor with expertise in nutrition and fitness. Answer the user's question based on their health profile, goals, and current recommendations. Provide accurate, personalized advice in a friendly, conversational tone.
+
+**Health Context**:
+{context_str}
+
+**User Question**:
+{user_query}
+
+**Response Guidelines**:
+1. Be specific to the user's profile and goals
+2. Keep responses concise but informative
+3. Offer practical, actionable advice
+4. Avoid medical disclaimers unless necessary
+5. Use bullet points for complex information
+
+**Response**:
+"""
+    messages = [
+        {"role": "system", "content": "You are a health advisor with expertise in nutrition and fitness."},
+        *(memory.messages() if memory is not None else []),
+        {"role": "user", "content": prompt}
+    ]
+    return messages
+
+def generate_chat_response(user_query: str, health_context: dict, client=None, memory=None) -> str:
+    """
+    Generate a response to a user's health-related question.
+    """
+    if client is None:
+        client = init_llm()
+    if client is None:
+        logger.warning("No LLM client available.")
+        return "Sorry, I couldn't process your question due to a technical issue."
+    
+    messages = build_chat_messages(user_query, health_context, memory)
+    try:
+        completion = get_llm_manager().chat(messages, max_tokens=512, client=client)
+        response = completion.choices[0].message.content.strip()
+        logger.info(f"Chat response:\n{response[:300]}...")
+        return response
+    except Exception as e:
+        logger.error(f"Chat response generation error: {e}")
+        return "Sorry, I couldn't process your question. Please try again later."
+
+def _stream(messages: list, max_tokens: int, client, label: str):
+    """Yield tokens from the shared client, logging the time to first token."""
+    started = time.perf_counter()
+    n_tokens = 0
+    for token in get_llm_manager().stream(messages, max_tokens=max_tokens, client=client):
+        if n_tokens == 0:
+            logger.info(f"{label} first token after {time.perf_counter() - started:.2f}s")
+        n_tokens += 1
+        yield token
+    logger.info(f"{label} streamed {n_tokens} chunks in {time.perf_counter() - started:.2f}s")
+
+def _cached_stream(namespace: str, messages: list, max_tokens: int, client, keys: dict):
+    """
+    Yield a cached plan in one piece, or stream it and cache the completed
+    text; identical streams in flight share one generation.
+    """
+    cached = _cache_lookup(namespace, messages, keys)
+    if cached is not None:
+        yield cached
+        return
+
+    def produce(publish):
+        parts = []
+        for token in _stream(messages, max_tokens, client, f"{namespace.title()} plan"):
+            parts.append(token)
+            publish(token)
+        get_response_cache().store(namespace, messages, "".join(parts).strip(), **keys)
+
+    yield from single_flight(prompt_hash(namespace, messages), produce).follow()
+
+def stream_health_data(health_data: dict, client=None):
+    """
+    Stream the health plan text token by token; parse the joined text with
+    parse_health_response and health_targets. Raises if generation fails.
+    """
+    yield from _cached_stream("health", build_health_messages(health_data), 1500, client,
+                              health_cache_keys(health_data))
+
+def stream_workout_data(workout_data: dict, client=None):
+    """
+    Stream the workout plan text token by token; parse the joined text with
+    parse_workout_response. Raises if generation fails.
+    """
+    yield from _cached_stream("workout", build_workout_messages(workout_data), 1200, client,
+                              workout_cache_keys(workout_data))
+
+def stream_chat_response(user_query: str, health_context: dict, client=None, memory=None):
+    """
+    Stream the answer to a user's question token by token (for st.write_stream).
+    On failure an apology is yielded instead of raising.
+    """
+    started = False
+    try:
+        for token in _stream(build_chat_messages(user_query, health_context, memory), 512, client, "Chat response"):
+            started = True
+            yield token
+    except Exception as e:
+        logger.error(f"Chat response streaming error: {e}")
+        yield ("\n\n" if started else "") + "Sorry, I couldn't process your question. Please try again later."
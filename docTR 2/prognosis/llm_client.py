@@ -0,0 +1,261 @@
+import threading
+import time
+from contextlib import contextmanager
+from utils.config import (
+    HUGGINGFACE_TOKEN, OPENBIOLLM_MODEL, LLM_PROVIDER, LLM_MAX_CONCURRENCY, LLM_ACQUIRE_TIMEOUT_S,
+    LLM_POOL_CONNECTIONS, LLM_KEEPALIVE_S, LLM_TIMEOUT_S, LLM_FAILURE_THRESHOLD, LLM_COOLDOWN_S
+)
+from utils.logger import setup_logger
+
+logger = setup_logger("llm_client")
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when no LLM call can be made: client missing, breaker open or all slots busy."""
+
+def _configure_http_pool():
+    """
+    Give huggingface_hub one keep-alive connection pool for the whole process,
+    so consecutive requests reuse a warm TLS connection.
+    """
+    import huggingface_hub
+    if hasattr(huggingface_hub, "set_client_factory"):
+        # huggingface_hub >= 1.0 shares one httpx.Client; the default drops idle connections after 5s
+        import httpx
+
+        def pooled_client():
+            return httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=LLM_POOL_CONNECTIONS,
+                    max_keepalive_connections=LLM_POOL_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_S
+                ),
+                follow_redirects=True,
+                timeout=None
+            )
+
+        huggingface_hub.set_client_factory(pooled_client)
+    elif hasattr(huggingface_hub, "configure_http_backend"):
+        # Older releases use one requests.Session per thread
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        def pooled_session():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=LLM_POOL_CONNECTIONS, pool_maxsize=LLM_POOL_CONNECTIONS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            return session
+
+        huggingface_hub.configure_http_backend(backend_factory=pooled_session)
+
+def _reset_http_pool():
+    """Drop pooled connections (e.g. after repeated failures) so the next call reconnects."""
+    try:
+        from huggingface_hub import close_session
+        close_session()
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.error(f"Closing LLM connections failed: {e}")
+
+class LLMClientManager:
+    """
+    Process-wide OpenBioLLM client.
+
+    One InferenceClient over one keep-alive connection pool is shared by
+    every prognosis call. A semaphore caps concurrent requests, and a circuit
+    breaker stops calls for LLM_COOLDOWN_S after LLM_FAILURE_THRESHOLD
+    consecutive failures instead of letting every page wait for a timeout.
+    After the cooldown the breaker is half-open: a single probe call goes
+    through while others are still refused, and its outcome closes the
+    breaker or opens it for another cooldown.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, acquire_timeout: float = LLM_ACQUIRE_TIMEOUT_S,
+                 failure_threshold: int = LLM_FAILURE_THRESHOLD, cooldown_s: float = LLM_COOLDOWN_S):
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._state_lock = threading.Lock()
+        self._in_flight = 0
+        self._failures = 0
+        self._state = self.CLOSED
+        self._open_until = 0.0
+        self._probing = False
+        self._last_error = None
+        self._last_success = None
+        self._calls = 0
+
+    @property
+    def client(self):
+        """The shared InferenceClient, created on first use; None if it cannot be created."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        # Imported here: huggingface_hub alone adds ~0.5s to every page import
+                        from huggingface_hub import InferenceClient
+                        _configure_http_pool()
+                        self._client = InferenceClient(
+                            model=OPENBIOLLM_MODEL,
+                            token=HUGGINGFACE_TOKEN,
+                            provider=LLM_PROVIDER,
+                            timeout=LLM_TIMEOUT_S
+                        )
+                        logger.info(f"LLM client initialized: {OPENBIOLLM_MODEL} "
+                                    f"(max {self.max_concurrency} concurrent, pool {LLM_POOL_CONNECTIONS})")
+                    except Exception as e:
+                        logger.error(f"LLM initialization error: {e}")
+                        return None
+        return self._client
+
+    def is_healthy(self) -> bool:
+        """False while the circuit breaker is open and cooling down."""
+        return self._state != self.OPEN or time.time() >= self._open_until
+
+    def _admit(self) -> bool:
+        """
+        Let a call through the breaker or raise LLMUnavailableError.
+
+        Returns:
+            bool: True if the call is the half-open probe
+        """
+        with self._state_lock:
+            if self._state == self.OPEN:
+                if time.time() < self._open_until:
+                    raise LLMUnavailableError(f"LLM unavailable after repeated failures: {self._last_error}")
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN:
+                if self._probing:
+                    raise LLMUnavailableError("LLM recovering; waiting for the probe call to finish")
+                self._probing = True
+                return True
+            return False
+
+    @contextmanager
+    def session(self, client=None):
+        """
+        Hold one concurrency slot and yield a client (the shared one unless given).
+        Success or failure of the block feeds the circuit breaker.
+        """
+        probe = self._admit()
+        try:
+            client = client or self.client
+            if client is None:
+                raise LLMUnavailableError("LLM client could not be initialized")
+            if not self._slots.acquire(timeout=self.acquire_timeout):
+                raise LLMUnavailableError(f"All {self.max_concurrency} LLM slots busy for {self.acquire_timeout}s")
+        except LLMUnavailableError:
+            self._end_probe(probe)
+            raise
+        with self._state_lock:
+            self._in_flight += 1
+            self._calls += 1
+        try:
+            yield client
+        except Exception as e:
+            self._record_failure(e, probe)
+            raise
+        else:
+            self._record_success()
+        finally:
+            # A probe abandoned without an outcome (e.g. a stream closed early) lets the next call probe
+            self._end_probe(probe)
+            with self._state_lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _end_probe(self, probe: bool):
+        if probe:
+            with self._state_lock:
+                self._probing = False
+
+    def _record_success(self):
+        with self._state_lock:
+            if self._state != self.CLOSED:
+                logger.info("LLM probe succeeded, resuming calls")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._last_success = time.time()
+
+    def _record_failure(self, error: Exception, probe: bool = False):
+        with self._state_lock:
+            self._failures += 1
+            self._last_error = str(error)[:200]
+            tripped = probe or (self._state == self.CLOSED and self._failures >= self.failure_threshold)
+            if tripped:
+                self._state = self.OPEN
+                self._open_until = time.time() + self.cooldown_s
+        if tripped:
+            reason = "probe failed" if probe else f"failed {self.failure_threshold} times in a row"
+            logger.error(f"LLM {reason}, pausing calls for {self.cooldown_s}s: {error}")
+            _reset_http_pool()
+
+    def chat(self, messages: list, max_tokens: int, client=None, **kwargs):
+        """Run one chat completion through the pool; raises on failure."""
+        with self.session(client) as llm:
+            return llm.chat.completions.create(
+                model=OPENBIOLLM_MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+
+    def stream(self, messages: list, max_tokens: int, client=None, **kwargs):
+        """
+        Yield the completion's text deltas as they arrive. The slot is held
+        until the stream is exhausted or the consumer stops iterating.
+        """
+        with self.session(client) as llm:
+            for chunk in llm.chat.completions.create(
+                model=OPENBIOLLM_MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                stream=True,
+                **kwargs
+            ):
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+
+    def check_health(self) -> bool:
+        """Active probe: a one-token completion. Updates the breaker like any other call."""
+        try:
+            self.chat([{"role": "user", "content": "ping"}], max_tokens=1)
+            return True
+        except Exception as e:
+            logger.warning(f"LLM health check failed: {e}")
+            return False
+
+    def health(self) -> dict:
+        """Snapshot of client state for status displays and logs."""
+        with self._state_lock:
+            return {
+                "initialized": self._client is not None,
+                "healthy": self.is_healthy(),
+                "breaker": self._state,
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "calls": self._calls,
+                "consecutive_failures": self._failures,
+                "last_error": self._last_error,
+                "last_success": self._last_success
+            }
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_llm_manager() -> LLMClientManager:
+    """Return the process-wide LLM client manager."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = LLMClientManager()
+    return _manager
@@ -0,0 +1,183 @@
+import json
+from utils.logger import setup_logger
+
+logger = setup_logger("plan_schema")
+
+# JSON output of the plan prompts in structured mode. Only the subset of JSON
+# Schema used here is validated: object/array/string/integer/boolean,
+# properties, required and minItems.
+HEALTH_PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "nutrition_guidance": {"type": "string", "description": "2-3 paragraphs on the dietary approach"},
+        "meal_plan": {
+            "type": "array",
+            "minItems": 3,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "day": {"type": "integer"},
+                    "breakfast": {"type": "string", "description": "Meal and its kcal"},
+                    "lunch": {"type": "string"},
+                    "dinner": {"type": "string"},
+                    "snacks": {"type": "string"}
+                },
+                "required": ["day", "breakfast", "lunch", "dinner", "snacks"]
+            }
+        },
+        "grocery_list": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "category": {"type": "string"},
+                    "items": {"type": "array", "minItems": 1, "items": {"type": "string"}}
+                },
+                "required": ["category", "items"]
+            }
+        },
+        "needs_doctor": {"type": "boolean"},
+        "doctor_reason": {"type": "string", "description": "Brief reason if needs_doctor"}
+    },
+    "required": ["nutrition_guidance", "meal_plan", "grocery_list", "needs_doctor"]
+}
+
+WORKOUT_PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "calorie_burn_target": {"type": "integer", "description": "kcal per day"},
+        "overview": {"type": "string", "description": "2-3 paragraphs on the workout philosophy"},
+        "schedule": {
+            "type": "array",
+            "minItems": 3,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "day": {"type": "integer"},
+                    "focus": {"type": "string"},
+                    "duration_minutes": {"type": "integer"},
+                    "warm_up": {"type": "string"},
+                    "exercises": {
+                        "type": "array",
+                        "minItems": 1,
+                        "items": {"type": "string", "description": "Exercise: sets x reps or duration"}
+                    },
+                    "cool_down": {"type": "string"},
+                    "calorie_burn": {"type": "integer"}
+                },
+                "required": ["day", "focus", "duration_minutes", "exercises", "calorie_burn"]
+            }
+        },
+        "explanation": {"type": "string", "description": "Progression and safety considerations"}
+    },
+    "required": ["calorie_burn_target", "overview", "schedule", "explanation"]
+}
+
+MEALS = (("breakfast", "Breakfast"), ("lunch", "Lunch"), ("dinner", "Dinner"), ("snacks", "Snacks"))
+
+def schema_instructions(schema: dict) -> str:
+    """Response format section of a prompt asking for JSON matching schema."""
+    return (
+        "**Respond with a single JSON object only (no Markdown, no text around it) "
+        "matching this JSON schema:**\n"
+        f"{json.dumps(schema, separators=(',', ':'))}"
+    )
+
+def sub_schema(schema: dict, fields: list) -> dict:
+    """Schema of an object with only the given top-level fields, all required."""
+    return {
+        "type": "object",
+        "properties": {field: schema["properties"][field] for field in fields},
+        "required": list(fields)
+    }
+
+def extract_json(text: str):
+    """The first JSON object in text (code fences and surrounding prose are skipped), or None."""
+    start = (text or "").find("{")
+    if start < 0:
+        return None
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text, start)
+    except ValueError as e:
+        logger.warning(f"Plan response is not valid JSON: {e}")
+        return None
+    return data if isinstance(data, dict) else None
+
+def _valid(value, schema: dict) -> bool:
+    kind = schema.get("type")
+    if kind == "object":
+        return isinstance(value, dict) and all(
+            key in value and _valid(value[key], schema["properties"][key]) for key in schema.get("required", [])
+        )
+    if kind == "array":
+        return (isinstance(value, list) and len(value) >= schema.get("minItems", 0)
+                and all(_valid(item, schema["items"]) for item in value))
+    if kind == "string":
+        return isinstance(value, str) and bool(value.strip())
+    if kind == "integer":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if kind == "boolean":
+        return isinstance(value, bool)
+    return True
+
+def validate_plan(data, schema: dict) -> tuple:
+    """
+    Split a parsed response into its valid top-level fields and the names
+    of required fields that are missing or invalid.
+
+    Returns:
+        tuple: (dict of valid fields, list of missing field names)
+    """
+    data = data if isinstance(data, dict) else {}
+    valid = {key: data[key] for key, spec in schema["properties"].items() if key in data and _valid(data[key], spec)}
+    missing = [key for key in schema.get("required", []) if key not in valid]
+    return valid, missing
+
+def health_plan_fields(plan: dict) -> dict:
+    """Health recommendation fields, in the text form the pages and PDF report use."""
+    meal_plan = None
+    if plan.get("meal_plan"):
+        meal_plan = "\n\n".join(
+            f"Day {day.get('day', i)}:\n" + "\n".join(f"- {label}: {day[key]}" for key, label in MEALS if day.get(key))
+            for i, day in enumerate(plan["meal_plan"], 1)
+        )
+    grocery_list = None
+    if plan.get("grocery_list"):
+        grocery_list = "\n".join(
+            f"- {group['category']}:\n" + "\n".join(f"  - {item}" for item in group["items"])
+            for group in plan["grocery_list"]
+        )
+    return {
+        "nutrition_guidance": plan.get("nutrition_guidance"),
+        "meal_plan": meal_plan,
+        "grocery_list": grocery_list,
+        "needs_doctor": bool(plan.get("needs_doctor", False)),
+        "doctor_recommendation": plan.get("doctor_reason")
+    }
+
+def _day_fields(day: dict) -> dict:
+    lines = [day["focus"], f"- Duration: {int(day['duration_minutes'])} minutes"]
+    if day.get("warm_up"):
+        lines.append(f"- Warm-up: {day['warm_up']}")
+    lines.append("- Exercises:")
+    lines += [f"  {n}. {exercise}" for n, exercise in enumerate(day["exercises"], 1)]
+    if day.get("cool_down"):
+        lines.append(f"- Cool-down: {day['cool_down']}")
+    lines.append(f"- Estimated Calorie Burn: {int(day['calorie_burn'])} kcal")
+    return {
+        "focus": day["focus"],
+        "duration": f"{int(day['duration_minutes'])} minutes",
+        "calorie_burn": str(int(day["calorie_burn"])),
+        "details": "\n".join(lines)
+    }
+
+def workout_plan_fields(plan: dict) -> dict:
+    """Workout plan fields in the shape parse_workout_response returns."""
+    target = plan.get("calorie_burn_target")
+    return {
+        "calorie_burn_target": str(int(target)) if target is not None else None,
+        "overview": plan.get("overview"),
+        "schedule": [_day_fields(day) for day in plan.get("schedule", [])],
+        "explanation": plan.get("explanation")
+    }
@@ -1,125 +1,296 @@
-from utils.logger import setup_logger
-
-logger = setup_logger("prompt_templates")
-# Updated health prompt template
-def get_health_prompt(health_data):
-    profile = health_data["profile"]
-    goal = health_data["goal"]
-    
-    prompt = f"""
-You are a health advisor with expertise in nutrition and fitness. Your task is to create a comprehensive health and nutrition plan based on the user's profile and goals.
-
-**Response MUST follow this exact format:**
-
-**BMI**: [Calculated BMI value]
-**Weight Status**: [Underweight/Normal/Overweight/Obese]
-**Daily Calorie Target**: [X] kcal
-**Macro Breakdown**: 
-Protein: [X]g ([Y]% of calories)
-Carbs: [X]g ([Y]% of calories)
-Fats: [X]g ([Y]% of calories)
-
-**Nutrition Guidance**:
-[2-3 paragraph explanation of dietary approach]
-
-**3-Day Meal Plan**:
-Day 1:
-- Breakfast: [Meal description] ([Calories] kcal)
-- Lunch: [Meal description] ([Calories] kcal)
-- Dinner: [Meal description] ([Calories] kcal)
-- Snacks: [Snack description] ([Calories] kcal)
-
-Day 2:
-- Breakfast: [Meal description] ([Calories] kcal)
-- Lunch: [Meal description] ([Calories] kcal)
-- Dinner: [Meal description] ([Calories] kcal)
-- Snacks: [Snack description] ([Calories] kcal)
-
-Day 3:
-- Breakfast: [Meal description] ([Calories] kcal)
-- Lunch: [Meal description] ([Calories] kcal)
-- Dinner: [Meal description] ([Calories] kcal)
-- Snacks: [Snack description] ([Calories] kcal)
-
-**Grocery List**:
-- [Category]:
-  - [Item 1]
-  - [Item 2]
-- [Another Category]:
-  - [Item 3]
-  - [Item 4]
-
-**Needs Doctor**: [Yes/No] - [Brief reason if yes]
-
-**User Profile**:
-- Age: {profile['age']}
-- Gender: {profile['gender']}
-- Height: {profile['height']} m
-- Weight: {profile['weight']} kg
-- Activity Level: {profile['activity_level']}
-- Allergies: {profile.get('allergies', 'None')}
-- Medical History: {profile.get('medical_history', 'None')}
-- Blood Report: {profile.get('blood_report_data', 'No recent blood work')}
-
-**Health Goal**:
-{goal['description']} (Goal Type: {goal.get('type', 'Custom')})
-"""
-    logger.info(f"Health prompt generated (first 200 chars): {prompt[:200]}...")
-    return prompt
-
-# In prognosis/prompt_templates.py
-
-def get_workout_prompt(workout_data):
-    profile = workout_data["profile"]
-    goal = workout_data["goal"]
-    health_rec = workout_data.get("health_recommendation", {})
-    
-    prompt = f"""
-You are a fitness advisor creating a personalized 3-day workout plan based on the user's profile, goals, and health recommendations.
-
-**Response MUST follow this exact format:**
-
-**Calorie Burn Target**: [X] kcal/day
-
-**Plan Overview**:
-[2-3 paragraph explanation of the workout philosophy]
-
-**Schedule**:
-Day 1: [Focus Area]
-- Duration: [X] minutes
-- Warm-up: [Description] (5 min)
-- Exercises:
-  1. [Exercise 1]: [Sets]x[Reps] or [Duration]
-  2. [Exercise 2]: [Sets]x[Reps] or [Duration]
-  3. [Exercise 3]: [Sets]x[Reps] or [Duration]
-  4. [Exercise 4]: [Sets]x[Reps] or [Duration]
-- Cool-down: [Description] (5 min)
-- Estimated Calorie Burn: [X] kcal
-
-Day 2: [Focus Area]
-[Same structure]
-
-Day 3: [Focus Area]
-[Same structure]
-
-**Explanation**:
-[Summary of how the plan progresses and safety considerations]
-
-**User Profile**:
-- Age: {profile['age']}
-- Gender: {profile['gender']}
-- Height: {profile['height']} m
-- Weight: {profile['weight']} kg
-- Activity Level: {profile['activity_level']}
-- Medical History: {profile.get('medical_history', 'None')}
-
-**Health Goal**:
-{goal['description']}
-
-**Health Recommendations**:
-- Calorie Target: {health_rec.get('calorie_target', 'Unknown')} kcal
-- Weight Status: {health_rec.get('weight_status', 'Unknown')}
-- Health Status: {health_rec.get('health_status', 'Unknown')}
-"""
-    logger.info(f"Workout prompt generated (first 200 chars): {prompt[:200]}...")
-    return prompt
\ No newline at end of file
+import re
+import threading
+from utils.config import (
+    HUGGINGFACE_TOKEN, PROMPT_TOKENIZER, HEALTH_CONTEXT_TOKENS, WORKOUT_CONTEXT_TOKENS, CHAT_CONTEXT_TOKENS
+)
+from utils.logger import setup_logger
+from utils.nutrition import nutrition_targets
+
+logger = setup_logger("prompt_templates")
+
+# Budgets are counted with this estimate only, so the same inputs always give
+# the same prompt (and the same response cache / single-flight key) whether
+# or not the tokenizer has loaded; the tokenizer only reports real counts.
+CHARS_PER_TOKEN = 4
+TRIM_MARKER = " [...]"
+
+_tokenizer = None
+_tokenizer_started = False
+_tokenizer_lock = threading.Lock()
+
+def _load_tokenizer():
+    global _tokenizer
+    try:
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+        _tokenizer = Tokenizer.from_file(hf_hub_download(PROMPT_TOKENIZER, "tokenizer.json", token=HUGGINGFACE_TOKEN))
+        logger.info(f"Prompt tokenizer loaded: {PROMPT_TOKENIZER}")
+    except Exception as e:
+        logger.warning(f"Tokenizer {PROMPT_TOKENIZER} unavailable, estimating token counts: {e}")
+
+def _get_tokenizer():
+    """
+    The target model's tokenizer (tokenizer.json only, no transformers), or
+    None while it loads in the background or if it cannot be fetched. Used
+    for logging only; prompt building never waits on the download.
+    """
+    global _tokenizer_started
+    if not _tokenizer_started:
+        with _tokenizer_lock:
+            if not _tokenizer_started:
+                _tokenizer_started = True
+                threading.Thread(target=_load_tokenizer, name="prompt-tokenizer", daemon=True).start()
+    return _tokenizer
+
+def count_tokens(text: str) -> int:
+    """Estimated token count used for all budgets."""
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+def _model_tokens(texts) -> int:
+    """Token count of texts under the target model's tokenizer, or None until it is loaded."""
+    tokenizer = _get_tokenizer()
+    if tokenizer is None:
+        return None
+    return sum(len(tokenizer.encode(text, add_special_tokens=False).ids) for text in texts if text)
+
+def compress_text(text) -> str:
+    """Collapse runs of spaces and drop blank and repeated lines."""
+    seen, lines = set(), []
+    for line in str(text or "").splitlines():
+        line = re.sub(r"[ \t]+", " ", line).strip()
+        if line and line.lower() not in seen:
+            seen.add(line.lower())
+            lines.append(line)
+    return "\n".join(lines)
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest beginning of text within max_tokens, cut at a line or word boundary and marked."""
+    if not text or count_tokens(text) <= max_tokens:
+        return text or ""
+    budget = max_tokens - count_tokens(TRIM_MARKER)
+    if budget <= 0:
+        return ""
+    head = text[:budget * CHARS_PER_TOKEN]
+    cut = head.rfind("\n")
+    if cut < len(head) // 2:
+        cut = head.rfind(" ")
+    if cut >= len(head) // 2:
+        head = head[:cut]
+    return head.rstrip() + TRIM_MARKER
+
+def fit_sections(sections: list, budget: int) -> dict:
+    """
+    Fit variable-size prompt context into a token budget.
+
+    sections are dicts with "name", "text", "max_tokens" (the section's own
+    cap) and "priority" (lower is kept longer). Each section is compressed
+    and cut to its cap; if together they still exceed budget, the
+    lowest-priority sections are trimmed further, down to nothing. Trimming
+    keeps the beginning, so text should come most important first.
+
+    Returns:
+        dict: name -> fitted text ("" when dropped)
+    """
+    fitted, sizes = {}, {}
+    for section in sections:
+        text = trim_to_tokens(compress_text(section["text"]), section["max_tokens"])
+        fitted[section["name"]], sizes[section["name"]] = text, count_tokens(text)
+
+    excess = sum(sizes.values()) - budget
+    for section in sorted(sections, key=lambda s: s["priority"], reverse=True):
+        if excess <= 0:
+            break
+        name = section["name"]
+        fitted[name] = trim_to_tokens(fitted[name], max(sizes[name] - excess, 0))
+        size = count_tokens(fitted[name])
+        excess -= sizes[name] - size
+        sizes[name] = size
+
+    actual = _model_tokens(fitted.values())
+    logger.info(f"Prompt context: {sum(sizes.values())}/{budget} estimated tokens ({sizes})"
+                + (f", {actual} with {PROMPT_TOKENIZER}" if actual is not None else ""))
+    return fitted
+
+# Markdown response formats, split into sections by prognosis/stream_parser.py;
+# structured mode passes a JSON schema instruction instead (prognosis/plan_schema.py)
+HEALTH_RESPONSE_FORMAT = """**Response MUST follow this exact format:**
+
+**Nutrition Guidance**:
+[2-3 paragraph explanation of dietary approach]
+
+**3-Day Meal Plan**:
+Day 1:
+- Breakfast: [Meal description] ([Calories] kcal)
+- Lunch: [Meal description] ([Calories] kcal)
+- Dinner: [Meal description] ([Calories] kcal)
+- Snacks: [Snack description] ([Calories] kcal)
+
+Day 2:
+- Breakfast: [Meal description] ([Calories] kcal)
+- Lunch: [Meal description] ([Calories] kcal)
+- Dinner: [Meal description] ([Calories] kcal)
+- Snacks: [Snack description] ([Calories] kcal)
+
+Day 3:
+- Breakfast: [Meal description] ([Calories] kcal)
+- Lunch: [Meal description] ([Calories] kcal)
+- Dinner: [Meal description] ([Calories] kcal)
+- Snacks: [Snack description] ([Calories] kcal)
+
+**Grocery List**:
+- [Category]:
+  - [Item 1]
+  - [Item 2]
+- [Another Category]:
+  - [Item 3]
+  - [Item 4]
+
+**Needs Doctor**: [Yes/No] - [Brief reason if yes]"""
+
+WORKOUT_RESPONSE_FORMAT = """**Response MUST follow this exact format:**
+
+**Calorie Burn Target**: [X] kcal/day
+
+**Plan Overview**:
+[2-3 paragraph explanation of the workout philosophy]
+
+**Schedule**:
+Day 1: [Focus Area]
+- Duration: [X] minutes
+- Warm-up: [Description] (5 min)
+- Exercises:
+  1. [Exercise 1]: [Sets]x[Reps] or [Duration]
+  2. [Exercise 2]: [Sets]x[Reps] or [Duration]
+  3. [Exercise 3]: [Sets]x[Reps] or [Duration]
+  4. [Exercise 4]: [Sets]x[Reps] or [Duration]
+- Cool-down: [Description] (5 min)
+- Estimated Calorie Burn: [X] kcal
+
+Day 2: [Focus Area]
+[Same structure]
+
+Day 3: [Focus Area]
+[Same structure]
+
+**Explanation**:
+[Summary of how the plan progresses and safety considerations]"""
+
+# Updated health prompt template
+def get_health_prompt(health_data, response_format: str = None):
+    profile = health_data["profile"]
+    goal = health_data["goal"]
+    # The numbers are calculated locally (utils/nutrition.py); the model only writes the narrative
+    try:
+        targets = nutrition_targets(profile, goal)
+        macros = targets["macros"]
+        targets_text = (
+            f"- BMI: {targets['bmi']:.1f} ({targets['weight_status']})\n"
+            f"- Daily Calorie Target: {targets['calorie_target']} kcal\n"
+            f"- Protein {macros['protein_grams']:.0f}g, Carbs {macros['carbs_grams']:.0f}g, "
+            f"Fats {macros['fats_grams']:.0f}g"
+        )
+    except (TypeError, ValueError) as e:
+        logger.error(f"Nutrition targets unavailable for prompt: {e}")
+        targets_text = "- Not available, keep portions moderate"
+    context = fit_sections([
+        {"name": "goal", "text": goal["description"], "max_tokens": 150, "priority": 0},
+        {"name": "medical_history", "text": profile.get("medical_history", "None"), "max_tokens": 250, "priority": 1},
+        {"name": "labs", "text": profile.get("blood_report_data", ""), "max_tokens": 500, "priority": 2},
+        {"name": "history", "text": health_data.get("history_context", ""), "max_tokens": 400, "priority": 3}
+    ], HEALTH_CONTEXT_TOKENS)
+    history = f"\n{context['history']}\n" if context["history"] else ""
+    
+    prompt = f"""
+You are a health advisor with expertise in nutrition and fitness. Your task is to create a comprehensive health and nutrition plan based on the user's profile and goals.
+
+**Nutrition Targets** (already calculated; each meal plan day should add up to about the calorie target; do not restate them):
+{targets_text}
+
+{response_format or HEALTH_RESPONSE_FORMAT}
+
+**User Profile**:
+- Age: {profile['age']}
+- Gender: {profile['gender']}
+- Height: {profile['height']} m
+- Weight: {profile['weight']} kg
+- Activity Level: {profile['activity_level']}
+- Allergies: {profile.get('allergies', 'None')}
+- Medical History: {context['medical_history'] or 'None'}
+- Blood Report: {context['labs'] or 'No recent blood work'}
+{history}
+**Health Goal**:
+{context['goal']} (Goal Type: {goal.get('type', 'Custom')})
+"""
+    logger.info(f"Health prompt generated (first 200 chars): {prompt[:200]}...")
+    return prompt
+
+# In prognosis/prompt_templates.py
+
+def get_workout_prompt(workout_data, response_format: str = None):
+    profile = workout_data["profile"]
+    goal = workout_data["goal"]
+    health_rec = workout_data.get("health_recommendation", {})
+    context = fit_sections([
+        {"name": "goal", "text": goal["description"], "max_tokens": 150, "priority": 0},
+        {"name": "medical_history", "text": profile.get("medical_history", "None"), "max_tokens": 250, "priority": 1}
+    ], WORKOUT_CONTEXT_TOKENS)
+    
+    prompt = f"""
+You are a fitness advisor creating a personalized 3-day workout plan based on the user's profile, goals, and health recommendations.
+
+{response_format or WORKOUT_RESPONSE_FORMAT}
+
+**User Profile**:
+- Age: {profile['age']}
+- Gender: {profile['gender']}
+- Height: {profile['height']} m
+- Weight: {profile['weight']} kg
+- Activity Level: {profile['activity_level']}
+- Medical History: {context['medical_history'] or 'None'}
+
+**Health Goal**:
+{context['goal']}
+
+**Health Recommendations**:
+- Calorie Target: {health_rec.get('calorie_target', 'Unknown')} kcal
+- Weight Status: {health_rec.get('weight_status', 'Unknown')}
+- Health Status: {health_rec.get('health_status', 'Unknown')}
+"""
+    logger.info(f"Workout prompt generated (first 200 chars): {prompt[:200]}...")
+    return prompt
+
+def get_chat_context(health_context: dict) -> str:
+    """
+    Health context block of a chat prompt: profile, goal, current plan,
+    records relevant to the question and the saved history summary, within
+    budget. The relevant records come before the summary and are trimmed last.
+    """
+    profile = health_context["profile"]
+    recommendation = health_context.get("recommendation", {})
+    context = fit_sections([
+        {"name": "goal", "text": health_context["goal"]["description"], "max_tokens": 150, "priority": 0},
+        {"name": "relevant", "text": health_context.get("relevant_records", ""), "max_tokens": 350, "priority": 1},
+        {"name": "guidance", "text": recommendation.get("nutrition_guidance") or "", "max_tokens": 150, "priority": 2},
+        {"name": "history", "text": health_context.get("history_context", ""), "max_tokens": 500, "priority": 3}
+    ], CHAT_CONTEXT_TOKENS)
+
+    context_str = (
+        f"Health Profile:\n"
+        f"- Age: {profile['age']}\n"
+        f"- Gender: {profile['gender']}\n"
+        f"- Height: {profile['height']} m\n"
+        f"- Weight: {profile['weight']} kg\n"
+        f"- Activity Level: {profile['activity_level']}\n\n"
+        
+        f"Health Goal:\n"
+        f"{context['goal']}\n\n"
+        
+        f"Current Recommendations:\n"
+        f"- Calorie Target: {recommendation.get('calorie_target', 'Unknown')} kcal\n"
+        f"- Nutrition Guidance: {context['guidance'] or 'None yet'}\n"
+    )
+    if context["relevant"]:
+        context_str += f"\n{context['relevant']}\n"
+    if context["history"]:
+        context_str += f"\n{context['history']}\n"
+    return context_str
\ No newline at end of file
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from utils.config import (
+    OPENBIOLLM_MODEL, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL_S,
+    RESPONSE_CACHE_SEMANTIC, RESPONSE_CACHE_SIMILARITY
+)
+from utils.logger import setup_logger
+
+logger = setup_logger("response_cache")
+
+def normalize_prompt(text: str) -> str:
+    """Whitespace and case differences don't change the answer."""
+    return re.sub(r"\s+", " ", str(text)).strip().lower()
+
+def prompt_hash(namespace: str, prompt) -> str:
+    if not isinstance(prompt, str):
+        prompt = json.dumps(prompt, sort_keys=True, default=str)
+    return hashlib.sha256(f"{namespace}\n{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+def guard_key(fields: dict) -> str:
+    """Hash of the fields a semantic hit must match exactly."""
+    payload = json.dumps({k: normalize_prompt(v) for k, v in fields.items()}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM plan texts.
+
+    The exact tier is keyed on the hash of the normalized prompt. The
+    optional semantic tier serves requests whose guard fields (everything
+    that must not differ, e.g. allergies, medical history, weight bucket)
+    hash the same and whose free-text part (e.g. the goal description)
+    embeds within RESPONSE_CACHE_SIMILARITY of a cached entry. Entries
+    expire after ttl seconds and the least recently used are evicted past
+    max_entries or max_bytes. Every entry records where it came from.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 ttl: float = RESPONSE_CACHE_TTL_S, semantic: bool = RESPONSE_CACHE_SEMANTIC,
+                 threshold: float = RESPONSE_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.semantic = semantic
+        self.threshold = threshold
+        self._entries = OrderedDict()  # prompt hash -> entry, least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _embed(self, text: str):
+        try:
+            from storage.embedder import get_embedding_function
+            vector = np.asarray(get_embedding_function()([text])[0], dtype=np.float32)
+            return vector / max(float(np.linalg.norm(vector)), 1e-12)
+        except Exception as e:
+            logger.error(f"Response cache embedding failed, semantic tier skipped: {e}")
+            return None
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["size"]
+
+    def _hit(self, key: str, entry: dict, tier: str, similarity: float) -> dict:
+        self._entries.move_to_end(key)
+        entry["hits"] += 1
+        entry["last_hit"] = time.time()
+        self.stats[f"{tier}_hits"] += 1
+        return {
+            "text": entry["text"],
+            "provenance": {
+                "tier": tier,
+                "similarity": round(similarity, 4),
+                "source_prompt_hash": key,
+                "namespace": entry["namespace"],
+                "model": entry["model"],
+                "created_at": entry["created_at"],
+                "age_s": round(time.time() - entry["created_at"], 1),
+                "hits": entry["hits"]
+            }
+        }
+
+    def lookup(self, namespace: str, prompt, guard: dict = None, semantic_text: str = None):
+        """
+        Return {"text", "provenance"} for a cached answer, or None.
+
+        Args:
+            namespace: Kind of generation ("health", "workout"); tiers never cross namespaces
+            prompt: Prompt text or messages list
+            guard: Fields a semantic hit must match exactly; no semantic lookup without it
+            semantic_text: Free text compared by embedding similarity
+        """
+        key = prompt_hash(namespace, prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] <= now:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                return self._hit(key, entry, "exact", 1.0)
+
+        if self.semantic and guard is not None and semantic_text:
+            group = guard_key(guard)
+            with self._lock:
+                candidates = [
+                    (k, e) for k, e in self._entries.items()
+                    if e["namespace"] == namespace and e["guard"] == group
+                    and e["vector"] is not None and e["expires_at"] > now
+                ]
+            if candidates:
+                vector = self._embed(semantic_text)
+                if vector is not None:
+                    sims = np.stack([e["vector"] for _, e in candidates]) @ vector
+                    best = int(np.argmax(sims))
+                    if sims[best] >= self.threshold:
+                        k, entry = candidates[best]
+                        with self._lock:
+                            if k in self._entries:
+                                return self._hit(k, entry, "semantic", float(sims[best]))
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def store(self, namespace: str, prompt, text: str, guard: dict = None, semantic_text: str = None,
+              model: str = OPENBIOLLM_MODEL):
+        """Cache a completed generation."""
+        if not text:
+            return
+        key = prompt_hash(namespace, prompt)
+        vector = None
+        if self.semantic and guard is not None and semantic_text:
+            vector = self._embed(semantic_text)
+        now = time.time()
+        entry = {
+            "text": text,
+            "namespace": namespace,
+            "guard": guard_key(guard) if guard is not None else None,
+            "vector": vector,
+            "model": model,
+            "created_at": now,
+            "expires_at": now + self.ttl,
+            "hits": 0,
+            "last_hit": None,
+            "size": len(text.encode("utf-8"))
+        }
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry["size"]
+            self.stats["stores"] += 1
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,203 @@
+import re
+from utils.logger import setup_logger
+
+logger = setup_logger("stream_parser")
+
+# Section header label -> result key, as the prompts in prompt_templates.py ask for them
+HEALTH_SECTIONS = {
+    "BMI": "bmi",
+    "Weight Status": "weight_status",
+    "Daily Calorie Target": "calorie_target",
+    "Macro Breakdown": "macro_breakdown",
+    "Nutrition Guidance": "nutrition_guidance",
+    "3-Day Meal Plan": "meal_plan",
+    "Meal Plan": "meal_plan",
+    "Grocery List": "grocery_list",
+    "Needs Doctor": "needs_doctor"
+}
+WORKOUT_SECTIONS = {
+    "Calorie Burn Target": "calorie_burn_target",
+    "Plan Overview": "overview",
+    "Overview": "overview",
+    "Schedule": "schedule",
+    "Explanation": "explanation"
+}
+VALID_WEIGHT_STATUSES = ("Underweight", "Normal weight", "Overweight", "Obese")
+
+class SectionStreamParser:
+    """
+    Splits streamed LLM output into sections in one pass.
+
+    feed() takes chunks as they arrive and returns the events completed by
+    them: {"type": "section", "key", "text"} when the next header starts,
+    and, with days=True, {"type": "day", "number", "text"} for each
+    "Day N:" block inside the schedule. A header only counts at the start
+    of a line (after optional "#", "*" or "-" marks), so a label quoted in
+    prose, like "Keep BMI: below 25", stays text. Only a short tail (the
+    longest header) is held back between chunks, in case a header is split
+    across them, so every character is scanned a bounded number of times.
+    """
+
+    def __init__(self, sections: dict, days: bool = False, day_section: str = "schedule"):
+        self.labels = {label.lower(): key for label, key in sections.items()}
+        alternatives = "|".join(re.escape(label) for label in sorted(sections, key=len, reverse=True))
+        if days:
+            alternatives += r"|Day\s+(?P<day>\d+)"
+        self._pattern = re.compile(
+            rf"^[ \t]*(?:[#*-]+[ \t]*)?(?P<label>{alternatives})\s*:", re.IGNORECASE | re.MULTILINE
+        )
+        # Room for the label, its marks and indentation
+        self._lookback = max(len(label) for label in sections) + 16
+        self.day_section = day_section if days else None
+
+        self.sections = {}   # completed sections, first occurrence wins
+        self.days = []       # completed day events
+        self._buf = ""
+        self._pos = 0
+        self._star = ""      # a trailing "*" that may be half of a "**" bold marker
+        self._key = None
+        self._parts = []
+        self._day = None
+        self._day_parts = []
+
+    @property
+    def current(self) -> tuple:
+        """(key, text so far) of the section being written; key is None before the first header."""
+        return self._key, "".join(self._parts)
+
+    def feed(self, chunk: str) -> list:
+        chunk = self._star + (chunk or "")
+        self._star = ""
+        if (len(chunk) - len(chunk.rstrip("*"))) % 2:
+            chunk, self._star = chunk[:-1], "*"
+        self._buf += chunk.replace("**", "")
+        return self._scan(final=False)
+
+    def close(self) -> list:
+        """Flush the held-back tail and complete the last section."""
+        self._buf += self._star
+        self._star = ""
+        events = self._scan(final=True)
+        events += self._end_day()
+        events += self._end_section()
+        return events
+
+    def _append(self, text: str):
+        if text and self._key is not None:
+            self._parts.append(text)
+            if self._day is not None:
+                self._day_parts.append(text)
+
+    def _scan(self, final: bool) -> list:
+        events = []
+        while True:
+            match = self._pattern.search(self._buf, self._pos)
+            if match is None:
+                break
+            self._append(self._buf[self._pos:match.start()])
+            self._pos = match.end()
+            if match.groupdict().get("day") is not None:
+                if self._key != self.day_section:
+                    self._append(match.group(0))  # "Day N:" outside the schedule is just text
+                    continue
+                events += self._end_day()
+                self._parts.append(match.group(0))
+                self._day = int(match.group("day"))
+                continue
+            events += self._end_day()
+            events += self._end_section()
+            self._key = self.labels[match.group("label").lower()]
+
+        if final:
+            self._append(self._buf[self._pos:])
+            self._buf, self._pos = "", 0
+        else:
+            keep = max(self._pos, len(self._buf) - self._lookback)
+            self._append(self._buf[self._pos:keep])
+            # Keep one character before the tail so "^" still sees its newline
+            start = max(keep - 1, 0)
+            self._buf, self._pos = self._buf[start:], keep - start
+        return events
+
+    def _end_day(self) -> list:
+        if self._day is None:
+            return []
+        event = {"type": "day", "number": self._day, "text": _clean("".join(self._day_parts))}
+        self.days.append(event)
+        self._day, self._day_parts = None, []
+        return [event]
+
+    def _end_section(self) -> list:
+        if self._key is None:
+            return []
+        key, text = self._key, _clean("".join(self._parts))
+        self._key, self._parts = None, []
+        if key in self.sections:
+            logger.warning(f"Repeated section '{key}' ignored")
+            return []
+        self.sections[key] = text
+        return [{"type": "section", "key": key, "text": text}]
+
+def _clean(text: str) -> str:
+    # Drop markdown heading marks left before the next header
+    return re.sub(r"[\s#>]+$", "", text).strip()
+
+def parse_sections(text: str, sections: dict, days: bool = False) -> SectionStreamParser:
+    """Run a complete text through the parser and return it (for .sections / .days)."""
+    parser = SectionStreamParser(sections, days=days)
+    parser.feed(text)
+    parser.close()
+    return parser
+
+def _number(text):
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", text or "")
+    return match.group(0) if match else None
+
+def health_fields(sections: dict) -> dict:
+    """Typed health recommendation fields from parsed sections."""
+    parsed = {key: sections.get(key) or None for key in set(HEALTH_SECTIONS.values())}
+
+    try:
+        parsed["bmi"] = float(_number(parsed["bmi"]).replace(",", "")) if parsed["bmi"] else 0.0
+    except (ValueError, AttributeError):
+        parsed["bmi"] = 0.0
+
+    status = (parsed["weight_status"] or "").splitlines()[0].strip(" .") if parsed["weight_status"] else None
+    if status:
+        lowered = status.lower()
+        match = next((s for s in VALID_WEIGHT_STATUSES if lowered.startswith(s.lower())), None)
+        if match is None and lowered.startswith("normal"):
+            match = "Normal weight"
+        if match is None:
+            logger.warning(f"Invalid weight status '{status}', setting to Unknown")
+        parsed["weight_status"] = match or "Unknown"
+
+    if parsed["calorie_target"]:
+        parsed["calorie_target"] = _number(parsed["calorie_target"])
+
+    answer = (parsed["needs_doctor"] or "").lower()
+    parsed["needs_doctor"] = answer.startswith(("yes", "true"))
+    return parsed
+
+def day_fields(day: dict) -> dict:
+    """Focus, duration and calorie burn of one "Day N:" block."""
+    text = day["text"]
+    focus = re.search(r"Focus[:\s]*(.+)", text)
+    first_line = text.splitlines()[0].strip(" -") if text else ""
+    duration = re.search(r"Duration[:\s]*(.+)", text)
+    burn = re.search(r"Calorie Burn[:\s]*([\d,]+)\s*kcal", text, re.IGNORECASE)
+    return {
+        "focus": focus.group(1).strip() if focus else (first_line or "General Fitness"),
+        "duration": duration.group(1).strip() if duration else "30-45 minutes",
+        "calorie_burn": burn.group(1) if burn else "Unknown",
+        "details": text
+    }
+
+def workout_fields(sections: dict, days: list) -> dict:
+    """Typed workout plan fields from parsed sections and day events."""
+    return {
+        "calorie_burn_target": _number(sections.get("calorie_burn_target")),
+        "overview": sections.get("overview") or None,
+        "schedule": [day_fields(day) for day in days],
+        "explanation": sections.get("explanation") or None
+    }
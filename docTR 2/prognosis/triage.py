@@ -0,0 +1,328 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+from utils.config import (
+    TRIAGE_INDEX_PATH, TRIAGE_MATCH_THRESHOLD, TRIAGE_DEFAULT_SEVERITY,
+    DOCTOR_SEARCH_CACHE_SIZE, DOCTOR_SEARCH_CACHE_TTL
+)
+from utils.logger import setup_logger
+from utils.ttl_cache import TTLCache
+from storage.doctor_directory import normalize_text
+
+logger = setup_logger("triage")
+
+# Symptom ontology: canonical symptom -> synonyms and the specialties that
+# treat it, weighted. Specialty names resolve through SPECIALTY_SYNONYMS in
+# storage/doctor_directory.py, so the top one can be passed straight to the
+# doctor search.
+SYMPTOM_ONTOLOGY = {
+    "fever": {
+        "synonyms": ["high temperature", "temperature", "chills", "feverish", "pyrexia"],
+        "specialties": {"general practitioner": 1.0, "internal medicine": 0.6}
+    },
+    "cough": {
+        "synonyms": ["coughing", "dry cough", "wet cough", "phlegm", "sputum"],
+        "specialties": {"pulmonology": 0.9, "general practitioner": 0.7}
+    },
+    "shortness of breath": {
+        "synonyms": ["breathlessness", "difficulty breathing", "trouble breathing", "out of breath",
+                     "dyspnea", "wheezing"],
+        "specialties": {"pulmonology": 1.0, "cardiology": 0.7}
+    },
+    "fatigue": {
+        "synonyms": ["tiredness", "tired", "exhaustion", "low energy", "weakness", "lethargy"],
+        "specialties": {"general practitioner": 0.8, "endocrinology": 0.5, "internal medicine": 0.5}
+    },
+    "headache": {
+        "synonyms": ["head pain", "head ache", "migraine", "pressure in head"],
+        "specialties": {"neurology": 1.0, "general practitioner": 0.5}
+    },
+    "nausea": {
+        "synonyms": ["feeling sick", "queasy", "vomiting", "throwing up", "upset stomach"],
+        "specialties": {"gastroenterology": 1.0, "general practitioner": 0.5}
+    },
+    "chest pain": {
+        "synonyms": ["chest tightness", "chest pressure", "pain in chest", "angina"],
+        "specialties": {"cardiology": 1.0, "pulmonology": 0.3}
+    },
+    "palpitations": {
+        "synonyms": ["racing heart", "heart racing", "irregular heartbeat", "fluttering heart", "skipped beats"],
+        "specialties": {"cardiology": 1.0}
+    },
+    "high blood pressure": {
+        "synonyms": ["hypertension", "elevated blood pressure", "high bp"],
+        "specialties": {"cardiology": 1.0, "internal medicine": 0.5}
+    },
+    "swollen legs": {
+        "synonyms": ["leg swelling", "ankle swelling", "swollen ankles", "edema", "oedema"],
+        "specialties": {"cardiology": 0.8, "internal medicine": 0.6}
+    },
+    "dizziness": {
+        "synonyms": ["dizzy", "lightheaded", "light headed", "vertigo", "fainting", "passing out"],
+        "specialties": {"neurology": 0.8, "cardiology": 0.6}
+    },
+    "numbness": {
+        "synonyms": ["tingling", "pins and needles", "loss of sensation", "numb"],
+        "specialties": {"neurology": 1.0}
+    },
+    "seizure": {
+        "synonyms": ["seizures", "convulsions", "fits"],
+        "specialties": {"neurology": 1.0}
+    },
+    "memory problems": {
+        "synonyms": ["forgetfulness", "memory loss", "confusion", "brain fog"],
+        "specialties": {"neurology": 0.9, "psychiatry": 0.4}
+    },
+    "abdominal pain": {
+        "synonyms": ["stomach pain", "stomach ache", "belly pain", "tummy ache", "cramps", "abdominal cramps"],
+        "specialties": {"gastroenterology": 1.0, "general practitioner": 0.4}
+    },
+    "diarrhea": {
+        "synonyms": ["diarrhoea", "loose stools", "loose motions"],
+        "specialties": {"gastroenterology": 1.0}
+    },
+    "constipation": {
+        "synonyms": ["hard stools", "difficulty passing stool"],
+        "specialties": {"gastroenterology": 1.0}
+    },
+    "heartburn": {
+        "synonyms": ["acid reflux", "reflux", "indigestion", "acidity", "gerd"],
+        "specialties": {"gastroenterology": 1.0}
+    },
+    "rash": {
+        "synonyms": ["skin rash", "hives", "itching", "itchy skin", "red spots", "eczema", "acne"],
+        "specialties": {"dermatology": 1.0}
+    },
+    "joint pain": {
+        "synonyms": ["aching joints", "arthritis", "stiff joints", "knee pain", "swollen joints"],
+        "specialties": {"orthopedics": 1.0, "sports medicine": 0.5}
+    },
+    "back pain": {
+        "synonyms": ["lower back pain", "backache", "spine pain", "sciatica"],
+        "specialties": {"orthopedics": 1.0, "sports medicine": 0.4}
+    },
+    "muscle pain": {
+        "synonyms": ["muscle ache", "sore muscles", "muscle cramps", "sprain", "strain", "myalgia"],
+        "specialties": {"sports medicine": 1.0, "orthopedics": 0.5}
+    },
+    "excessive thirst": {
+        "synonyms": ["always thirsty", "frequent urination", "polyuria", "high blood sugar"],
+        "specialties": {"endocrinology": 1.0}
+    },
+    "weight change": {
+        "synonyms": ["weight gain", "weight loss", "unexplained weight loss", "losing weight", "gaining weight"],
+        "specialties": {"endocrinology": 0.8, "nutrition specialist": 0.7}
+    },
+    "heat or cold intolerance": {
+        "synonyms": ["feeling cold", "always cold", "sweating", "night sweats", "hair loss"],
+        "specialties": {"endocrinology": 0.9}
+    },
+    "poor appetite": {
+        "synonyms": ["loss of appetite", "not hungry", "overeating", "cravings"],
+        "specialties": {"nutrition specialist": 0.9, "gastroenterology": 0.4}
+    },
+    "anxiety": {
+        "synonyms": ["anxious", "panic attacks", "nervousness", "worry", "stress"],
+        "specialties": {"psychiatry": 1.0}
+    },
+    "low mood": {
+        "synonyms": ["depression", "depressed", "sadness", "hopelessness", "mood swings"],
+        "specialties": {"psychiatry": 1.0}
+    },
+    "insomnia": {
+        "synonyms": ["trouble sleeping", "cannot sleep", "sleeplessness", "poor sleep"],
+        "specialties": {"psychiatry": 0.7, "general practitioner": 0.5}
+    },
+    "sore throat": {
+        "synonyms": ["throat pain", "scratchy throat", "painful swallowing"],
+        "specialties": {"general practitioner": 1.0}
+    },
+    "runny nose": {
+        "synonyms": ["congestion", "stuffy nose", "blocked nose", "sneezing", "cold"],
+        "specialties": {"general practitioner": 1.0}
+    },
+    "pelvic pain": {
+        "synonyms": ["period pain", "irregular periods", "missed period", "menstrual cramps", "pregnancy"],
+        "specialties": {"obstetrics and gynecology": 1.0}
+    }
+}
+
+# Phrases of free text are split on punctuation and connectives
+_PHRASE_SPLIT = re.compile(r"[,;.\n/]+|\band\b|\bwith\b|\balso\b|\bplus\b")
+
+_index = None
+_index_lock = threading.Lock()
+_triage_cache = TTLCache(DOCTOR_SEARCH_CACHE_SIZE, DOCTOR_SEARCH_CACHE_TTL)
+
+class SymptomIndex:
+    """
+    Symptom vocabulary (canonical names and synonyms) with unit-normalized
+    embeddings. Free text is matched lexically first; only phrases with no
+    vocabulary term in them are embedded and compared to the vocabulary.
+    """
+
+    def __init__(self, terms: list, canonical: list, vectors: np.ndarray, embed_fn):
+        self.terms = terms
+        self.canonical = canonical
+        self.term_to_symptom = dict(zip(terms, canonical))
+        self.vectors = vectors
+        self.embed_fn = embed_fn
+        # Longest terms first so "chest pain" wins over "pain"-like shorter overlaps
+        self.by_length = sorted(terms, key=len, reverse=True)
+
+    def lexical_matches(self, phrase: str) -> set:
+        padded = f" {phrase} "
+        found, consumed = set(), padded
+        for term in self.by_length:
+            if f" {term} " in consumed:
+                found.add(self.term_to_symptom[term])
+                consumed = consumed.replace(f" {term} ", "  ")
+        return found
+
+    def semantic_matches(self, phrases: list, threshold: float = TRIAGE_MATCH_THRESHOLD) -> list:
+        """Best (symptom, similarity) per phrase, or None when nothing clears the threshold."""
+        if not phrases or self.vectors is None or self.embed_fn is None:
+            return [None] * len(phrases)
+        try:
+            queries = np.asarray(self.embed_fn(phrases), dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Symptom embedding failed: {e}")
+            return [None] * len(phrases)
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        sims = queries @ self.vectors.T
+        best = sims.argmax(axis=1)
+        return [
+            (self.canonical[j], float(sims[i, j])) if sims[i, j] >= threshold else None
+            for i, j in enumerate(best)
+        ]
+
+def _vocabulary() -> tuple:
+    terms, canonical = [], []
+    for symptom, entry in SYMPTOM_ONTOLOGY.items():
+        for term in [symptom] + entry["synonyms"]:
+            term = normalize_text(term)
+            if term and term not in terms:
+                terms.append(term)
+                canonical.append(symptom)
+    return terms, canonical
+
+def _model_name(embed_fn) -> list:
+    """Embedding function name and model, as Chroma persists them."""
+    try:
+        return [embed_fn.name(), embed_fn.get_config().get("model_name")]
+    except Exception:
+        return [type(embed_fn).__name__, getattr(embed_fn, "model_name", None)]
+
+def _signature(terms: list, embed_fn, dimension: int) -> str:
+    payload = json.dumps([terms, _model_name(embed_fn), dimension])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+def build_index(path: str = TRIAGE_INDEX_PATH) -> SymptomIndex:
+    """
+    Load the vocabulary embeddings from path, or embed the vocabulary and
+    save them there. The file is reused only if the vocabulary, the
+    embedding model and its vector dimension are unchanged.
+    """
+    from storage.embedder import get_embedding_function
+
+    terms, canonical = _vocabulary()
+    try:
+        embed_fn = get_embedding_function()
+        dimension = len(embed_fn(terms[:1])[0])
+    except Exception as e:
+        logger.error(f"No embedding function for triage, using lexical matching only: {e}")
+        return SymptomIndex(terms, canonical, None, None)
+
+    signature = _signature(terms, embed_fn, dimension)
+    try:
+        with np.load(path) as cached:
+            if str(cached["signature"]) == signature:
+                logger.info(f"Loaded symptom index ({len(terms)} terms) from {path}")
+                return SymptomIndex(terms, canonical, cached["vectors"], embed_fn)
+    except (OSError, KeyError, ValueError):
+        pass
+
+    try:
+        vectors = np.asarray(embed_fn(terms), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    except Exception as e:
+        logger.error(f"Embedding the symptom vocabulary failed, using lexical matching only: {e}")
+        return SymptomIndex(terms, canonical, None, None)
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez(path, vectors=vectors, signature=np.array(signature))
+    except OSError as e:
+        logger.error(f"Could not save symptom index to {path}: {e}")
+    logger.info(f"Built symptom index: {len(terms)} terms")
+    return SymptomIndex(terms, canonical, vectors, embed_fn)
+
+def get_index() -> SymptomIndex:
+    """Return the process-wide symptom index, building it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = build_index()
+    return _index
+
+def match_symptoms(symptoms_data: dict) -> dict:
+    """
+    Map symptoms_data (selected, custom, severity) to canonical symptoms.
+
+    Returns:
+        dict: canonical symptom -> weight (severity / 5, scaled by match similarity for free text)
+    """
+    index = get_index()
+    symptoms_data = symptoms_data or {}
+    severity = symptoms_data.get("severity") or {}
+    matched = {}
+
+    def add(symptom: str, weight: float):
+        matched[symptom] = max(matched.get(symptom, 0.0), weight)
+
+    for selected in symptoms_data.get("selected") or []:
+        weight = severity.get(selected, TRIAGE_DEFAULT_SEVERITY) / 5
+        for symptom in index.lexical_matches(normalize_text(selected)):
+            add(symptom, weight)
+
+    unmatched = []
+    for phrase in _PHRASE_SPLIT.split(symptoms_data.get("custom") or ""):
+        phrase = normalize_text(phrase)
+        if not phrase:
+            continue
+        found = index.lexical_matches(phrase)
+        for symptom in found:
+            add(symptom, TRIAGE_DEFAULT_SEVERITY / 5)
+        if not found:
+            unmatched.append(phrase)
+
+    for match in index.semantic_matches(unmatched):
+        if match is not None:
+            add(match[0], TRIAGE_DEFAULT_SEVERITY / 5 * match[1])
+    return matched
+
+def rank_specialties(symptoms_data: dict, top_k: int = 3) -> list:
+    """
+    Rank specialties for a patient's symptoms without calling the LLM.
+
+    Returns:
+        list: [{"specialty", "score", "symptoms"}] best first; empty when no symptom was recognized
+    """
+    key = json.dumps(symptoms_data or {}, sort_keys=True, default=str)
+    cached = _triage_cache.get(key)
+    if cached is None:
+        scores, reasons = {}, {}
+        for symptom, weight in match_symptoms(symptoms_data).items():
+            for specialty, affinity in SYMPTOM_ONTOLOGY[symptom]["specialties"].items():
+                scores[specialty] = scores.get(specialty, 0.0) + weight * affinity
+                reasons.setdefault(specialty, []).append(symptom)
+        cached = [
+            {"specialty": specialty, "score": round(score, 3), "symptoms": reasons[specialty]}
+            for specialty, score in sorted(scores.items(), key=lambda s: s[1], reverse=True)
+        ]
+        _triage_cache.set(key, cached)
+        logger.info(f"Triage: {[(s['specialty'], s['score']) for s in cached[:3]]}")
+    return [{**s, "symptoms": list(s["symptoms"])} for s in cached[:top_k]]
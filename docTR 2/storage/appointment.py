@@ -1,74 +1,86 @@
-import random
-from utils.logger import setup_logger
-
-logger = setup_logger("appointment")
-
-# Mock doctor database
-DOCTORS = [
-    {
-        "name": "Dr. Alice Smith",
-        "specialty": "General Practitioner",
-        "location": "New York",
-        "phone": "555-0101",
-        "email": "alice@example.com"
-    },
-    {
-        "name": "Dr. Bob Johnson",
-        "specialty": "Nutrition Specialist",
-        "location": "Los Angeles",
-        "phone": "555-0102",
-        "email": "bob@example.com"
-    },
-    {
-        "name": "Dr. Carol Williams",
-        "specialty": "Health Coach",
-        "location": "Chicago",
-        "phone": "555-0103",
-        "email": "carol@example.com"
-    },
-    {
-        "name": "Dr. David Kim",
-        "specialty": "Sports Medicine",
-        "location": "Miami",
-        "phone": "555-0104",
-        "email": "david@example.com"
-    }
-]
-
-def get_doctors_for_booking(condition: str, location: str, n_results: int = 3) -> list:
-    """Get a list of doctors matching the condition and location"""
-    try:
-        # Filter doctors by location
-        filtered = [doc for doc in DOCTORS if location.lower() in doc["location"].lower()]
-        
-        # If no doctors in exact location, return any doctors
-        if not filtered:
-            filtered = DOCTORS
-        
-        # Return requested number of results
-        return filtered[:n_results]
-    except Exception as e:
-        logger.error(f"Error getting doctors: {e}")
-        return DOCTORS[:n_results]  # Return default doctors on error
-
-def book_appointment(doctor: dict, patient_data: dict) -> str:
-    """Book an appointment with a doctor (simulated)"""
-    try:
-        patient_name = patient_data.get("form_data", {}).get("full_name", "Patient")
-        doctor_name = doctor["name"]
-        
-        # Generate random appointment time
-        times = ["10:00 AM", "2:30 PM", "4:15 PM", "11:45 AM"]
-        appointment_time = random.choice(times)
-        booking_id = f"APT-{random.randint(1000,9999)}"
-        
-        return (
-            f"Appointment confirmed with {doctor_name}!\n\n"
-            f"**Booking ID:** {booking_id}\n"
-            f"**Time:** Tomorrow at {appointment_time}\n"
-            f"**Location:** {doctor['location']}\n\n"
-            "You'll receive a confirmation email shortly."
-        )
-    except Exception as e:
-        logger.error(f"Failed to book appointment: {e}")
+from datetime import datetime
+from utils.config import DOCTOR_SEARCH_CACHE_SIZE, DOCTOR_SEARCH_CACHE_TTL
+from utils.logger import setup_logger
+from utils.ttl_cache import TTLCache
+from storage.doctor_db_chroma import get_doctors_by_specialty_and_location, search_cache_key
+from storage.appointment_scheduler import get_scheduler
+
+logger = setup_logger("appointment")
+
+# Fallback doctors when the directory is unavailable
+DOCTORS = [
+    {
+        "name": "Dr. Alice Smith",
+        "specialty": "General Practitioner",
+        "location": "New York",
+        "phone": "555-0101",
+        "email": "alice@example.com"
+    },
+    {
+        "name": "Dr. Bob Johnson",
+        "specialty": "Nutrition Specialist",
+        "location": "Los Angeles",
+        "phone": "555-0102",
+        "email": "bob@example.com"
+    },
+    {
+        "name": "Dr. Carol Williams",
+        "specialty": "Health Coach",
+        "location": "Chicago",
+        "phone": "555-0103",
+        "email": "carol@example.com"
+    },
+    {
+        "name": "Dr. David Kim",
+        "specialty": "Sports Medicine",
+        "location": "Miami",
+        "phone": "555-0104",
+        "email": "david@example.com"
+    }
+]
+
+# The results page reruns on every widget interaction; repeat lookups are served from here
+_booking_cache = TTLCache(DOCTOR_SEARCH_CACHE_SIZE, DOCTOR_SEARCH_CACHE_TTL)
+
+def get_doctors_for_booking(condition: str, location: str, n_results: int = 3) -> list:
+    """Get a list of doctors matching the condition and location"""
+    key = search_cache_key(condition, location, n_results)
+    cached = _booking_cache.get(key)
+    if cached is not None:
+        return [dict(doctor) for doctor in cached]
+    try:
+        doctors = get_doctors_by_specialty_and_location(condition, location, n_results=n_results)
+        
+        # If the directory has nobody to offer, return the fallback doctors (uncached, so a
+        # failed lookup is retried on the next rerun)
+        if not doctors:
+            return DOCTORS[:n_results]
+        
+        _booking_cache.set(key, doctors)
+        return [dict(doctor) for doctor in doctors]
+    except Exception as e:
+        logger.error(f"Error getting doctors: {e}")
+        return DOCTORS[:n_results]  # Return default doctors on error
+
+def book_appointment(doctor: dict, patient_data: dict) -> str:
+    """Book the doctor's earliest free slot for the patient"""
+    try:
+        patient_name = patient_data.get("form_data", {}).get("full_name", "Patient")
+        doctor_name = doctor["name"]
+        
+        # Fallback doctors have no directory id; their name identifies the calendar
+        booking = get_scheduler().book(doctor.get("id") or doctor_name, patient_name)
+        if booking is None:
+            return f"{doctor_name} has no free slots in the coming weeks. Please choose another doctor."
+        appointment_time = datetime.fromtimestamp(booking["start_ts"]).strftime("%A %d %B at %I:%M %p")
+        
+        return (
+            f"Appointment confirmed with {doctor_name}!\n\n"
+            f"**Booking ID:** {booking['booking_id']}\n"
+            f"**Time:** {appointment_time}\n"
+            f"**Location:** {doctor['location']}\n\n"
+            "You'll receive a confirmation email shortly."
+        )
+    except Exception as e:
+        logger.error(f"Failed to book appointment: {e}")
         return "Failed to book appointment. Please try again later."
\ No newline at end of file
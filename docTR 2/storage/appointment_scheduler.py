@@ -0,0 +1,274 @@
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta
+from utils.config import (
+    APPOINTMENT_SLOT_MINUTES, APPOINTMENT_DAY_START_HOUR, APPOINTMENT_DAY_END_HOUR,
+    APPOINTMENT_HORIZON_DAYS, APPOINTMENT_LEAD_MINUTES
+)
+from utils.logger import setup_logger
+from storage.metadata_db import ensure_schema
+
+logger = setup_logger("appointment_scheduler")
+
+# SQLite is the source of truth: a slot is taken by a compare-and-set UPDATE
+# (only if still free) in the same transaction that inserts the appointment,
+# and a partial unique index rules out two live bookings of one slot. Each
+# process keeps a sorted array of free slot starts per doctor for O(log n)
+# search. It is reloaded from the free-slot index when a search finds
+# nothing (another process may have cancelled) or a CAS fails (another
+# process booked).
+SCHEDULER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS appointment_slots (
+    doctor_id TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    booking_id INTEGER,
+    PRIMARY KEY (doctor_id, start_ts)
+);
+CREATE INDEX IF NOT EXISTS idx_slots_free ON appointment_slots(doctor_id, start_ts) WHERE booking_id IS NULL;
+CREATE TABLE IF NOT EXISTS appointments (
+    booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doctor_id TEXT NOT NULL,
+    patient TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'booked',
+    created_at INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_appointments_live ON appointments(doctor_id, start_ts) WHERE status = 'booked';
+CREATE TABLE IF NOT EXISTS doctor_calendars (
+    doctor_id TEXT PRIMARY KEY,
+    generated_until INTEGER NOT NULL
+);
+"""
+
+def format_booking_id(booking_id: int) -> str:
+    return f"APT-{booking_id:07d}"
+
+def working_slots(start: datetime, end: datetime) -> list:
+    """(start_ts, end_ts) of weekday slots within working hours between two datetimes."""
+    slots, step = [], timedelta(minutes=APPOINTMENT_SLOT_MINUTES)
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        if day.weekday() < 5:
+            slot = day.replace(hour=APPOINTMENT_DAY_START_HOUR)
+            closing = day.replace(hour=APPOINTMENT_DAY_END_HOUR)
+            while slot + step <= closing:
+                if start <= slot < end:
+                    slots.append((int(slot.timestamp()), int((slot + step).timestamp())))
+                slot += step
+        day += timedelta(days=1)
+    return slots
+
+class AppointmentScheduler:
+    """Per-doctor slot calendars with atomic, collision-free bookings."""
+
+    def __init__(self):
+        self._free = {}           # doctor_id -> sorted list of free slot start_ts
+        self._locks = {}          # doctor_id -> lock guarding its free list
+        self._generated = {}      # doctor_id -> calendar generated up to (unix time)
+        self._locks_guard = threading.Lock()
+        # One writer per process; other processes are serialized by SQLite's lock
+        self._write_lock = threading.Lock()
+
+    def _db(self):
+        return ensure_schema("appointment_scheduler", SCHEDULER_SCHEMA)
+
+    def _lock(self, doctor_id: str) -> threading.Lock:
+        lock = self._locks.get(doctor_id)
+        if lock is None:
+            with self._locks_guard:
+                lock = self._locks.setdefault(doctor_id, threading.Lock())
+        return lock
+
+    def ensure_availability(self, doctor_id: str, now: float = None) -> int:
+        """Generate working-hour slots up to APPOINTMENT_HORIZON_DAYS ahead; returns slots added."""
+        now = now or time.time()
+        until = now + APPOINTMENT_HORIZON_DAYS * 86400
+        # Extend at most once a day per doctor
+        if self._generated.get(doctor_id, 0) >= until - 86400:
+            return 0
+        db = self._db()
+        row = db.execute("SELECT generated_until FROM doctor_calendars WHERE doctor_id = ?", (doctor_id,)).fetchone()
+        start = max(now, row["generated_until"]) if row else now
+        if start >= until - 86400:
+            self._generated[doctor_id] = start
+            return 0
+        slots = working_slots(datetime.fromtimestamp(start), datetime.fromtimestamp(until))
+        with self._write_lock:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.executemany(
+                    "INSERT OR IGNORE INTO appointment_slots (doctor_id, start_ts, end_ts) VALUES (?, ?, ?)",
+                    [(doctor_id, s, e) for s, e in slots]
+                )
+                db.execute(
+                    "INSERT OR REPLACE INTO doctor_calendars (doctor_id, generated_until) VALUES (?, ?)",
+                    (doctor_id, int(until))
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        self._generated[doctor_id] = until
+        with self._lock(doctor_id):
+            if doctor_id in self._free:
+                free = self._free[doctor_id]
+                for s, _ in slots:
+                    i = bisect.bisect_left(free, s)
+                    if i == len(free) or free[i] != s:
+                        free.insert(i, s)
+        return len(slots)
+
+    def _free_slots(self, doctor_id: str, refresh: bool = False) -> list:
+        """
+        The doctor's sorted free list, loaded from SQLite on first use or when
+        refresh is set (call with the doctor's lock held).
+        """
+        free = self._free.get(doctor_id)
+        if free is None or refresh:
+            rows = self._db().execute(
+                "SELECT start_ts FROM appointment_slots WHERE doctor_id = ? AND booking_id IS NULL "
+                "AND start_ts >= ? ORDER BY start_ts",
+                (doctor_id, int(time.time()))
+            )
+            free = self._free[doctor_id] = [row["start_ts"] for row in rows]
+        return free
+
+    @staticmethod
+    def _position(free: list, start_ts: int = None, after: float = None):
+        """Index of start_ts, or of the first slot at or after `after`, in a free list; None if absent."""
+        if start_ts is not None:
+            i = bisect.bisect_left(free, start_ts)
+            return i if i < len(free) and free[i] == start_ts else None
+        i = bisect.bisect_left(free, after)
+        return i if i < len(free) else None
+
+    def _release(self, doctor_id: str, start_ts: int):
+        """Put a slot back on the doctor's free list, if it is loaded."""
+        with self._lock(doctor_id):
+            free = self._free.get(doctor_id)
+            if free is not None:
+                i = bisect.bisect_left(free, start_ts)
+                if i == len(free) or free[i] != start_ts:
+                    free.insert(i, start_ts)
+
+    def next_free_slots(self, doctor_id: str, after: float = None, limit: int = 5) -> list:
+        """Start times of the next free slots at or after `after` (O(log n) search)."""
+        after = after or time.time() + APPOINTMENT_LEAD_MINUTES * 60
+        self.ensure_availability(doctor_id)
+        with self._lock(doctor_id):
+            free = self._free_slots(doctor_id)
+            if self._position(free, after=after) is None:
+                free = self._free_slots(doctor_id, refresh=True)
+            i = bisect.bisect_left(free, after)
+            return free[i:i + limit]
+
+    def _reserve(self, doctor_id: str, start_ts: int, patient: str):
+        """Compare-and-set one slot; returns the booking id or None if it was already taken."""
+        db = self._db()
+        now = int(time.time())
+        with self._write_lock:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                cur = db.execute(
+                    "INSERT INTO appointments (doctor_id, patient, start_ts, end_ts, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (doctor_id, patient, start_ts, start_ts + APPOINTMENT_SLOT_MINUTES * 60, now)
+                )
+                booking_id = cur.lastrowid
+                taken = db.execute(
+                    "UPDATE appointment_slots SET booking_id = ? "
+                    "WHERE doctor_id = ? AND start_ts = ? AND booking_id IS NULL",
+                    (booking_id, doctor_id, start_ts)
+                ).rowcount
+                db.execute("COMMIT" if taken else "ROLLBACK")
+                return booking_id if taken else None
+            except Exception as e:
+                db.execute("ROLLBACK")
+                if "UNIQUE" in str(e):
+                    return None
+                raise
+
+    def book(self, doctor_id: str, patient: str, start_ts: int = None, after: float = None,
+             max_attempts: int = 20):
+        """
+        Book a specific slot (start_ts) or the earliest free one at or after `after`.
+
+        Returns:
+            dict: booking_id, doctor_id, patient, start_ts, end_ts; None if nothing could be booked
+        """
+        after = after or time.time() + APPOINTMENT_LEAD_MINUTES * 60
+        self.ensure_availability(doctor_id)
+        stale = False
+        for _ in range(max_attempts):
+            with self._lock(doctor_id):
+                free = self._free_slots(doctor_id, refresh=stale)
+                i = self._position(free, start_ts, after)
+                if i is None and not stale:
+                    # Another process may have released slots since the list was loaded
+                    free = self._free_slots(doctor_id, refresh=True)
+                    i = self._position(free, start_ts, after)
+                if i is None:
+                    return None
+                # Claim locally first so threads of this process try different slots
+                candidate = free.pop(i)
+            try:
+                booking_id = self._reserve(doctor_id, candidate, patient)
+            except Exception:
+                self._release(doctor_id, candidate)
+                raise
+            if booking_id is not None:
+                logger.info(f"Booked {format_booking_id(booking_id)}: {patient} with {doctor_id} at {candidate}")
+                return {
+                    "booking_id": format_booking_id(booking_id),
+                    "doctor_id": doctor_id,
+                    "patient": patient,
+                    "start_ts": candidate,
+                    "end_ts": candidate + APPOINTMENT_SLOT_MINUTES * 60
+                }
+            # Another process took it; reload the list so its other bookings are skipped too
+            if start_ts is not None:
+                return None
+            stale = True
+        return None
+
+    def cancel(self, booking_id: str) -> bool:
+        """Cancel a booking and release its slot."""
+        numeric_id = int(str(booking_id).replace("APT-", ""))
+        db = self._db()
+        with self._write_lock:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT doctor_id, start_ts FROM appointments WHERE booking_id = ? AND status = 'booked'",
+                    (numeric_id,)
+                ).fetchone()
+                if row is None:
+                    db.execute("ROLLBACK")
+                    return False
+                db.execute("UPDATE appointments SET status = 'cancelled' WHERE booking_id = ?", (numeric_id,))
+                db.execute(
+                    "UPDATE appointment_slots SET booking_id = NULL WHERE doctor_id = ? AND start_ts = ? AND booking_id = ?",
+                    (row["doctor_id"], row["start_ts"], numeric_id)
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        self._release(row["doctor_id"], row["start_ts"])
+        logger.info(f"Cancelled {booking_id}")
+        return True
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> AppointmentScheduler:
+    """Return the process-wide scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = AppointmentScheduler()
+    return _scheduler
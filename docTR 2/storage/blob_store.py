@@ -0,0 +1,102 @@
+import hashlib
+import os
+import threading
+import time
+from utils.config import HISTORY_BLOB_DIR, HISTORY_BLOB_LEVEL
+from utils.logger import setup_logger
+
+logger = setup_logger("blob_store")
+
+class BlobStore:
+    """
+    Content-addressed, zstd-compressed store for document bodies.
+
+    A blob's key is the SHA-256 of its text, so saving the same text twice
+    stores it once. Blobs live under root/<2 hex>/<2 hex>/<key>.zst and are
+    written atomically (temp file + rename), which makes concurrent puts of
+    the same key safe.
+    """
+
+    def __init__(self, root: str = HISTORY_BLOB_DIR, level: int = HISTORY_BLOB_LEVEL):
+        import zstandard
+        self.root = root
+        self.level = level
+        self._zstd = zstandard
+        # zstd (de)compressors must not be shared between threads
+        self._local = threading.local()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], f"{key}.zst")
+
+    def _compressor(self):
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = self._zstd.ZstdCompressor(level=self.level)
+            self._local.decompressor = self._zstd.ZstdDecompressor()
+        return self._local.compressor, self._local.decompressor
+
+    def put(self, text: str) -> str:
+        """Store text and return its key."""
+        data = text.encode("utf-8")
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(self._compressor()[0].compress(data))
+            os.replace(tmp, path)
+        else:
+            # Re-referenced: refresh mtime so garbage collection keeps it
+            os.utime(path)
+        return key
+
+    def get(self, key: str) -> str:
+        """Return the text stored under key, or None if the blob is missing."""
+        try:
+            with open(self._path(key), "rb") as f:
+                return self._compressor()[1].decompress(f.read()).decode("utf-8")
+        except FileNotFoundError:
+            logger.error(f"Missing document blob {key}")
+            return None
+
+    def garbage_collect(self, live_keys: set, min_age_s: int = 3600) -> int:
+        """
+        Delete blobs no longer referenced by any record; returns the number removed.
+
+        Blobs younger than min_age_s are kept: a writer stores the blob
+        before adding the record that references it.
+        """
+        removed, cutoff = 0, time.time() - min_age_s
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename.endswith(".zst") and filename[:-4] not in live_keys and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+        logger.info(f"Blob GC removed {removed} unreferenced blobs")
+        return removed
+
+    def remove(self, keys, min_age_s: int = 3600) -> int:
+        """Delete the given blobs, keeping any younger than min_age_s; returns the number removed."""
+        removed, cutoff = 0, time.time() - min_age_s
+        for key in keys:
+            path = self._path(key)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide blob store, opening it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BlobStore()
+    return _store
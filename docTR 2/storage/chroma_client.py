@@ -0,0 +1,126 @@
+import threading
+from utils.config import CHROMA_PERSIST_DIR, HNSW_PROFILES
+from utils.logger import setup_logger
+
+logger = setup_logger("chroma_client")
+
+# Created on first use so importing storage modules stays cheap
+_client = None
+_client_lock = threading.Lock()
+
+# Embedding functions that all compute all-MiniLM-L6-v2 vectors (384-d, unit
+# length), so a collection built with one can be served by another
+MINILM_FUNCTIONS = {"onnx_minilm", "default", "onnx_mini_lm_l6_v2"}
+MINILM_MODEL = "all-MiniLM-L6-v2"
+_adapter_class = None
+_stale = set()  # collections whose stored vectors the configured function cannot serve
+
+def get_client():
+    """Return the process-wide Chroma PersistentClient, opening it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import chromadb
+                _client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
+                logger.info(f"Chroma client opened at {CHROMA_PERSIST_DIR}")
+    return _client
+
+def hnsw_configuration(profile: str) -> dict:
+    """HNSW settings of a profile from HNSW_PROFILES (unknown names fall back to "balanced")."""
+    if profile not in HNSW_PROFILES:
+        logger.warning(f"Unknown HNSW profile {profile}, using balanced")
+        profile = "balanced"
+    return dict(HNSW_PROFILES[profile])
+
+def _is_minilm(config: dict) -> bool:
+    if config.get("name") == "sentence_transformer":
+        return str((config.get("config") or {}).get("model_name", "")).endswith(MINILM_MODEL)
+    return config.get("name") in MINILM_FUNCTIONS
+
+def _persisted_as(embedding_function, persisted: dict):
+    """
+    embedding_function under the name and config a collection was persisted
+    with, so Chroma opens the collection while the configured backend embeds.
+    """
+    global _adapter_class
+    if _adapter_class is None:
+        from chromadb.api.types import EmbeddingFunction
+
+        class PersistedAs(EmbeddingFunction):
+            def __init__(self, wrapped, config: dict):
+                self.wrapped, self.config = wrapped, config
+
+            def __call__(self, input):
+                return self.wrapped(input)
+
+            def name(self) -> str:
+                return self.config["name"]
+
+            def get_config(self) -> dict:
+                return self.config.get("config") or {}
+
+            def validate_config(self, config: dict) -> None:
+                pass
+
+        _adapter_class = PersistedAs
+    return _adapter_class(embedding_function, persisted)
+
+def _stored_embedding_function(name: str, embedding_function):
+    """
+    The embedding function to open a collection with.
+
+    Chroma neither opens a collection with a differently named function
+    nor lets one be swapped in place. When the persisted function and
+    embedding_function both compute MiniLM vectors of the stored dimension,
+    embedding_function is used under the persisted name, so switching
+    EMBEDDING_BACKEND applies to existing collections too. Otherwise the
+    persisted function is used until the collection is rebuilt with its
+    records re-embedded (see needs_reembedding).
+    """
+    from chromadb.errors import NotFoundError
+    from chromadb.utils.embedding_functions import config_to_embedding_function
+    try:
+        collection = get_client().get_collection(name, embedding_function=None)
+    except NotFoundError:
+        return embedding_function
+    persisted = (collection.configuration_json or {}).get("embedding_function") or {}
+    if persisted.get("type") != "known" or persisted.get("name") in (None, embedding_function.name()):
+        return embedding_function
+    configured = {"name": embedding_function.name(), "config": embedding_function.get_config()}
+    if _is_minilm(persisted) and _is_minilm(configured):
+        stored = collection.get(limit=1, include=["embeddings"])["embeddings"]
+        if stored is None or len(stored) == 0 or len(stored[0]) == len(embedding_function(["dimension check"])[0]):
+            logger.info(f"{name}: serving {persisted['name']} vectors with {embedding_function.name()}")
+            return _persisted_as(embedding_function, persisted)
+    logger.warning(f"{name} was built with the {persisted['name']} embedding function; "
+                   f"rebuild it to re-embed its records with {embedding_function.name()}")
+    _stale.add(name)
+    return config_to_embedding_function(persisted)
+
+def needs_reembedding(name: str) -> bool:
+    """True if a collection was opened with its persisted function because the configured one is incompatible."""
+    return name in _stale
+
+def get_or_create_collection(name: str, embedding_function, profile: str):
+    """
+    Open or create a collection with an HNSW profile.
+
+    A new collection is built with the full profile. For an existing one
+    only ef_search can change in place; differing build-time settings are
+    logged, since they need the collection to be rebuilt.
+    """
+    hnsw = hnsw_configuration(profile)
+    collection = get_client().get_or_create_collection(
+        name=name,
+        embedding_function=_stored_embedding_function(name, embedding_function),
+        configuration={"hnsw": hnsw}
+    )
+    current = (collection.configuration or {}).get("hnsw") or {}
+    if current.get("ef_search") not in (None, hnsw["ef_search"]):
+        collection.modify(configuration={"hnsw": {"ef_search": hnsw["ef_search"]}})
+        logger.info(f"{name}: ef_search {current['ef_search']} -> {hnsw['ef_search']}")
+    stale = [k for k in ("space", "max_neighbors", "ef_construction") if k in current and current[k] != hnsw[k]]
+    if stale:
+        logger.warning(f"{name} was built with different {', '.join(stale)}; rebuild it to apply profile {profile}")
+    return collection
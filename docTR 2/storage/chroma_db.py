@@ -1,58 +1,700 @@
-import chromadb
-from utils.config import CHROMA_PERSIST_DIR
-from utils.logger import setup_logger
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
-import time
-
-logger = setup_logger("chroma_db")
-
-# Initialize ChromaDB client & collection
-_client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
-_embed_fn = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-_collection = _client.get_or_create_collection(
-    name="health_history",
-    embedding_function=_embed_fn
-)
-
-def add_to_health_history(user_id: str, report_type: str, text: str):
-    """
-    Add a health/fitness record to the history DB.
-    """
-    try:
-        # Create unique ID with timestamp
-        timestamp = int(time.time())
-        doc_id = f"{user_id}_{report_type}_{timestamp}"
-        
-        metadata = {
-            "user_id": user_id,
-            "report_type": report_type,
-            "timestamp": str(timestamp)
-        }
-        
-        _collection.add(
-            ids=[doc_id],
-            documents=[text],
-            metadatas=[metadata]
-        )
-        logger.info(f"Added to health history: {doc_id}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to store health history: {e}")
-        return False
-
-def get_health_history(user_id: str, n_results: int = 10):
-    """
-    Retrieve up to n_results past health/fitness records for a given user.
-    """
-    try:
-        results = _collection.query(
-            query_texts=[""],
-            n_results=n_results,
-            where={"user_id": user_id}
-        )
-        docs = results.get("documents", [[]])[0]
-        metas = results.get("metadatas", [[]])[0]
-        return [{"document": d, "metadata": m} for d, m in zip(docs, metas)]
-    except Exception as e:
-        logger.error(f"Error retrieving health history for {user_id}: {e}")
-        return []
\ No newline at end of file
+import argparse
+import hashlib
+import math
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from utils.config import (
+    HISTORY_PARTITIONS, HISTORY_FANOUT_WORKERS, HISTORY_DEDUPE_MAX_DISTANCE, HISTORY_BLOB_STORE,
+    HISTORY_HNSW_PROFILE, HISTORY_CANDIDATE_POOL, HISTORY_RECENCY_HALF_LIFE_DAYS, HISTORY_RECENCY_WEIGHT,
+    HISTORY_REBUILD_GRACE_SECONDS
+)
+from utils.logger import setup_logger
+from storage.chroma_client import get_client, get_or_create_collection, hnsw_configuration, needs_reembedding
+from storage.embedder import get_embedding_function
+from storage.metadata_db import ensure_schema
+from storage import history_dedupe, patient_summary
+from storage.blob_store import get_blob_store
+import time
+
+logger = setup_logger("chroma_db")
+
+# History is sharded: each user is routed to one partition collection
+# (hash of user_id) or, for heavy users, a dedicated segment collection.
+# The routing table pins the choice so changing HISTORY_PARTITIONS later
+# does not move existing users. A rebuilt collection gets a new physical
+# name; history_aliases maps the routed (logical) name to it, and the
+# collection it replaced is kept in history_retired for a grace period.
+LEGACY_COLLECTION = "health_history"
+PARTITION_PREFIX = "health_history_p"
+SEGMENT_PREFIX = "health_history_u"
+
+ROUTING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_routing (
+    user_id TEXT PRIMARY KEY,
+    collection TEXT NOT NULL,
+    record_count INTEGER NOT NULL DEFAULT 0,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_routing_collection ON history_routing(collection);
+CREATE TABLE IF NOT EXISTS history_aliases (
+    collection TEXT PRIMARY KEY,
+    physical TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history_retired (
+    physical TEXT PRIMARY KEY,
+    collection TEXT NOT NULL,
+    retired_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history_migrations (
+    name TEXT PRIMARY KEY,
+    done_at INTEGER NOT NULL
+);
+"""
+
+# Collections are cached after first use and reopened when their alias
+# changes. Routes and aliases are read from the routing tables on every
+# call, so moves and rebuilds made by another process (the admin CLIs)
+# are seen straight away.
+_collections = {}
+_migrated = False
+_migrating = False
+_collection_lock = threading.RLock()
+
+def _user_hash(user_id: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+def partition_name(user_id: str, partitions: int = HISTORY_PARTITIONS) -> str:
+    """Hash partition a new user is routed to."""
+    return f"{PARTITION_PREFIX}{_user_hash(user_id) % partitions:03d}"
+
+def segment_name(user_id: str) -> str:
+    """Dedicated collection for a single user."""
+    return f"{SEGMENT_PREFIX}{_user_hash(user_id):016x}"
+
+def _routing_db():
+    return ensure_schema("history_routing", ROUTING_SCHEMA)
+
+def route_user(user_id: str, create: bool = True):
+    """
+    Return the collection name holding a user's history.
+
+    Args:
+        user_id: Patient identifier
+        create: Assign a partition if the user has none yet
+
+    Returns:
+        str: Collection name, or None for an unknown user when create is False
+    """
+    if not _migrated:
+        with _collection_lock:
+            _run_migrations()
+    db = _routing_db()
+    row = db.execute("SELECT collection FROM history_routing WHERE user_id = ?", (user_id,)).fetchone()
+    if row is None:
+        if not create:
+            return None
+        db.execute(
+            "INSERT OR IGNORE INTO history_routing (user_id, collection, created_at) VALUES (?, ?, ?)",
+            (user_id, partition_name(user_id), int(time.time()))
+        )
+        # Re-read in case another thread routed the user first
+        row = db.execute("SELECT collection FROM history_routing WHERE user_id = ?", (user_id,)).fetchone()
+    return row["collection"]
+
+def _physical_name(name: str) -> str:
+    row = _routing_db().execute("SELECT physical FROM history_aliases WHERE collection = ?", (name,)).fetchone()
+    return row["physical"] if row else name
+
+def _get_collection(name: str):
+    collection = _collections.get(name)
+    if collection is None or collection.name != _physical_name(name):
+        with _collection_lock:
+            _run_migrations()
+            collection, physical = _collections.get(name), _physical_name(name)
+            if collection is None or collection.name != physical:
+                collection = get_or_create_collection(physical, get_embedding_function(), HISTORY_HNSW_PROFILE)
+                _collections[name] = collection
+    return collection
+
+def list_history_users() -> list:
+    """(user_id, collection) for every routed user."""
+    rows = _routing_db().execute("SELECT user_id, collection FROM history_routing ORDER BY collection, user_id")
+    return [(row["user_id"], row["collection"]) for row in rows]
+
+def set_record_count(user_id: str, count: int):
+    _routing_db().execute("UPDATE history_routing SET record_count = ? WHERE user_id = ?", (count, user_id))
+
+def get_history_collection(user_id: str):
+    """Return the collection holding a user's history, creating it on first use."""
+    return _get_collection(route_user(user_id))
+
+def list_history_collections() -> list:
+    """Names of all partition and segment collections."""
+    with _collection_lock:
+        _run_migrations()
+    names = [c if isinstance(c, str) else c.name for c in get_client().list_collections()]
+    logical = {row["physical"]: row["collection"] for row in _routing_db().execute("SELECT * FROM history_aliases")}
+    return sorted({
+        logical.get(n, n) for n in names
+        if n.startswith((PARTITION_PREFIX, SEGMENT_PREFIX)) and ("__r" not in n or n in logical)
+    })
+
+def _run_migrations():
+    """
+    One-off upgrades of stored history; checked once per process on first use.
+
+    Called with _collection_lock held, so other threads wait until the
+    migrations are done. _migrating only stops the migrating thread from
+    re-entering; a failed run leaves _migrated unset and is retried.
+    """
+    global _migrated, _migrating
+    if _migrated or _migrating:
+        return
+    _migrating = True
+    try:
+        _migrate_legacy_history()
+        _backfill_numeric_timestamps()
+        _migrated = True
+    finally:
+        _migrating = False
+
+def _migrate_legacy_history(batch_size: int = 1000):
+    """Move records from the old single health_history collection into partitions."""
+    client = get_client()
+    try:
+        # Stored vectors are copied as-is, so no embedding function is needed
+        legacy = client.get_collection(LEGACY_COLLECTION, embedding_function=None)
+    except Exception:
+        return
+
+    moved, offset = 0, 0
+    db = _routing_db()
+    while True:
+        batch = legacy.get(include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset)
+        if not batch["ids"]:
+            break
+        offset += len(batch["ids"])
+        groups = {}
+        for i, meta in enumerate(batch["metadatas"]):
+            user_id = (meta or {}).get("user_id", "unknown")
+            groups.setdefault(route_user(user_id), []).append((i, user_id))
+        for name, rows in groups.items():
+            # Reuse stored vectors; upsert keeps a re-run after a crash idempotent
+            _get_collection(name).upsert(
+                ids=[batch["ids"][i] for i, _ in rows],
+                documents=[batch["documents"][i] for i, _ in rows],
+                metadatas=[batch["metadatas"][i] for i, _ in rows],
+                embeddings=[batch["embeddings"][i] for i, _ in rows]
+            )
+            for _, user_id in rows:
+                db.execute("UPDATE history_routing SET record_count = record_count + 1 WHERE user_id = ?", (user_id,))
+        moved += len(batch["ids"])
+    client.delete_collection(LEGACY_COLLECTION)
+    logger.info(f"Migrated {moved} records from {LEGACY_COLLECTION} into partitioned collections")
+
+def _timestamp(metadata: dict) -> float:
+    try:
+        return float((metadata or {}).get("timestamp", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+def _backfill_numeric_timestamps(batch_size: int = 1000):
+    """Convert timestamps older versions stored as strings to ints, so they can be range-filtered."""
+    db = _routing_db()
+    if db.execute("SELECT 1 FROM history_migrations WHERE name = 'numeric_timestamps'").fetchone():
+        return
+    converted = 0
+    for name in list_history_collections():
+        collection, offset = _get_collection(name), 0
+        while True:
+            batch = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            if not batch["ids"]:
+                break
+            offset += len(batch["ids"])
+            ids, metadatas = [], []
+            for doc_id, metadata in zip(batch["ids"], batch["metadatas"]):
+                stale = [k for k in ("timestamp", "last_saved") if isinstance((metadata or {}).get(k), str)]
+                if stale:
+                    ids.append(doc_id)
+                    metadatas.append({**metadata, **{k: int(_timestamp({"timestamp": metadata[k]})) for k in stale}})
+            if ids:
+                # Metadata-only update: nothing is re-embedded
+                collection.update(ids=ids, metadatas=metadatas)
+                converted += len(ids)
+    db.execute(
+        "INSERT OR IGNORE INTO history_migrations (name, done_at) VALUES ('numeric_timestamps', ?)", (int(time.time()),)
+    )
+    logger.info(f"Converted {converted} string timestamps to numbers")
+
+def resolve_document(document, metadata: dict) -> str:
+    """Document text of a record, reading it from the blob store if it was stored there."""
+    if document is None and metadata and metadata.get("blob"):
+        return get_blob_store().get(metadata["blob"]) or ""
+    return document
+
+class HistoryRecord(dict):
+    """History record whose blob-stored document is only read when it is accessed."""
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if key == "document" and value is None:
+            value = resolve_document(None, self.get("metadata"))
+            self["document"] = value
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+def add_to_health_history(user_id: str, report_type: str, text: str, tables: list = None):
+    """
+    Add a health/fitness record to the history DB.
+
+    A near-duplicate of an entry the user already saved (same report type,
+    SimHash within HISTORY_DEDUPE_MAX_DISTANCE bits and the same numbers)
+    is not embedded or stored again; the existing entry's save_count and
+    last_saved are bumped. A report where only a value changed is stored.
+    """
+    try:
+        # Unique ID: timestamp for readability, random suffix so two saves in one second don't collide
+        timestamp = int(time.time())
+        doc_id = f"{user_id}_{report_type}_{timestamp}_{uuid.uuid4().hex[:12]}"
+
+        signature = history_dedupe.simhash(text)
+        if HISTORY_DEDUPE_MAX_DISTANCE > 0:
+            for duplicate_id in history_dedupe.find_near_duplicates(user_id, report_type, signature):
+                if _merge_duplicate(user_id, duplicate_id, text, timestamp):
+                    logger.info(f"Skipped near-duplicate of {duplicate_id} for {user_id}")
+                    return True
+
+        metadata = {
+            "user_id": user_id,
+            "report_type": report_type,
+            "timestamp": timestamp
+        }
+        if tables:
+            metadata["table_count"] = len(tables)
+
+        if HISTORY_BLOB_STORE:
+            # Only the vector and metadata go to Chroma; the body goes to the blob store
+            metadata["blob"] = get_blob_store().put(text)
+            metadata["doc_chars"] = len(text)
+            get_history_collection(user_id).add(
+                ids=[doc_id],
+                embeddings=get_embedding_function()([text]),
+                metadatas=[metadata]
+            )
+        else:
+            get_history_collection(user_id).add(
+                ids=[doc_id],
+                documents=[text],
+                metadatas=[metadata]
+            )
+        history_dedupe.remember(user_id, report_type, doc_id, signature)
+        try:
+            patient_summary.record_event(user_id, report_type, text, timestamp)
+        except Exception as e:
+            # The record is stored; the summary is rebuilt from history on next read
+            logger.error(f"Failed to update summary of {user_id}: {e}")
+            patient_summary.delete_summary(user_id)
+        _routing_db().execute(
+            "UPDATE history_routing SET record_count = record_count + 1 WHERE user_id = ?", (user_id,)
+        )
+        logger.info(f"Added to health history: {doc_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to store health history: {e}")
+        return False
+
+def _merge_duplicate(user_id: str, doc_id: str, text: str, timestamp: int) -> bool:
+    """
+    Record a repeated save on the existing entry; metadata-only, so nothing
+    is re-embedded. Returns False, so text is stored as a new entry, when
+    the entry is gone or its numbers differ from text.
+    """
+    collection = get_history_collection(user_id)
+    existing = collection.get(ids=[doc_id], include=["documents", "metadatas"])
+    if not existing["ids"]:
+        # Entry was deleted (e.g. compacted) since its signature was indexed
+        history_dedupe.forget(ids=[doc_id])
+        return False
+    if not history_dedupe.same_values(text, resolve_document(existing["documents"][0], existing["metadatas"][0])):
+        return False
+    metadata = dict(existing["metadatas"][0])
+    metadata["save_count"] = int(metadata.get("save_count", 1)) + 1
+    metadata["last_saved"] = timestamp
+    collection.update(ids=[doc_id], metadatas=[metadata])
+    return True
+
+def get_health_history(user_id: str, n_results: int = 10, query_text: str = None):
+    """
+    Retrieve up to n_results past health/fitness records for a given user.
+
+    Without a query the most recent records come first; with one, records
+    are ranked by search_health_history (similarity blended with recency).
+    """
+    if query_text:
+        return search_health_history(user_id, query_text, n_results)
+    try:
+        name = route_user(user_id, create=False)
+        if name is None:
+            return []
+        collection = _get_collection(name)
+        # Order on metadata only, then fetch the documents of the newest records
+        res = collection.get(where={"user_id": user_id}, include=["metadatas"])
+        newest = sorted(zip(res["ids"], res["metadatas"]), key=lambda r: _timestamp(r[1]), reverse=True)[:n_results]
+        if not newest:
+            return []
+        docs = collection.get(ids=[doc_id for doc_id, _ in newest], include=["documents"])
+        by_id = dict(zip(docs["ids"], docs["documents"]))
+        return [HistoryRecord(document=by_id.get(doc_id), metadata=m) for doc_id, m in newest]
+    except Exception as e:
+        logger.error(f"Error retrieving health history for {user_id}: {e}")
+        return []
+
+def _similarity(distance: float, space: str) -> float:
+    # Chroma's l2 is the squared distance: 2 - 2cos for unit vectors
+    return 1 - distance / 2 if space == "l2" else 1 - distance
+
+def search_health_history(user_id: str, query_text: str, n_results: int = 5,
+                          candidates: int = HISTORY_CANDIDATE_POOL,
+                          half_life_days: float = HISTORY_RECENCY_HALF_LIFE_DAYS,
+                          recency_weight: float = HISTORY_RECENCY_WEIGHT,
+                          since: float = None, now: float = None) -> list:
+    """
+    Retrieve a user's records most useful for a query.
+
+    The `candidates` nearest records by embedding are re-ranked by
+    (1 - recency_weight) * similarity + recency_weight * 0.5 ** (age / half-life),
+    so last week's report beats a two-year-old one of similar relevance.
+
+    Args:
+        user_id: Patient identifier
+        query_text: What the records should be relevant to
+        n_results: Records returned
+        candidates: Size of the similarity candidate pool that is re-ranked
+        half_life_days: Age at which the recency term halves
+        recency_weight: 0 = similarity only, 1 = newest first
+        since: Only consider records at or after this unix time
+
+    Returns:
+        list: HistoryRecord dicts with document, metadata, similarity, recency and score
+    """
+    try:
+        name = route_user(user_id, create=False)
+        if name is None:
+            return []
+        collection = _get_collection(name)
+        where = {"user_id": user_id}
+        if since is not None:
+            where = {"$and": [where, {"timestamp": {"$gte": since}}]}
+        res = collection.query(
+            query_texts=[query_text],
+            n_results=max(candidates, n_results),
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        space = ((collection.configuration or {}).get("hnsw") or {}).get("space", "l2")
+        now = now or time.time()
+        decay = math.log(2) / (half_life_days * 86400)
+        ranked = []
+        for d, m, dist in zip(res["documents"][0], res["metadatas"][0], res["distances"][0]):
+            similarity = _similarity(dist, space)
+            recency = math.exp(-decay * max(now - _timestamp(m), 0))
+            ranked.append(HistoryRecord(
+                document=d, metadata=m, similarity=similarity, recency=recency,
+                score=(1 - recency_weight) * similarity + recency_weight * recency
+            ))
+        ranked.sort(key=lambda r: r["score"], reverse=True)
+        return ranked[:n_results]
+    except Exception as e:
+        logger.error(f"Error searching health history for {user_id}: {e}")
+        return []
+
+def get_history_context(user_id: str, n_events: int = 10):
+    """
+    Prompt-ready history context for a user from the materialized summary.
+
+    The summary is rebuilt from the stored records only when missing (history
+    saved before summaries existed, or a failed update).
+
+    Returns:
+        str: Context text, or None if the user has no history
+    """
+    try:
+        summary = patient_summary.get_summary(user_id)
+        if summary is None:
+            name = route_user(user_id, create=False)
+            if name is None:
+                return None
+            res = _get_collection(name).get(where={"user_id": user_id}, include=["documents", "metadatas"])
+            if not res["ids"]:
+                return None
+            summary = patient_summary.rebuild_summary(user_id, [
+                (m.get("report_type", "entry"), resolve_document(d, m) or "", _timestamp(m))
+                for d, m in zip(res["documents"], res["metadatas"])
+            ])
+        return patient_summary.render_context(summary, n_events)
+    except Exception as e:
+        logger.error(f"Error building history context for {user_id}: {e}")
+        return None
+
+def delete_user_history(user_id: str) -> bool:
+    """
+    Delete every record of a user.
+
+    Only the user's own partition is touched; a dedicated segment is
+    dropped as a whole.
+    """
+    try:
+        name = route_user(user_id, create=False)
+        if name is None:
+            return False
+        if name.startswith(SEGMENT_PREFIX):
+            get_client().delete_collection(_physical_name(name))
+            _routing_db().execute("DELETE FROM history_aliases WHERE collection = ?", (name,))
+            _collections.pop(name, None)
+        else:
+            _get_collection(name).delete(where={"user_id": user_id})
+        _routing_db().execute("DELETE FROM history_routing WHERE user_id = ?", (user_id,))
+        history_dedupe.forget(user_id=user_id)
+        patient_summary.delete_summary(user_id)
+        logger.info(f"Deleted health history of {user_id} from {name}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to delete health history for {user_id}: {e}")
+        return False
+
+def isolate_user(user_id: str) -> str:
+    """
+    Move a heavy user out of their shared partition into a dedicated segment.
+
+    Returns:
+        str: Name of the user's collection after the move
+    """
+    source = route_user(user_id)
+    target = segment_name(user_id)
+    if source == target:
+        return target
+    records = _get_collection(source).get(
+        where={"user_id": user_id}, include=["documents", "metadatas", "embeddings"]
+    )
+    if records["ids"]:
+        _get_collection(target).upsert(
+            ids=records["ids"],
+            documents=records["documents"],
+            metadatas=records["metadatas"],
+            embeddings=records["embeddings"]
+        )
+    _routing_db().execute("UPDATE history_routing SET collection = ? WHERE user_id = ?", (target, user_id))
+    # Catch up records a running app added to the source before it saw the new route
+    moved = set(records["ids"])
+    remaining = _get_collection(source).get(
+        where={"user_id": user_id}, include=["documents", "metadatas", "embeddings"]
+    )
+    late = [i for i, doc_id in enumerate(remaining["ids"]) if doc_id not in moved]
+    if late:
+        _get_collection(target).upsert(
+            ids=[remaining["ids"][i] for i in late],
+            documents=[remaining["documents"][i] for i in late],
+            metadatas=[remaining["metadatas"][i] for i in late],
+            embeddings=[remaining["embeddings"][i] for i in late]
+        )
+    if remaining["ids"]:
+        _get_collection(source).delete(ids=remaining["ids"])
+    logger.info(f"Moved {len(remaining['ids'])} records of {user_id} from {source} to {target}")
+    return target
+
+def _copy_records(source, target, batch_size: int = 1000, skip: set = None, where: dict = None,
+                  reembed: bool = False) -> int:
+    copied, offset = 0, 0
+    while True:
+        batch = source.get(
+            where=where, include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset
+        )
+        if not batch["ids"]:
+            return copied
+        offset += len(batch["ids"])
+        keep = [i for i, doc_id in enumerate(batch["ids"]) if not skip or doc_id not in skip]
+        if keep:
+            if reembed:
+                texts = [resolve_document(batch["documents"][i], batch["metadatas"][i]) or "" for i in keep]
+                embeddings = get_embedding_function()(texts)
+            else:
+                embeddings = [batch["embeddings"][i] for i in keep]
+            target.upsert(
+                ids=[batch["ids"][i] for i in keep],
+                documents=[batch["documents"][i] for i in keep],
+                metadatas=[batch["metadatas"][i] for i in keep],
+                embeddings=embeddings
+            )
+            copied += len(keep)
+
+def rebuild_history_collection(name: str) -> int:
+    """
+    Rebuild a history collection's vector index after heavy deletion.
+
+    Chroma only tombstones deleted vectors, so the live records are copied
+    (with their stored embeddings) into a fresh collection, built with the
+    current HISTORY_HNSW_PROFILE and embedding function, which then replaces
+    the old one under the same routed name. Records are re-embedded when the
+    old collection's function is incompatible with the configured one. Records written to the old collection during the
+    copy are caught up after the swap. Other processes may still hold the
+    old collection until they next check its alias, so it is kept for
+    HISTORY_REBUILD_GRACE_SECONDS and dropped by purge_retired_collections.
+
+    Returns:
+        int: Number of records in the rebuilt collection
+    """
+    with _collection_lock:
+        old = _get_collection(name)
+        reembed = needs_reembedding(old.name)
+        started_at = int(time.time())
+        new = get_client().create_collection(
+            name=f"{name}__r{int(time.time() * 1000)}",
+            embedding_function=get_embedding_function(),
+            configuration={"hnsw": hnsw_configuration(HISTORY_HNSW_PROFILE)}
+        )
+        _copy_records(old, new, reembed=reembed)
+        _routing_db().execute(
+            "INSERT OR REPLACE INTO history_aliases (collection, physical) VALUES (?, ?)", (name, new.name)
+        )
+        _collections[name] = new
+    _copy_records(old, new, skip=set(new.get(include=[])["ids"]), reembed=reembed)
+    _routing_db().execute(
+        "INSERT OR REPLACE INTO history_retired (physical, collection, retired_at) VALUES (?, ?, ?)",
+        (old.name, name, started_at)
+    )
+    count = new.count()
+    logger.info(f"Rebuilt {name} as {new.name} with {count} records")
+    purge_retired_collections()
+    return count
+
+def purge_retired_collections(grace_seconds: int = HISTORY_REBUILD_GRACE_SECONDS) -> int:
+    """
+    Drop collections replaced by a rebuild more than grace_seconds ago.
+
+    Records a stale process added to one after the rebuild started are
+    copied to the current collection first, unless their user has since
+    been deleted or moved.
+
+    Returns:
+        int: Number of collections dropped
+    """
+    db = _routing_db()
+    rows = db.execute(
+        "SELECT physical, collection, retired_at FROM history_retired WHERE retired_at <= ?",
+        (int(time.time()) - grace_seconds,)
+    ).fetchall()
+    dropped = 0
+    for row in rows:
+        try:
+            old = get_client().get_collection(row["physical"], embedding_function=None)
+        except Exception:
+            old = None
+        try:
+            if old is not None:
+                current = _get_collection(row["collection"])
+                late = old.get(where={"timestamp": {"$gte": row["retired_at"]}}, include=["metadatas"])
+                live = set(current.get(ids=late["ids"], include=[])["ids"]) if late["ids"] else set()
+                skip = {
+                    doc_id for doc_id, meta in zip(late["ids"], late["metadatas"])
+                    if doc_id in live or route_user((meta or {}).get("user_id", ""), create=False) != row["collection"]
+                }
+                if len(skip) < len(late["ids"]):
+                    # Few late records, and the retired collection's function is unknown here
+                    _copy_records(old, current, skip=skip, where={"timestamp": {"$gte": row["retired_at"]}},
+                                  reembed=True)
+                get_client().delete_collection(row["physical"])
+            db.execute("DELETE FROM history_retired WHERE physical = ?", (row["physical"],))
+            dropped += 1
+        except Exception as e:
+            logger.error(f"Failed to drop retired collection {row['physical']}: {e}")
+    if dropped:
+        logger.info(f"Dropped {dropped} retired history collections")
+    return dropped
+
+def _fan_out(fn, names: list = None) -> dict:
+    """Run fn(collection) on every history collection in parallel; failed partitions are logged and skipped."""
+    names = names if names is not None else list_history_collections()
+    if not names:
+        return {}
+
+    def run(name):
+        try:
+            return name, fn(_get_collection(name))
+        except Exception as e:
+            logger.error(f"History fan-out failed on {name}: {e}")
+            return name, None
+
+    with ThreadPoolExecutor(max_workers=min(HISTORY_FANOUT_WORKERS, len(names))) as pool:
+        return {name: result for name, result in pool.map(run, names) if result is not None}
+
+def search_all_history(query_text: str, n_results: int = 10, where: dict = None) -> list:
+    """
+    Cross-user semantic search over every partition (admin use).
+
+    Each partition returns its own top n_results; the merged list is cut
+    to the n_results closest records overall.
+    """
+    results = _fan_out(lambda c: c.query(query_texts=[query_text], n_results=n_results, where=where))
+    hits = []
+    for res in results.values():
+        for d, m, dist in zip(res["documents"][0], res["metadatas"][0], res["distances"][0]):
+            hits.append({"document": d, "metadata": m, "distance": dist})
+    hits.sort(key=lambda h: h["distance"])
+    return hits[:n_results]
+
+def history_stats() -> dict:
+    """Record count per history collection."""
+    return _fan_out(lambda c: c.count())
+
+def scan_history(include: list = None, batch_size: int = 1000, where: dict = None):
+    """Yield every history record (optionally matching a where filter) as a dict, partition by partition."""
+    include = include or ["documents", "metadatas"]
+    # Metadata is needed to find blob-stored documents
+    fetch = include + ["metadatas"] if "documents" in include and "metadatas" not in include else include
+    for name in list_history_collections():
+        collection, offset = _get_collection(name), 0
+        while True:
+            batch = collection.get(where=where, include=fetch, limit=batch_size, offset=offset)
+            if not batch["ids"]:
+                break
+            offset += len(batch["ids"])
+            for i, doc_id in enumerate(batch["ids"]):
+                record = {"id": doc_id}
+                for field in include:
+                    record[field[:-1]] = batch[field][i]
+                if "documents" in include:
+                    record["document"] = resolve_document(record["document"], batch["metadatas"][i])
+                yield record
+
+def main():
+    parser = argparse.ArgumentParser(description="Health history partition admin")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Record count per partition")
+    for command in ("delete-user", "isolate-user"):
+        sub.add_parser(command).add_argument("user_id")
+    rebuild = sub.add_parser("rebuild", help="Rebuild a collection, or every one whose records need re-embedding")
+    rebuild.add_argument("collection", nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        stats = history_stats()
+        for name, count in sorted(stats.items()):
+            print(f"{name:<36} {count:>10}")
+        print(f"{'total':<36} {sum(stats.values()):>10}")
+    elif args.command == "rebuild":
+        names = [args.collection] if args.collection else [
+            name for name in list_history_collections() if needs_reembedding(_get_collection(name).name)
+        ]
+        for name in names:
+            print(f"{name:<36} {rebuild_history_collection(name):>10}")
+    elif args.command == "delete-user":
+        print("deleted" if delete_user_history(args.user_id) else "no history for user")
+    else:
+        print(f"{args.user_id} -> {isolate_user(args.user_id)}")
+
+if __name__ == "__main__":
+    main()
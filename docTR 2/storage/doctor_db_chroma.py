@@ -1,118 +1,407 @@
-import chromadb
-from utils.config import CHROMA_PERSIST_DIR, DOCTOR_COLLECTION_NAME
-from utils.logger import setup_logger
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
-
-logger = setup_logger("doctor_db_chroma")
-
-# Initialize ChromaDB client & collection
-_client = chromadb.PersistentClient(path=CHROMA_PERSIST_DIR)
-_embed_fn = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-_collection = _client.get_or_create_collection(
-    name=DOCTOR_COLLECTION_NAME,
-    embedding_function=_embed_fn
-)
-
-def init_doctor_db():
-    """Initialize the doctor collection with sample data."""
-    try:
-        # Check if collection is empty
-        if _collection.count() == 0:
-            sample_doctors = [
-                {
-                    "id": "doc1",
-                    "name": "Dr. Alice Smith",
-                    "specialty": "General Practitioner",
-                    "location": "New York",
-                    "phone": "555-0101",
-                    "email": "alice@example.com",
-                    "description": "General practitioner with 10 years of experience in primary care."
-                },
-                {
-                    "id": "doc2",
-                    "name": "Dr. Bob Jones",
-                    "specialty": "Pediatrics",
-                    "location": "New York",
-                    "phone": "555-0102",
-                    "email": "bob@example.com",
-                    "description": "Pediatrician specializing in child healthcare."
-                },
-                {
-                    "id": "doc3",
-                    "name": "Dr. Carol Lee",
-                    "specialty": "Cardiology",
-                    "location": "Los Angeles",
-                    "phone": "555-0103",
-                    "email": "carol@example.com",
-                    "description": "Cardiologist with expertise in heart conditions."
-                },
-                {
-                    "id": "doc4",
-                    "name": "Dr. David Kim",
-                    "specialty": "Dermatology",
-                    "location": "Los Angeles",
-                    "phone": "555-0104",
-                    "email": "david@example.com",
-                    "description": "Dermatologist focused on skin health."
-                },
-                {
-                    "id": "doc5",
-                    "name": "Dr. Emma Wilson",
-                    "specialty": "Orthopedics",
-                    "location": "Chicago",
-                    "phone": "555-0105",
-                    "email": "emma@example.com",
-                    "description": "Orthopedic surgeon specializing in joint replacements."
-                }
-            ]
-            # Prepare data for ChromaDB
-            ids = [doc["id"] for doc in sample_doctors]
-            documents = [f"{doc['specialty']} in {doc['location']}: {doc['description']}" for doc in sample_doctors]
-            metadatas = [
-                {
-                    "name": doc["name"],
-                    "specialty": doc["specialty"],
-                    "location": doc["location"],
-                    "phone": doc["phone"],
-                    "email": doc["email"]
-                } for doc in sample_doctors
-            ]
-            _collection.add(
-                ids=ids,
-                documents=documents,
-                metadatas=metadatas
-            )
-            logger.info("Doctor collection initialized with sample data")
-        else:
-            logger.info("Doctor collection already populated")
-    except Exception as e:
-        logger.error(f"Failed to initialize doctor DB: {e}")
-        raise
-
-def get_doctors_by_specialty_and_location(diagnosis: str, location: str, n_results: int = 3) -> list:
-    """Query doctors by diagnosis and location using similarity search."""
-    try:
-        query_text = f"{diagnosis} doctor in {location}"
-        results = _collection.query(
-            query_texts=[query_text],
-            n_results=n_results,
-            where={"location": location}  # Filter by exact location
-        )
-        doctors = [
-            {
-                "name": meta["name"],
-                "specialty": meta["specialty"],
-                "location": meta["location"],
-                "phone": meta["phone"],
-                "email": meta["email"]
-            }
-            for meta in results.get("metadatas", [[]])[0]
-        ]
-        logger.info(f"Found {len(doctors)} doctors for query: {query_text}")
-        return doctors
-    except Exception as e:
-        logger.error(f"Error querying doctors: {e}")
-        return []
-
-# Initialize on import
-init_doctor_db()
\ No newline at end of file
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.config import (
+    DOCTOR_COLLECTION_NAME, PROVIDER_IMPORT_BATCH_SIZE, DOCTOR_HNSW_PROFILE,
+    DOCTOR_SEARCH_CACHE_SIZE, DOCTOR_SEARCH_CACHE_TTL
+)
+from utils.logger import setup_logger
+from utils.ttl_cache import TTLCache
+from storage.chroma_client import get_client, get_or_create_collection
+from storage.embedder import get_embedding_function
+from storage.doctor_directory import (
+    DoctorDirectory, get_directory, invalidate_directory, directory_generation, normalize_text
+)
+
+logger = setup_logger("doctor_db_chroma")
+
+# ChromaDB collection, created (and seeded) on first use
+_collection = None
+_seeded = False
+_collection_lock = threading.Lock()
+
+def get_doctor_collection(seed: bool = True):
+    """
+    Return the doctor collection, creating it on first use.
+
+    With seed=True an empty collection is filled with the sample doctors
+    the first time it is requested; bulk imports pass seed=False.
+    """
+    global _collection, _seeded
+    if _collection is None or (seed and not _seeded):
+        with _collection_lock:
+            if _collection is None:
+                _collection = get_or_create_collection(
+                    DOCTOR_COLLECTION_NAME, get_embedding_function(), DOCTOR_HNSW_PROFILE
+                )
+            if seed and not _seeded:
+                _seed_sample_doctors(_collection)
+                _seeded = True
+    return _collection
+
+def _provider_document(provider: dict) -> str:
+    """Text that gets embedded for a provider."""
+    return f"{provider['specialty']} in {provider['location']}: {provider.get('description', '')}"
+
+def _provider_metadata(provider: dict) -> dict:
+    """Chroma metadata for a provider (Chroma rejects None values)."""
+    meta = {
+        "name": provider["name"],
+        "specialty": provider["specialty"],
+        "location": provider["location"],
+        "phone": provider.get("phone") or "",
+        "email": provider.get("email") or ""
+    }
+    for key in ("latitude", "longitude"):
+        value = provider.get(key)
+        if value not in (None, ""):
+            meta[key] = float(value)
+    return meta
+
+def init_doctor_db():
+    """Initialize the doctor collection with sample data."""
+    get_doctor_collection(seed=True)
+
+def _seed_sample_doctors(collection):
+    """Fill an empty doctor collection with sample data."""
+    try:
+        # Check if collection is empty
+        if collection.count() == 0:
+            sample_doctors = [
+                {
+                    "id": "doc1",
+                    "name": "Dr. Alice Smith",
+                    "specialty": "General Practitioner",
+                    "location": "New York",
+                    "phone": "555-0101",
+                    "email": "alice@example.com",
+                    "latitude": 40.7411,
+                    "longitude": -73.9897,
+                    "description": "General practitioner with 10 years of experience in primary care."
+                },
+                {
+                    "id": "doc2",
+                    "name": "Dr. Bob Jones",
+                    "specialty": "Pediatrics",
+                    "location": "New York",
+                    "phone": "555-0102",
+                    "email": "bob@example.com",
+                    "latitude": 40.6782,
+                    "longitude": -73.9442,
+                    "description": "Pediatrician specializing in child healthcare."
+                },
+                {
+                    "id": "doc3",
+                    "name": "Dr. Carol Lee",
+                    "specialty": "Cardiology",
+                    "location": "Los Angeles",
+                    "phone": "555-0103",
+                    "email": "carol@example.com",
+                    "latitude": 34.0522,
+                    "longitude": -118.2437,
+                    "description": "Cardiologist with expertise in heart conditions."
+                },
+                {
+                    "id": "doc4",
+                    "name": "Dr. David Kim",
+                    "specialty": "Dermatology",
+                    "location": "Los Angeles",
+                    "phone": "555-0104",
+                    "email": "david@example.com",
+                    "latitude": 34.0195,
+                    "longitude": -118.4912,
+                    "description": "Dermatologist focused on skin health."
+                },
+                {
+                    "id": "doc5",
+                    "name": "Dr. Emma Wilson",
+                    "specialty": "Orthopedics",
+                    "location": "Chicago",
+                    "phone": "555-0105",
+                    "email": "emma@example.com",
+                    "latitude": 41.8781,
+                    "longitude": -87.6298,
+                    "description": "Orthopedic surgeon specializing in joint replacements."
+                }
+            ]
+            # Prepare data for ChromaDB
+            ids = [doc["id"] for doc in sample_doctors]
+            documents = [_provider_document(doc) for doc in sample_doctors]
+            metadatas = [_provider_metadata(doc) for doc in sample_doctors]
+            collection.add(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas
+            )
+            logger.info("Doctor collection initialized with sample data")
+        else:
+            logger.info("Doctor collection already populated")
+    except Exception as e:
+        logger.error(f"Failed to initialize doctor DB: {e}")
+        raise
+
+def load_doctor_directory(batch_size: int = 5000) -> DoctorDirectory:
+    """Build the in-memory doctor directory from the Chroma collection."""
+    collection = get_doctor_collection()
+    providers, embeddings = [], []
+    offset = 0
+    while True:
+        batch = collection.get(
+            include=["metadatas", "embeddings"],
+            limit=batch_size,
+            offset=offset
+        )
+        ids = batch.get("ids") or []
+        if not ids:
+            break
+        batch_embeddings = batch.get("embeddings")
+        for i, (doc_id, meta) in enumerate(zip(ids, batch.get("metadatas") or [])):
+            providers.append({"id": doc_id, **(meta or {})})
+            if batch_embeddings is not None:
+                embeddings.append(batch_embeddings[i])
+        offset += len(ids)
+    return DoctorDirectory(
+        providers,
+        embeddings=embeddings if len(embeddings) == len(providers) else None,
+        embed_fn=get_embedding_function()
+    )
+
+_search_cache = TTLCache(DOCTOR_SEARCH_CACHE_SIZE, DOCTOR_SEARCH_CACHE_TTL)
+
+def search_cache_key(diagnosis: str, location: str, n_results: int) -> tuple:
+    """Cache key for a doctor search; changes whenever the directory is invalidated."""
+    return (directory_generation(), normalize_text(diagnosis), normalize_text(location), n_results)
+
+def get_doctors_by_specialty_and_location(diagnosis: str, location: str, n_results: int = 3) -> list:
+    """Find doctors for a diagnosis near a location, ranked by semantic match and distance."""
+    key = search_cache_key(diagnosis, location, n_results)
+    cached = _search_cache.get(key)
+    if cached is not None:
+        return [dict(doctor) for doctor in cached]
+    try:
+        directory = get_directory(load_doctor_directory)
+        doctors = [
+            {
+                "id": doc["id"],
+                "name": doc["name"],
+                "specialty": doc["specialty"],
+                "location": doc["location"],
+                "phone": doc.get("phone", ""),
+                "email": doc.get("email", ""),
+                "distance_km": doc.get("distance_km")
+            }
+            for doc in directory.search(diagnosis, location, n_results=n_results)
+        ]
+        logger.info(f"Found {len(doctors)} doctors for: {diagnosis} near {location}")
+        _search_cache.set(key, doctors)
+        return [dict(doctor) for doctor in doctors]
+    except Exception as e:
+        logger.error(f"Error querying doctors: {e}")
+        return []
+
+def _iter_provider_file(path: str):
+    """
+    Stream provider records from a CSV or JSONL file, one dict at a time.
+
+    A JSONL line that does not parse yields None, so it is counted as an
+    invalid record without aborting the import or shifting the checkpoint.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping malformed provider record on line {line_number}: {e}")
+                    yield None
+        else:
+            yield from csv.DictReader(f)
+
+def _provider_id(record: dict):
+    value = record.get("id") or record.get("provider_id")
+    return str(value).strip() if value not in (None, "") else None
+
+def _valid_coordinates(record: dict) -> bool:
+    """Latitude/longitude are optional, but must be in-range numbers when given."""
+    for key, limit in (("latitude", 90), ("longitude", 180)):
+        value = record.get(key)
+        if value in (None, ""):
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return False
+        if not -limit <= value <= limit:  # also rejects NaN
+            return False
+    return True
+
+def _valid_provider(record: dict) -> bool:
+    return (isinstance(record, dict) and bool(_provider_id(record)) and all(record.get(k) for k in ("name", "specialty", "location"))
+            and _valid_coordinates(record))
+
+def _load_checkpoint(checkpoint_path: str, source_path: str) -> dict:
+    """Load a checkpoint if it belongs to the same, unchanged source file."""
+    stat = os.stat(source_path)
+    fresh = {
+        "source": os.path.abspath(source_path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "records_done": 0,
+        "imported": 0,
+        "duplicates": 0,
+        "invalid": 0
+    }
+    if not os.path.exists(checkpoint_path):
+        return fresh
+    try:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if all(saved.get(k) == fresh[k] for k in ("source", "size", "mtime")):
+            logger.info(f"Resuming provider import after {saved['records_done']} records")
+            return saved
+        logger.warning("Provider file changed since last checkpoint, starting over")
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable checkpoint {checkpoint_path}: {e}")
+    return fresh
+
+def _save_checkpoint(checkpoint_path: str, state: dict):
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def import_providers(path: str, batch_size: int = PROVIDER_IMPORT_BATCH_SIZE,
+                     checkpoint_path: str = None, progress=None) -> dict:
+    """
+    Bulk import providers from a CSV/JSONL file into the doctor collection.
+
+    The file is streamed, providers are deduplicated by id (first record wins),
+    descriptions are embedded one batch at a time and each batch is upserted
+    while the next one is being embedded. After every upserted batch the
+    number of consumed records is checkpointed, so an interrupted import
+    resumes where it stopped.
+
+    Args:
+        path (str): CSV or JSONL file with id/provider_id, name, specialty,
+            location and optional phone, email, description, latitude, longitude.
+            Malformed JSONL lines and records missing a required field or
+            with unusable coordinates are skipped and counted as invalid.
+        batch_size (int): Records embedded and upserted per batch.
+        checkpoint_path (str): Defaults to "<path>.checkpoint.json".
+        progress (callable): Called with the stats dict after each batch.
+
+    Returns:
+        dict: Final import statistics.
+    """
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+    state = _load_checkpoint(checkpoint_path, path)
+    collection = get_doctor_collection(seed=False)
+    embed_fn = get_embedding_function()
+    batch_size = min(batch_size, get_client().get_max_batch_size())
+    started = time.time()
+    resumed_from = state["records_done"]
+    counts = {"duplicates": state["duplicates"], "invalid": state["invalid"]}
+    seen = set()
+
+    def submit(writer, records, records_done):
+        """Embed a batch here, upsert it on the writer thread."""
+        docs = [_provider_document(r) for r in records]
+        future = writer.submit(
+            collection.upsert,
+            ids=[r["id"] for r in records],
+            embeddings=embed_fn(docs),
+            documents=docs,
+            metadatas=[_provider_metadata(r) for r in records]
+        )
+        return future, len(records), records_done, dict(counts)
+
+    def commit(pending):
+        future, count, records_done, batch_counts = pending
+        future.result()
+        state.update(batch_counts)
+        state["imported"] += count
+        state["records_done"] = records_done
+        _save_checkpoint(checkpoint_path, state)
+        rate = (records_done - resumed_from) / max(time.time() - started, 1e-6)
+        logger.info(
+            f"Provider import: {records_done} records read, {state['imported']} imported, "
+            f"{state['duplicates']} duplicates, {state['invalid']} invalid ({rate:.0f} records/s)"
+        )
+        if progress:
+            progress(dict(state, records_per_second=rate))
+
+    batch, pending, records_read = [], None, 0
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        for record in _iter_provider_file(path):
+            records_read += 1
+            valid = _valid_provider(record)
+            provider_id = _provider_id(record) if valid else None
+            if records_read <= resumed_from:
+                # Already consumed: only rebuild the dedupe set from the records that were imported
+                if valid:
+                    seen.add(provider_id)
+                continue
+            if not valid:
+                counts["invalid"] += 1
+                continue
+            if provider_id in seen:
+                counts["duplicates"] += 1
+                continue
+            seen.add(provider_id)
+            record["id"] = provider_id
+            batch.append(record)
+
+            if len(batch) >= batch_size:
+                next_pending = submit(writer, batch, records_read)
+                if pending:
+                    commit(pending)
+                pending, batch = next_pending, []
+
+        if batch:
+            next_pending = submit(writer, batch, records_read)
+            if pending:
+                commit(pending)
+            pending = next_pending
+        if pending:
+            commit(pending)
+
+    state.update(counts)
+    state["records_done"] = max(records_read, state["records_done"])
+    _save_checkpoint(checkpoint_path, state)
+    invalidate_directory()
+    logger.info(f"Provider import finished in {time.time() - started:.1f}s: {state}")
+    return state
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import providers into the doctor directory")
+    parser.add_argument("path", help="CSV or JSONL provider file")
+    parser.add_argument("--batch-size", type=int, default=PROVIDER_IMPORT_BATCH_SIZE)
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <path>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or f"{args.path}.checkpoint.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    def report(stats):
+        print(
+            f"\r{stats['records_done']} read | {stats['imported']} imported | "
+            f"{stats['duplicates']} duplicates | {stats['invalid']} invalid | "
+            f"{stats['records_per_second']:.0f}/s",
+            end="",
+            flush=True
+        )
+
+    stats = import_providers(args.path, args.batch_size, checkpoint_path, progress=report)
+    print(f"\nDone: {stats['imported']} providers imported")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,454 @@
+import math
+import re
+import threading
+import numpy as np
+from utils.config import (
+    GEOHASH_PRECISION,
+    DOCTOR_SEARCH_RADIUS_KM,
+    DOCTOR_CANDIDATE_LIMIT,
+    DOCTOR_SEMANTIC_WEIGHT,
+    DOCTOR_DISTANCE_WEIGHT,
+    DOCTOR_SPECIALTY_BONUS,
+)
+from utils.logger import setup_logger
+from storage.metadata_db import ensure_schema
+
+logger = setup_logger("doctor_directory")
+
+EARTH_RADIUS_KM = 6371.0
+
+# Known places: normalized name -> (canonical city, latitude, longitude).
+# Boroughs and neighbourhoods resolve to their parent city for the location
+# index but keep their own coordinates for distance ranking.
+KNOWN_PLACES = {
+    "new york": ("new york", 40.7128, -74.0060),
+    "new york city": ("new york", 40.7128, -74.0060),
+    "nyc": ("new york", 40.7128, -74.0060),
+    "ny": ("new york", 40.7128, -74.0060),
+    "manhattan": ("new york", 40.7831, -73.9712),
+    "brooklyn": ("new york", 40.6782, -73.9442),
+    "queens": ("new york", 40.7282, -73.7949),
+    "bronx": ("new york", 40.8448, -73.8648),
+    "the bronx": ("new york", 40.8448, -73.8648),
+    "staten island": ("new york", 40.5795, -74.1502),
+    "jersey city": ("jersey city", 40.7178, -74.0431),
+    "newark": ("newark", 40.7357, -74.1724),
+    "los angeles": ("los angeles", 34.0522, -118.2437),
+    "la": ("los angeles", 34.0522, -118.2437),
+    "santa monica": ("los angeles", 34.0195, -118.4912),
+    "hollywood": ("los angeles", 34.0928, -118.3287),
+    "long beach": ("long beach", 33.7701, -118.1937),
+    "san francisco": ("san francisco", 37.7749, -122.4194),
+    "sf": ("san francisco", 37.7749, -122.4194),
+    "oakland": ("oakland", 37.8044, -122.2712),
+    "san jose": ("san jose", 37.3382, -121.8863),
+    "san diego": ("san diego", 32.7157, -117.1611),
+    "seattle": ("seattle", 47.6062, -122.3321),
+    "portland": ("portland", 45.5152, -122.6784),
+    "chicago": ("chicago", 41.8781, -87.6298),
+    "evanston": ("chicago", 42.0451, -87.6877),
+    "houston": ("houston", 29.7604, -95.3698),
+    "dallas": ("dallas", 32.7767, -96.7970),
+    "austin": ("austin", 30.2672, -97.7431),
+    "san antonio": ("san antonio", 29.4241, -98.4936),
+    "phoenix": ("phoenix", 33.4484, -112.0740),
+    "denver": ("denver", 39.7392, -104.9903),
+    "las vegas": ("las vegas", 36.1699, -115.1398),
+    "miami": ("miami", 25.7617, -80.1918),
+    "miami beach": ("miami", 25.7907, -80.1300),
+    "orlando": ("orlando", 28.5383, -81.3792),
+    "tampa": ("tampa", 27.9506, -82.4572),
+    "atlanta": ("atlanta", 33.7490, -84.3880),
+    "boston": ("boston", 42.3601, -71.0589),
+    "cambridge": ("boston", 42.3736, -71.1097),
+    "philadelphia": ("philadelphia", 39.9526, -75.1652),
+    "philly": ("philadelphia", 39.9526, -75.1652),
+    "washington": ("washington", 38.9072, -77.0369),
+    "washington dc": ("washington", 38.9072, -77.0369),
+    "dc": ("washington", 38.9072, -77.0369),
+    "baltimore": ("baltimore", 39.2904, -76.6122),
+    "detroit": ("detroit", 42.3314, -83.0458),
+    "minneapolis": ("minneapolis", 44.9778, -93.2650),
+    "st louis": ("st louis", 38.6270, -90.1994),
+    "nashville": ("nashville", 36.1627, -86.7816),
+    "charlotte": ("charlotte", 35.2271, -80.8431),
+    "pittsburgh": ("pittsburgh", 40.4406, -79.9959),
+    "cleveland": ("cleveland", 41.4993, -81.6944),
+    "salt lake city": ("salt lake city", 40.7608, -111.8910),
+    "mumbai": ("mumbai", 19.0760, 72.8777),
+    "bombay": ("mumbai", 19.0760, 72.8777),
+    "pune": ("pune", 18.5204, 73.8567),
+    "delhi": ("delhi", 28.7041, 77.1025),
+    "new delhi": ("delhi", 28.6139, 77.2090),
+    "bangalore": ("bangalore", 12.9716, 77.5946),
+    "bengaluru": ("bangalore", 12.9716, 77.5946),
+    "hyderabad": ("hyderabad", 17.3850, 78.4867),
+    "chennai": ("chennai", 13.0827, 80.2707),
+    "kolkata": ("kolkata", 22.5726, 88.3639),
+    "ahmedabad": ("ahmedabad", 23.0225, 72.5714),
+}
+
+# Specialty synonyms: normalized term -> canonical specialty
+SPECIALTY_SYNONYMS = {
+    "general practitioner": "general practitioner",
+    "general practice": "general practitioner",
+    "gp": "general practitioner",
+    "primary care": "general practitioner",
+    "family medicine": "general practitioner",
+    "family doctor": "general practitioner",
+    "general health": "general practitioner",
+    "internal medicine": "internal medicine",
+    "internist": "internal medicine",
+    "pediatrics": "pediatrics",
+    "pediatrician": "pediatrics",
+    "paediatrics": "pediatrics",
+    "child": "pediatrics",
+    "children": "pediatrics",
+    "cardiology": "cardiology",
+    "cardiologist": "cardiology",
+    "heart": "cardiology",
+    "chest pain": "cardiology",
+    "blood pressure": "cardiology",
+    "dermatology": "dermatology",
+    "dermatologist": "dermatology",
+    "skin": "dermatology",
+    "orthopedics": "orthopedics",
+    "orthopedic": "orthopedics",
+    "orthopaedics": "orthopedics",
+    "bone": "orthopedics",
+    "joint": "orthopedics",
+    "sports medicine": "sports medicine",
+    "sports injury": "sports medicine",
+    "nutrition specialist": "nutrition specialist",
+    "nutrition": "nutrition specialist",
+    "nutritionist": "nutrition specialist",
+    "dietitian": "nutrition specialist",
+    "diet": "nutrition specialist",
+    "weight loss": "nutrition specialist",
+    "health coach": "health coach",
+    "wellness": "health coach",
+    "endocrinology": "endocrinology",
+    "endocrinologist": "endocrinology",
+    "diabetes": "endocrinology",
+    "thyroid": "endocrinology",
+    "pulmonology": "pulmonology",
+    "pulmonologist": "pulmonology",
+    "lung": "pulmonology",
+    "breathing": "pulmonology",
+    "gastroenterology": "gastroenterology",
+    "gastroenterologist": "gastroenterology",
+    "stomach": "gastroenterology",
+    "digestive": "gastroenterology",
+    "neurology": "neurology",
+    "neurologist": "neurology",
+    "headache": "neurology",
+    "migraine": "neurology",
+    "psychiatry": "psychiatry",
+    "psychiatrist": "psychiatry",
+    "mental health": "psychiatry",
+    "obstetrics": "obstetrics and gynecology",
+    "gynecology": "obstetrics and gynecology",
+    "gynecologist": "obstetrics and gynecology",
+    "pregnancy": "obstetrics and gynecology",
+    "prenatal": "obstetrics and gynecology",
+}
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    if not text:
+        return ""
+    text = re.sub(r"[^\w\s]", " ", str(text).lower())
+    return " ".join(text.split())
+
+
+def resolve_place(location: str):
+    """
+    Resolve free-text location to (city_key, lat, lon).
+
+    Tries the full string first, then each comma-separated part and finally
+    the longest known place mentioned anywhere in the text, so "Brooklyn, NY"
+    and "downtown new york" both resolve. Returns (city_key, None, None) for
+    unknown places so exact-string matching still works.
+    """
+    normalized = normalize_text(location)
+    if not normalized:
+        return None, None, None
+    if normalized in KNOWN_PLACES:
+        return KNOWN_PLACES[normalized]
+    for part in str(location).split(","):
+        part = normalize_text(part)
+        if part in KNOWN_PLACES:
+            return KNOWN_PLACES[part]
+    padded = f" {normalized} "
+    best = None
+    for name, place in KNOWN_PLACES.items():
+        if len(name) > 2 and f" {name} " in padded and (best is None or len(name) > len(best)):
+            best = name
+    if best:
+        return KNOWN_PLACES[best]
+    return normalized, None, None
+
+
+def resolve_specialties(text: str) -> set:
+    """Map free text (diagnosis, condition or specialty) to canonical specialties."""
+    padded = f" {normalize_text(text)} "
+    return {
+        canonical for term, canonical in SPECIALTY_SYNONYMS.items()
+        if f" {term} " in padded
+    }
+
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a base32 geohash."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int = GEOHASH_PRECISION):
+    """Return (lat_degrees, lon_degrees) covered by one geohash cell."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Vectorized great-circle distance from one point to arrays of points."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class DoctorDirectory:
+    """
+    In-memory doctor search engine.
+
+    Providers are indexed three ways: an inverted index on canonical
+    specialty, an inverted index on normalized city, and a geohash bucket
+    index over coordinates. A search gathers a bounded candidate set from
+    the indexes and only scores those candidates, so query cost depends on
+    how many providers are near the user rather than on directory size.
+    """
+
+    def __init__(self, providers: list, embeddings=None, embed_fn=None, precision: int = GEOHASH_PRECISION):
+        self.providers = providers
+        self.embed_fn = embed_fn
+        self.precision = precision
+        self.cell_lat, self.cell_lon = geohash_cell_size(precision)
+
+        self.specialty_index = {}
+        self.location_index = {}
+        self.geo_index = {}
+
+        n = len(providers)
+        self.lats = np.full(n, np.nan)
+        self.lons = np.full(n, np.nan)
+        self.specialty_keys = []
+
+        # Directories repeat the same few specialty and city strings many times
+        specialty_memo, place_memo = {}, {}
+        for i, provider in enumerate(providers):
+            specialty = provider.get("specialty", "")
+            if specialty not in specialty_memo:
+                specialty_memo[specialty] = frozenset(resolve_specialties(specialty) | {normalize_text(specialty)})
+            specialties = specialty_memo[specialty]
+            self.specialty_keys.append(specialties)
+            for key in specialties:
+                self.specialty_index.setdefault(key, set()).add(i)
+
+            location = provider.get("location", "")
+            if location not in place_memo:
+                place_memo[location] = resolve_place(location)
+            city, lat, lon = place_memo[location]
+            if provider.get("latitude") is not None and provider.get("longitude") is not None:
+                lat, lon = float(provider["latitude"]), float(provider["longitude"])
+            if city:
+                self.location_index.setdefault(city, set()).add(i)
+            if lat is not None and lon is not None:
+                self.lats[i], self.lons[i] = lat, lon
+                self.geo_index.setdefault(geohash_encode(lat, lon, precision), []).append(i)
+
+        self.embeddings = None
+        if embeddings is not None and len(embeddings) == n and n > 0:
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self.embeddings = matrix / np.maximum(norms, 1e-12)
+
+        logger.info(
+            f"Doctor directory built: {n} providers, {len(self.specialty_index)} specialties, "
+            f"{len(self.location_index)} locations, {len(self.geo_index)} geo cells"
+        )
+
+    def __len__(self):
+        return len(self.providers)
+
+    def _nearby(self, lat: float, lon: float, radius_km: float, limit: int, keep=None) -> list:
+        """
+        Collect provider ids ring by ring around a point until limit or radius is reached.
+
+        When keep is given only those ids are collected and counted toward
+        the limit, so a sparse specialty still reaches past denser ones.
+        """
+        km_per_lat = 111.0
+        km_per_lon = max(111.0 * math.cos(math.radians(lat)), 1.0)
+        max_rings = int(max(radius_km / (self.cell_lat * km_per_lat),
+                            radius_km / (self.cell_lon * km_per_lon))) + 1
+
+        found = []
+        seen_cells = set()
+        for ring in range(max_rings + 1):
+            for di in range(-ring, ring + 1):
+                for dj in range(-ring, ring + 1):
+                    if max(abs(di), abs(dj)) != ring:
+                        continue
+                    cell_lat = max(min(lat + di * self.cell_lat, 89.999), -89.999)
+                    cell_lon = (lon + dj * self.cell_lon + 180.0) % 360.0 - 180.0
+                    cell = geohash_encode(cell_lat, cell_lon, self.precision)
+                    if cell in seen_cells:
+                        continue
+                    seen_cells.add(cell)
+                    bucket = self.geo_index.get(cell, ())
+                    found.extend(bucket if keep is None else (i for i in bucket if i in keep))
+            if len(found) >= limit:
+                break
+        return found
+
+    def _semantic_scores(self, query: str, candidates: np.ndarray) -> np.ndarray:
+        if self.embeddings is None or self.embed_fn is None or not query:
+            return np.zeros(len(candidates), dtype=np.float32)
+        try:
+            vector = np.asarray(self.embed_fn([query])[0], dtype=np.float32)
+            vector /= max(np.linalg.norm(vector), 1e-12)
+            return self.embeddings[candidates] @ vector
+        except Exception as e:
+            logger.error(f"Query embedding failed, ranking without semantics: {e}")
+            return np.zeros(len(candidates), dtype=np.float32)
+
+    def search(self, diagnosis: str, location: str, n_results: int = 3,
+               radius_km: float = DOCTOR_SEARCH_RADIUS_KM) -> list:
+        """
+        Find doctors for a diagnosis near a location.
+
+        Candidates come from the geo index (or the city index when the
+        location has no coordinates), restricted to matching specialties
+        before the candidate limit applies when the diagnosis maps to any.
+        Without a usable location they come from the specialty index, with
+        general practitioners as the fallback. They are ranked by a blend of
+        embedding similarity, distance decay and a bonus for an exact
+        specialty match.
+        """
+        if not self.providers:
+            return []
+
+        wanted = resolve_specialties(diagnosis)
+        specialty_hits = set()
+        for key in wanted:
+            specialty_hits |= self.specialty_index.get(key, set())
+
+        city, lat, lon = resolve_place(location)
+        candidates = []
+        if lat is not None:
+            if specialty_hits:
+                candidates = self._nearby(lat, lon, radius_km, DOCTOR_CANDIDATE_LIMIT, keep=specialty_hits)
+            if not candidates:
+                candidates = self._nearby(lat, lon, radius_km, DOCTOR_CANDIDATE_LIMIT)
+        elif city:
+            in_city = self.location_index.get(city, set())
+            candidates = list(in_city & specialty_hits) or list(in_city)
+
+        if not candidates:
+            candidates = specialty_hits or self.specialty_index.get("general practitioner", set())
+        if not candidates:
+            candidates = range(min(len(self.providers), DOCTOR_CANDIDATE_LIMIT))
+
+        candidates = np.fromiter(set(candidates), dtype=np.int64)
+        scores = DOCTOR_SEMANTIC_WEIGHT * self._semantic_scores(f"{diagnosis} doctor", candidates)
+
+        distances = np.full(len(candidates), np.nan)
+        if lat is not None:
+            distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+            proximity = np.where(np.isnan(distances), 0.0, np.exp(-np.nan_to_num(distances) / radius_km))
+            scores = scores + DOCTOR_DISTANCE_WEIGHT * proximity
+        if wanted:
+            bonus = np.fromiter((bool(self.specialty_keys[i] & wanted) for i in candidates),
+                                dtype=np.float32, count=len(candidates))
+            scores = scores + DOCTOR_SPECIALTY_BONUS * bonus
+
+        k = min(n_results, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for idx in top:
+            provider = dict(self.providers[candidates[idx]])
+            provider["score"] = round(float(scores[idx]), 4)
+            if not np.isnan(distances[idx]):
+                provider["distance_km"] = round(float(distances[idx]), 1)
+            results.append(provider)
+        return results
+
+
+# The generation is persisted so an import run in another process (the
+# provider import CLI) invalidates the directory of a running app too.
+GENERATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS doctor_directory_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    generation INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO doctor_directory_generation (id, generation) VALUES (0, 0);
+"""
+
+_directory = None
+_directory_built_at = None
+_directory_lock = threading.Lock()
+
+
+def _db():
+    return ensure_schema("doctor_directory", GENERATION_SCHEMA)
+
+
+def get_directory(loader) -> DoctorDirectory:
+    """Return the process-wide directory, (re)building it with loader() when the generation changed."""
+    global _directory, _directory_built_at
+    generation = directory_generation()
+    if _directory is None or _directory_built_at != generation:
+        with _directory_lock:
+            if _directory is None or _directory_built_at != generation:
+                _directory = loader()
+                _directory_built_at = generation
+    return _directory
+
+
+def directory_generation() -> int:
+    """Persisted counter bumped on every invalidation; part of search cache keys."""
+    return _db().execute("SELECT generation FROM doctor_directory_generation WHERE id = 0").fetchone()["generation"]
+
+
+def invalidate_directory():
+    """Bump the generation so every process rebuilds its directory on the next search."""
+    global _directory
+    _db().execute("UPDATE doctor_directory_generation SET generation = generation + 1 WHERE id = 0")
+    with _directory_lock:
+        _directory = None
+    logger.info("Doctor directory invalidated")
@@ -1,28 +1,75 @@
-from sentence_transformers import SentenceTransformer
-from utils.config import SENTENCE_TRANSFORMER_MODEL, DEVICE
-from utils.logger import setup_logger
-
-logger = setup_logger("embedder")
-
-def load_embedder():
-    """Load SentenceTransformer model."""
-    try:
-        model = SentenceTransformer(SENTENCE_TRANSFORMER_MODEL, device=DEVICE)
-        logger.info(f"SentenceTransformer {SENTENCE_TRANSFORMER_MODEL} loaded")
-        return model
-    except Exception as e:
-        logger.error(f"Embedder loading error: {str(e)}")
-        return None
-
-def embed_text(text):
-    """Generate embeddings for text."""
-    model = load_embedder()
-    if not model:
-        return []
-    try:
-        embedding = model.encode([text], convert_to_numpy=True)[0].tolist()
-        logger.info(f"Embedded text: {text[:100]}...")
-        return embedding
-    except Exception as e:
-        logger.error(f"Embedding error: {str(e)}")
-        return []
\ No newline at end of file
+import threading
+from utils.config import SENTENCE_TRANSFORMER_MODEL, DEVICE, EMBEDDING_BACKEND
+from utils.logger import setup_logger
+
+logger = setup_logger("embedder")
+
+# Models are loaded on first use and shared by every caller in the process
+_model = None
+_embedding_function = None
+_onnx_enabled = None
+_load_lock = threading.Lock()
+
+def load_embedder():
+    """Load SentenceTransformer model (once per process)."""
+    global _model
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(SENTENCE_TRANSFORMER_MODEL, device=DEVICE)
+                    logger.info(f"SentenceTransformer {SENTENCE_TRANSFORMER_MODEL} loaded")
+                except Exception as e:
+                    logger.error(f"Embedder loading error: {str(e)}")
+                    return None
+    return _model
+
+def use_onnx() -> bool:
+    """True when the ONNX backend is selected and its exported model exists."""
+    global _onnx_enabled
+    if _onnx_enabled is None:
+        _onnx_enabled = False
+        if EMBEDDING_BACKEND == "onnx":
+            from storage.onnx_embedder import onnx_model_available
+            _onnx_enabled = onnx_model_available()
+            if not _onnx_enabled:
+                logger.warning("EMBEDDING_BACKEND=onnx but no exported model found, using PyTorch. "
+                               "Run: python -m storage.onnx_embedder")
+    return _onnx_enabled
+
+def get_embedding_function():
+    """Return the shared Chroma embedding function, creating it on first use."""
+    global _embedding_function
+    if _embedding_function is None:
+        with _load_lock:
+            if _embedding_function is None:
+                if use_onnx():
+                    from storage.onnx_embedder import OnnxEmbeddingFunction
+                    _embedding_function = OnnxEmbeddingFunction()
+                else:
+                    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+                    _embedding_function = SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
+                logger.info(f"Chroma embedding function created ({type(_embedding_function).__name__})")
+    return _embedding_function
+
+def embed_text(text):
+    """Generate embeddings for text."""
+    if use_onnx():
+        try:
+            from storage.onnx_embedder import get_onnx_model
+            embedding = get_onnx_model().encode([text])[0].tolist()
+            logger.info(f"Embedded text (onnx): {text[:100]}...")
+            return embedding
+        except Exception as e:
+            logger.error(f"ONNX embedding error, falling back to PyTorch: {str(e)}")
+    model = load_embedder()
+    if not model:
+        return []
+    try:
+        embedding = model.encode([text], convert_to_numpy=True)[0].tolist()
+        logger.info(f"Embedded text: {text[:100]}...")
+        return embedding
+    except Exception as e:
+        logger.error(f"Embedding error: {str(e)}")
+        return []
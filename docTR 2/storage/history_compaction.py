@@ -0,0 +1,299 @@
+"""
+Health history retention and compaction.
+
+Raw entries older than HISTORY_RAW_RETENTION_DAYS are merged into one
+rollup record per user and month. If a user is still above
+HISTORY_MAX_RECORDS_PER_USER, monthly rollups of past years are merged
+into yearly ones, then the oldest raw entries are rolled up regardless of
+age. Rollups keep per-report-type counts, the latest entry and running
+statistics (first/last/min/max/mean) of every "Name: number" line, so
+trends such as BMI or calorie targets survive compaction. Rolled-up raw
+entries are archived as gzipped JSON lines (or deleted when
+HISTORY_ARCHIVE_DIR is empty), and collections that lost a large share of
+their records get their vector index rebuilt. Blobs of deleted entries are
+garbage collected by the full run, or checked one by one with --user.
+
+Usage (e.g. nightly from cron):
+    python -m storage.history_compaction [--user USER] [--dry-run] [--no-rebuild]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from utils.config import (
+    HISTORY_RAW_RETENTION_DAYS, HISTORY_MAX_RECORDS_PER_USER, HISTORY_ARCHIVE_DIR,
+    HISTORY_REBUILD_THRESHOLD, HISTORY_FANOUT_WORKERS, HISTORY_BLOB_STORE
+)
+from utils.logger import setup_logger
+from utils.data_utils import extract_metrics
+from storage.chroma_db import (
+    get_history_collection, list_history_users, set_record_count, rebuild_history_collection,
+    purge_retired_collections, resolve_document, scan_history
+)
+from storage import history_dedupe
+from storage.blob_store import get_blob_store
+
+logger = setup_logger("history_compaction")
+
+ROLLUP_TYPE = "History Rollup"
+SNIPPET_CHARS = 300
+
+def _timestamp(metadata: dict) -> float:
+    try:
+        return float(metadata.get("timestamp", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+def _period(ts: float, granularity: str) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m" if granularity == "month" else "%Y")
+
+def summarize_record(document: str, metadata: dict) -> dict:
+    """Rollup summary of a single raw history entry."""
+    ts = _timestamp(metadata)
+    metrics = {}
+    for name, v in extract_metrics(document):
+        metrics.setdefault(name, {
+            "n": 1, "sum": v, "min": v, "max": v, "first": v, "last": v, "first_ts": ts, "last_ts": ts
+        })
+    return {
+        "records": 1,
+        "start": ts,
+        "end": ts,
+        "types": {
+            metadata.get("report_type", "unknown"): {
+                "count": 1,
+                "latest": (document or "")[:SNIPPET_CHARS],
+                "latest_ts": ts,
+                "metrics": metrics
+            }
+        }
+    }
+
+def _merge_metric(a: dict, b: dict) -> dict:
+    first = a if a["first_ts"] <= b["first_ts"] else b
+    last = b if b["last_ts"] >= a["last_ts"] else a
+    return {
+        "n": a["n"] + b["n"],
+        "sum": a["sum"] + b["sum"],
+        "min": min(a["min"], b["min"]),
+        "max": max(a["max"], b["max"]),
+        "first": first["first"],
+        "first_ts": first["first_ts"],
+        "last": last["last"],
+        "last_ts": last["last_ts"]
+    }
+
+def merge_summaries(a: dict, b: dict) -> dict:
+    """Combine two rollup summaries; the result is the same whatever the merge order."""
+    if a is None:
+        return b
+    types = dict(a["types"])
+    for report_type, t in b["types"].items():
+        if report_type not in types:
+            types[report_type] = t
+            continue
+        cur = types[report_type]
+        latest = t if t["latest_ts"] >= cur["latest_ts"] else cur
+        metrics = dict(cur["metrics"])
+        for name, m in t["metrics"].items():
+            metrics[name] = _merge_metric(metrics[name], m) if name in metrics else m
+        types[report_type] = {
+            "count": cur["count"] + t["count"],
+            "latest": latest["latest"],
+            "latest_ts": latest["latest_ts"],
+            "metrics": metrics
+        }
+    return {
+        "records": a["records"] + b["records"],
+        "start": min(a["start"], b["start"]),
+        "end": max(a["end"], b["end"]),
+        "types": types
+    }
+
+def _fmt(v: float) -> str:
+    return f"{v:.0f}" if float(v).is_integer() else f"{v:.1f}"
+
+def rollup_text(period: str, summary: dict) -> str:
+    """Readable rollup document; this is what gets embedded and shown as history context."""
+    start = datetime.fromtimestamp(summary["start"]).strftime("%Y-%m-%d")
+    end = datetime.fromtimestamp(summary["end"]).strftime("%Y-%m-%d")
+    lines = [f"History rollup {period} ({summary['records']} records, {start} to {end})"]
+    for report_type, t in sorted(summary["types"].items()):
+        lines.append(f"{report_type}: {t['count']} records")
+        for name, m in sorted(t["metrics"].items()):
+            lines.append(
+                f"  {name}: first {_fmt(m['first'])}, last {_fmt(m['last'])}, "
+                f"avg {_fmt(m['sum'] / m['n'])}, range {_fmt(m['min'])}-{_fmt(m['max'])}"
+            )
+        lines.append(f"  Latest: {t['latest']}")
+    return "\n".join(lines)
+
+def _archive(user_id: str, records: list):
+    if not HISTORY_ARCHIVE_DIR or not records:
+        return
+    user_dir = os.path.join(HISTORY_ARCHIVE_DIR, hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:16])
+    os.makedirs(user_dir, exist_ok=True)
+    path = os.path.join(user_dir, f"{time.strftime('%Y%m%d%H%M%S')}.jsonl.gz")
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for doc_id, document, metadata in records:
+            f.write(json.dumps({"id": doc_id, "document": document, "metadata": metadata}) + "\n")
+
+def release_blobs(keys: set) -> int:
+    """Delete the given document blobs unless another history record still references them."""
+    if not keys:
+        return 0
+    # Blobs are content-addressed, so identical text saved by another user shares the key
+    live = {r["metadata"]["blob"] for r in scan_history(include=["metadatas"], where={"blob": {"$in": sorted(keys)}})}
+    removed = get_blob_store().remove(keys - live)
+    logger.info(f"Released {removed} of {len(keys)} document blobs")
+    return removed
+
+def compact_user(user_id: str, now: float = None, dry_run: bool = False, gc_blobs: bool = False) -> dict:
+    """
+    Apply the retention policy to one user's history.
+
+    Blobs of rolled-up entries are left to the collection-wide GC in
+    compact_all unless gc_blobs is set.
+
+    Returns:
+        dict: before/after record counts, raw entries rolled up and rollups written
+    """
+    now = now or time.time()
+    collection = get_history_collection(user_id)
+    res = collection.get(where={"user_id": user_id}, include=["documents", "metadatas"])
+    raw, rollups = [], {}
+    for doc_id, document, metadata in zip(res["ids"], res["documents"], res["metadatas"]):
+        document = resolve_document(document, metadata)
+        if metadata.get("report_type") == ROLLUP_TYPE:
+            key = (metadata.get("granularity", "month"), metadata.get("period"))
+            rollups[key] = {"id": doc_id, "summary": json.loads(metadata["rollup"]), "changed": False}
+        else:
+            raw.append((_timestamp(metadata), doc_id, document, metadata))
+    raw.sort(key=lambda r: r[0])
+    before = len(res["ids"])
+
+    consumed = []       # raw (id, document, metadata) folded into rollups
+    dropped_rollups = []
+    def fold(key, summary):
+        entry = rollups.setdefault(key, {"id": None, "summary": None, "changed": False})
+        entry["summary"] = merge_summaries(entry["summary"], summary)
+        entry["changed"] = True
+
+    def count():
+        return len(raw) - len(consumed) + len(rollups)
+
+    # 1. raw entries past retention -> monthly rollups
+    cutoff = now - HISTORY_RAW_RETENTION_DAYS * 86400
+    position = 0
+    while position < len(raw) and raw[position][0] < cutoff:
+        ts, doc_id, document, metadata = raw[position]
+        fold(("month", _period(ts, "month")), summarize_record(document, metadata))
+        consumed.append((doc_id, document, metadata))
+        position += 1
+
+    # 2. over the cap: months of past years -> yearly rollups
+    if count() > HISTORY_MAX_RECORDS_PER_USER:
+        this_year = _period(now, "year")
+        for key in sorted(k for k in rollups if k[0] == "month" and k[1][:4] < this_year):
+            entry = rollups.pop(key)
+            if entry["id"]:
+                dropped_rollups.append(entry["id"])
+            fold(("year", key[1][:4]), entry["summary"])
+
+    # 3. still over: oldest remaining raw entries, whatever their age
+    while count() > HISTORY_MAX_RECORDS_PER_USER and position < len(raw):
+        ts, doc_id, document, metadata = raw[position]
+        fold(("month", _period(ts, "month")), summarize_record(document, metadata))
+        consumed.append((doc_id, document, metadata))
+        position += 1
+
+    changed = {key: e for key, e in rollups.items() if e["changed"]}
+    stats = {"before": before, "after": count(), "rolled_up": len(consumed), "rollups": len(changed)}
+    if dry_run or not (consumed or dropped_rollups):
+        return stats
+
+    ids, documents, metadatas = [], [], []
+    for (granularity, period), entry in changed.items():
+        summary = entry["summary"]
+        ids.append(entry["id"] or f"{user_id}_rollup_{granularity}_{period}")
+        documents.append(rollup_text(period, summary))
+        metadatas.append({
+            "user_id": user_id,
+            "report_type": ROLLUP_TYPE,
+            "timestamp": int(summary["end"]),
+            "granularity": granularity,
+            "period": period,
+            "record_count": summary["records"],
+            "rollup": json.dumps(summary)
+        })
+    # Write rollups before removing anything so a crash never loses data
+    collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+    _archive(user_id, consumed)
+    deleted_ids = [doc_id for doc_id, _, _ in consumed] + dropped_rollups
+    collection.delete(ids=deleted_ids)
+    history_dedupe.forget(ids=deleted_ids)
+    set_record_count(user_id, stats["after"])
+    stats["deleted"] = len(consumed) + len(dropped_rollups)
+    if gc_blobs and HISTORY_BLOB_STORE:
+        release_blobs({metadata["blob"] for _, _, metadata in consumed if metadata.get("blob")})
+    logger.info(f"Compacted history of {user_id}: {stats}")
+    return stats
+
+def compact_all(dry_run: bool = False, rebuild: bool = True) -> dict:
+    """
+    Compact every user, one worker per collection, and rebuild the index of
+    collections where at least HISTORY_REBUILD_THRESHOLD of records were deleted.
+    """
+    by_collection = {}
+    for user_id, name in list_history_users():
+        by_collection.setdefault(name, []).append(user_id)
+
+    def run(item):
+        name, users = item
+        totals = {"users": 0, "before": 0, "after": 0, "rolled_up": 0, "deleted": 0}
+        for user_id in users:
+            try:
+                stats = compact_user(user_id, dry_run=dry_run)
+            except Exception as e:
+                logger.error(f"Compaction failed for {user_id}: {e}")
+                continue
+            totals["users"] += 1
+            for field in ("before", "after", "rolled_up", "deleted"):
+                totals[field] += stats.get(field, 0)
+        if (rebuild and not dry_run and totals["before"]
+                and totals["deleted"] / totals["before"] >= HISTORY_REBUILD_THRESHOLD):
+            rebuild_history_collection(name)
+            totals["rebuilt"] = True
+        return name, totals
+
+    if not by_collection:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(HISTORY_FANOUT_WORKERS, len(by_collection))) as pool:
+        results = dict(pool.map(run, by_collection.items()))
+    if not dry_run:
+        purge_retired_collections()
+    if HISTORY_BLOB_STORE and not dry_run:
+        live = {r["metadata"]["blob"] for r in scan_history(include=["metadatas"]) if (r["metadata"] or {}).get("blob")}
+        get_blob_store().garbage_collect(live)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Roll up and compact health history")
+    parser.add_argument("--user", help="Only compact this user")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--no-rebuild", action="store_true", help="Skip vector index rebuilds")
+    args = parser.parse_args()
+
+    if args.user:
+        print(compact_user(args.user, dry_run=args.dry_run, gc_blobs=True))
+        return
+    results = compact_all(dry_run=args.dry_run, rebuild=not args.no_rebuild)
+    for name, totals in sorted(results.items()):
+        print(f"{name:<36} {totals}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import hashlib
+import re
+import time
+from utils.config import HISTORY_DEDUPE_MAX_DISTANCE
+from utils.logger import setup_logger
+from storage.metadata_db import ensure_schema
+
+logger = setup_logger("history_dedupe")
+
+# 64-bit SimHash per stored history entry, split into four 16-bit bands.
+# Two signatures within Hamming distance 3 share at least one band exactly,
+# so candidates come from an indexed band lookup instead of a scan.
+BANDS = 4
+BAND_BITS = 16
+MAX_DISTANCE = BANDS - 1
+
+if not 0 <= HISTORY_DEDUPE_MAX_DISTANCE <= MAX_DISTANCE:
+    raise ValueError(f"HISTORY_DEDUPE_MAX_DISTANCE must be between 0 and {MAX_DISTANCE}")
+
+SIGNATURE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_signatures (
+    doc_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    report_type TEXT NOT NULL,
+    simhash INTEGER NOT NULL,
+    band0 INTEGER NOT NULL,
+    band1 INTEGER NOT NULL,
+    band2 INTEGER NOT NULL,
+    band3 INTEGER NOT NULL,
+    created_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_signatures_band0 ON history_signatures(user_id, band0);
+CREATE INDEX IF NOT EXISTS idx_signatures_band1 ON history_signatures(user_id, band1);
+CREATE INDEX IF NOT EXISTS idx_signatures_band2 ON history_signatures(user_id, band2);
+CREATE INDEX IF NOT EXISTS idx_signatures_band3 ON history_signatures(user_id, band3);
+"""
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+def _db():
+    return ensure_schema("history_signatures", SIGNATURE_SCHEMA)
+
+def simhash(text: str, shingle: int = 3) -> int:
+    """64-bit SimHash of the word shingles of a text (case and whitespace insensitive)."""
+    tokens = TOKEN_PATTERN.findall((text or "").lower())
+    if len(tokens) >= shingle:
+        features = [" ".join(tokens[i:i + shingle]) for i in range(len(tokens) - shingle + 1)]
+    else:
+        features = tokens or [""]
+    weights = [0] * 64
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def same_values(text: str, other: str) -> bool:
+    """
+    True when two texts contain the same numbers in the same order.
+
+    SimHash barely moves when one lab value or calorie figure changes, so
+    a near-duplicate only counts as a repeat when its numbers match too.
+    """
+    return NUMBER_PATTERN.findall(text or "") == NUMBER_PATTERN.findall(other or "")
+
+def _bands(signature: int) -> list:
+    mask = (1 << BAND_BITS) - 1
+    return [signature >> (i * BAND_BITS) & mask for i in range(BANDS)]
+
+def _to_sqlite(signature: int) -> int:
+    # SQLite integers are signed 64-bit
+    return signature - (1 << 64) if signature >= 1 << 63 else signature
+
+def find_near_duplicates(user_id: str, report_type: str, signature: int,
+                         max_distance: int = HISTORY_DEDUPE_MAX_DISTANCE) -> list:
+    """
+    Ids of already stored entries of the same user and report type whose
+    SimHash is within max_distance bits, closest first.
+
+    Raises:
+        ValueError: If max_distance exceeds MAX_DISTANCE, beyond which the
+            band lookup can miss matches
+    """
+    if max_distance > MAX_DISTANCE:
+        raise ValueError(f"max_distance must be at most {MAX_DISTANCE}, got {max_distance}")
+    bands = _bands(signature)
+    rows = _db().execute(
+        "SELECT doc_id, simhash FROM history_signatures WHERE user_id = ? AND report_type = ? "
+        "AND (band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?)",
+        (user_id, report_type, *bands)
+    ).fetchall()
+    matches = []
+    for row in rows:
+        distance = bin((row["simhash"] & ((1 << 64) - 1)) ^ signature).count("1")
+        if distance <= max_distance:
+            matches.append((distance, row["doc_id"]))
+    return [doc_id for _, doc_id in sorted(matches)]
+
+def remember(user_id: str, report_type: str, doc_id: str, signature: int):
+    """Index the signature of a newly stored entry."""
+    _db().execute(
+        "INSERT OR REPLACE INTO history_signatures "
+        "(doc_id, user_id, report_type, simhash, band0, band1, band2, band3, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (doc_id, user_id, report_type, _to_sqlite(signature), *_bands(signature), int(time.time()))
+    )
+
+def forget(ids: list = None, user_id: str = None):
+    """Drop signatures of deleted entries, by id or for a whole user."""
+    db = _db()
+    if user_id is not None:
+        db.execute("DELETE FROM history_signatures WHERE user_id = ?", (user_id,))
+    if ids:
+        db.executemany("DELETE FROM history_signatures WHERE doc_id = ?", [(i,) for i in ids])
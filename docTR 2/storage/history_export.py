@@ -0,0 +1,178 @@
+"""
+Export health history to partitioned Parquet for analytics.
+
+Streams every history collection in bounded batches into a Hive-style
+dataset (date=YYYY-MM-DD/report_type=...), so cohort queries can run on
+columnar files (pandas, DuckDB, Spark) instead of the serving store.
+Exports are incremental: a watermark file in the output directory records
+the newest timestamp already exported, and the next run only appends newer
+records. A dataset is written either with or without embeddings; the
+choice is kept with the watermark and a run with the other one is refused,
+so use a separate output directory for each. Needs pyarrow.
+
+Usage:
+    python -m storage.history_export [--output-dir DIR] [--embeddings] [--full]
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from utils.config import HISTORY_EXPORT_DIR, HISTORY_EXPORT_BATCH_SIZE
+from utils.logger import setup_logger
+from storage.chroma_db import scan_history
+
+logger = setup_logger("history_export")
+
+WATERMARK_FILE = "_watermark.json"
+BASE_FIELDS = ("user_id", "report_type", "timestamp")
+
+def _schema(include_embeddings: bool):
+    import pyarrow as pa
+    fields = [
+        ("id", pa.string()),
+        ("user_id", pa.string()),
+        ("report_type", pa.string()),
+        ("timestamp", pa.int64()),
+        ("date", pa.string()),
+        ("document", pa.string()),
+        ("metadata", pa.string())  # remaining metadata as JSON
+    ]
+    if include_embeddings:
+        fields.append(("embedding", pa.list_(pa.float32())))
+    return pa.schema(fields)
+
+def load_watermark(output_dir: str) -> dict:
+    try:
+        with open(os.path.join(output_dir, WATERMARK_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"timestamp": None, "ids": []}
+
+def _save_watermark(output_dir: str, watermark: dict):
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(watermark, f)
+    os.replace(path + ".tmp", path)
+
+def _timestamp(metadata: dict) -> int:
+    try:
+        return int(float(metadata.get("timestamp", 0)))
+    except (TypeError, ValueError):
+        return 0
+
+def _record_batches(schema, since, seen_ids: set, include_embeddings: bool, batch_size: int, state: dict):
+    """Yield RecordBatches of at most batch_size rows newer than the watermark."""
+    import pyarrow as pa
+
+    include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+    columns = {name: [] for name in schema.names}
+
+    def flush():
+        batch = pa.RecordBatch.from_pydict(columns, schema=schema)
+        for values in columns.values():
+            values.clear()
+        return batch
+
+    where = {"timestamp": {"$gte": since}} if since is not None else None
+    for record in scan_history(include=include, batch_size=batch_size, where=where):
+        metadata = record["metadata"] or {}
+        ts = _timestamp(metadata)
+        # Same-second records can arrive after an export; ids already exported at the watermark are skipped
+        if ts == since and record["id"] in seen_ids:
+            continue
+        columns["id"].append(record["id"])
+        columns["user_id"].append(metadata.get("user_id"))
+        columns["report_type"].append(metadata.get("report_type") or "unknown")
+        columns["timestamp"].append(ts)
+        columns["date"].append(datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d"))
+        columns["document"].append(record["document"])
+        columns["metadata"].append(json.dumps({k: v for k, v in metadata.items() if k not in BASE_FIELDS}))
+        if include_embeddings:
+            embedding = record["embedding"]
+            columns["embedding"].append(None if embedding is None else [float(x) for x in embedding])
+
+        if ts > state["max_ts"]:
+            state["max_ts"], state["ids_at_max"] = ts, {record["id"]}
+        elif ts == state["max_ts"]:
+            state["ids_at_max"].add(record["id"])
+        state["rows"] += 1
+        if len(columns["id"]) >= batch_size:
+            yield flush()
+    if columns["id"]:
+        yield flush()
+
+def export_history(output_dir: str = HISTORY_EXPORT_DIR, include_embeddings: bool = False,
+                   full: bool = False, batch_size: int = HISTORY_EXPORT_BATCH_SIZE) -> dict:
+    """
+    Append history records newer than the watermark to the Parquet dataset.
+
+    Args:
+        output_dir: Dataset root; holds the watermark file
+        include_embeddings: Add the 384-d vectors as a list<float32> column
+        full: Ignore the watermark and export everything
+        batch_size: Rows read from Chroma and written per batch
+
+    Returns:
+        dict: rows exported and the new watermark timestamp
+
+    Raises:
+        ValueError: The dataset was exported with the other embeddings setting
+    """
+    import pyarrow.dataset as ds
+
+    os.makedirs(output_dir, exist_ok=True)
+    existing = load_watermark(output_dir)
+    if existing["timestamp"] is not None and bool(existing.get("embeddings", False)) != include_embeddings:
+        # Mixing both schemas in one dataset breaks readers, and the shared watermark would hide older rows
+        raise ValueError(
+            f"{output_dir} was exported {'with' if existing.get('embeddings') else 'without'} embeddings; "
+            f"use a separate output directory for exports {'with' if include_embeddings else 'without'} them"
+        )
+    watermark = {"timestamp": None, "ids": []} if full else existing
+    since = watermark["timestamp"]
+    seen_ids = set(watermark["ids"]) if since is not None else set()
+    state = {"rows": 0, "max_ts": since if since is not None else -1, "ids_at_max": set(seen_ids)}
+    schema = _schema(include_embeddings)
+    run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    started = time.perf_counter()
+    ds.write_dataset(
+        _record_batches(schema, since, seen_ids, include_embeddings, batch_size, state),
+        output_dir,
+        schema=schema,
+        format="parquet",
+        partitioning=["date", "report_type"],
+        partitioning_flavor="hive",
+        basename_template=f"part-{run_id}-{{i}}.parquet",
+        max_rows_per_file=batch_size * 10,
+        max_rows_per_group=batch_size,
+        existing_data_behavior="overwrite_or_ignore"
+    )
+
+    if state["rows"]:
+        _save_watermark(output_dir, {
+            "timestamp": state["max_ts"],
+            "ids": sorted(state["ids_at_max"]),
+            "embeddings": include_embeddings,
+            "exported_at": int(time.time())
+        })
+    logger.info(f"Exported {state['rows']} history rows to {output_dir} in {time.perf_counter() - started:.1f}s")
+    return {"rows": state["rows"], "watermark": state["max_ts"] if state["rows"] else since}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export health history to partitioned Parquet")
+    parser.add_argument("--output-dir", default=HISTORY_EXPORT_DIR)
+    parser.add_argument("--embeddings", action="store_true", help="Include embedding vectors")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and export everything")
+    parser.add_argument("--batch-size", type=int, default=HISTORY_EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    try:
+        result = export_history(args.output_dir, args.embeddings, args.full, args.batch_size)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Exported {result['rows']} rows, watermark {result['watermark']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import sqlite3
+import threading
+from utils.config import METADATA_DB_PATH
+from utils.logger import setup_logger
+
+logger = setup_logger("metadata_db")
+
+# One connection per thread; Streamlit runs every session on its own thread
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schemas = set()
+
+def get_connection() -> sqlite3.Connection:
+    """Return this thread's connection to the metadata database (routing tables, indexes, ...)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(os.path.abspath(METADATA_DB_PATH)), exist_ok=True)
+        conn = sqlite3.connect(METADATA_DB_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _local.conn = conn
+    return conn
+
+def ensure_schema(name: str, ddl: str) -> sqlite3.Connection:
+    """
+    Run a module's CREATE TABLE/INDEX statements once per process.
+
+    Args:
+        name: Key for the schema, usually the owning module
+        ddl: SQL script; must be idempotent (IF NOT EXISTS)
+    """
+    conn = get_connection()
+    if name not in _schemas:
+        with _schema_lock:
+            if name not in _schemas:
+                conn.executescript(ddl)
+                _schemas.add(name)
+                logger.info(f"Metadata schema ready: {name}")
+    return conn
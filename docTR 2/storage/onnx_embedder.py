@@ -0,0 +1,175 @@
+import argparse
+import os
+import threading
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+from chromadb.utils.embedding_functions import register_embedding_function
+from utils.config import SENTENCE_TRANSFORMER_MODEL, ONNX_MODEL_DIR, ONNX_MAX_SEQ_LENGTH, ONNX_NUM_THREADS
+from utils.logger import setup_logger
+
+logger = setup_logger("onnx_embedder")
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+
+def export_onnx_model(output_dir: str = ONNX_MODEL_DIR, model_name: str = SENTENCE_TRANSFORMER_MODEL) -> str:
+    """
+    Export MiniLM to ONNX and quantize it to int8.
+
+    Writes model.onnx (fp32), model.int8.onnx (dynamic int8 quantization of
+    the weights) and the fast tokenizer's tokenizer.json to output_dir.
+    Needs torch, transformers, onnx and onnxruntime; only run once per
+    deployment, not at serving time.
+
+    Returns:
+        str: Path of the quantized model.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    class _Encoder(torch.nn.Module):
+        """Return only last_hidden_state so the graph has a single output."""
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.encoder(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                token_type_ids=token_type_ids
+            ).last_hidden_state
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = os.path.join(output_dir, FP32_FILE)
+    int8_path = os.path.join(output_dir, INT8_FILE)
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(model),
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": dynamic,
+                "attention_mask": dynamic,
+                "token_type_ids": dynamic,
+                "last_hidden_state": dynamic
+            },
+            opset_version=17,
+            dynamo=False
+        )
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, TOKENIZER_FILE))
+    logger.info(f"Exported {model_name} to {fp32_path} and quantized to {int8_path}")
+    return int8_path
+
+
+def onnx_model_available(model_dir: str = ONNX_MODEL_DIR) -> bool:
+    return all(os.path.exists(os.path.join(model_dir, f)) for f in (INT8_FILE, TOKENIZER_FILE))
+
+
+class OnnxMiniLM:
+    """
+    MiniLM sentence encoder on onnxruntime.
+
+    Tokenizes with the Rust fast tokenizer, runs the int8 graph and applies
+    the same mean pooling + L2 normalization as the sentence-transformers
+    model, so vectors are interchangeable with the fp32 ones.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = True,
+                 max_length: int = ONNX_MAX_SEQ_LENGTH, num_threads: int = ONNX_NUM_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model_path = os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"ONNX embedder loaded from {model_path}")
+
+    def encode(self, texts: list, batch_size: int = 64) -> np.ndarray:
+        """Embed texts into an (n, 384) float32 array of unit vectors."""
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch([str(t) for t in texts[start:start + batch_size]])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            hidden = self.session.run(None, feeds)[0]
+
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            outputs.append(pooled.astype(np.float32))
+        if not outputs:
+            return np.zeros((0, 384), dtype=np.float32)
+        return np.vstack(outputs)
+
+
+@register_embedding_function
+class OnnxEmbeddingFunction(EmbeddingFunction):
+    """Chroma embedding function backed by OnnxMiniLM."""
+
+    def __init__(self, model: OnnxMiniLM = None):
+        self.model = model or get_onnx_model()
+
+    def __call__(self, input):
+        return list(self.model.encode(list(input)))
+
+    @staticmethod
+    def name() -> str:
+        return "onnx_minilm"
+
+    def get_config(self) -> dict:
+        return {}
+
+    @staticmethod
+    def build_from_config(config: dict) -> "OnnxEmbeddingFunction":
+        return OnnxEmbeddingFunction()
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_onnx_model() -> OnnxMiniLM:
+    """Return the process-wide ONNX encoder, loading it on first use."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = OnnxMiniLM()
+    return _model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export MiniLM to a quantized ONNX graph")
+    parser.add_argument("--output-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--model", default=SENTENCE_TRANSFORMER_MODEL)
+    args = parser.parse_args()
+    path = export_onnx_model(args.output_dir, args.model)
+    print(f"Quantized model written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import json
+import time
+from datetime import datetime
+from utils.config import PATIENT_SUMMARY_EVENTS, PATIENT_SUMMARY_SNIPPET_CHARS
+from utils.data_utils import extract_metrics
+from utils.logger import setup_logger
+from storage.metadata_db import ensure_schema
+
+logger = setup_logger("patient_summary")
+
+# One JSON row per patient, updated on every history write, so reading the
+# chat/plan context is a single primary-key lookup instead of a vector query.
+SUMMARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS patient_summary (
+    user_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    updated_at INTEGER NOT NULL
+);
+"""
+
+def _db():
+    return ensure_schema("patient_summary", SUMMARY_SCHEMA)
+
+def empty_summary() -> dict:
+    return {"record_count": 0, "metrics": {}, "latest": {}, "events": []}
+
+def apply_event(summary: dict, report_type: str, text: str, timestamp: float) -> dict:
+    """Fold one history record into a summary (records may arrive out of order)."""
+    summary["record_count"] += 1
+    for name, value in extract_metrics(text):
+        current = summary["metrics"].get(name)
+        if current is None or timestamp >= current["timestamp"]:
+            summary["metrics"][name] = {"value": value, "timestamp": timestamp, "report_type": report_type}
+
+    latest = summary["latest"].get(report_type)
+    if latest is None or timestamp >= latest["timestamp"]:
+        summary["latest"][report_type] = {"text": text[:PATIENT_SUMMARY_SNIPPET_CHARS], "timestamp": timestamp}
+
+    headline = next((line.strip() for line in text.splitlines() if line.strip()), "")[:120]
+    summary["events"].append({"timestamp": timestamp, "report_type": report_type, "headline": headline})
+    summary["events"].sort(key=lambda e: e["timestamp"], reverse=True)
+    del summary["events"][PATIENT_SUMMARY_EVENTS:]
+    return summary
+
+def record_event(user_id: str, report_type: str, text: str, timestamp: float):
+    """Update a patient's summary with a newly saved history record."""
+    db = _db()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        row = db.execute("SELECT summary FROM patient_summary WHERE user_id = ?", (user_id,)).fetchone()
+        summary = json.loads(row["summary"]) if row else empty_summary()
+        apply_event(summary, report_type, text, timestamp)
+        db.execute(
+            "INSERT OR REPLACE INTO patient_summary (user_id, summary, updated_at) VALUES (?, ?, ?)",
+            (user_id, json.dumps(summary), int(time.time()))
+        )
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+def rebuild_summary(user_id: str, records: list) -> dict:
+    """Recompute a summary from (report_type, text, timestamp) records and store it."""
+    summary = empty_summary()
+    for report_type, text, timestamp in sorted(records, key=lambda r: r[2]):
+        apply_event(summary, report_type, text, timestamp)
+    _db().execute(
+        "INSERT OR REPLACE INTO patient_summary (user_id, summary, updated_at) VALUES (?, ?, ?)",
+        (user_id, json.dumps(summary), int(time.time()))
+    )
+    logger.info(f"Rebuilt summary of {user_id} from {len(records)} records")
+    return summary
+
+def get_summary(user_id: str):
+    """Return a patient's summary dict, or None if none was materialized yet."""
+    row = _db().execute("SELECT summary FROM patient_summary WHERE user_id = ?", (user_id,)).fetchone()
+    return json.loads(row["summary"]) if row else None
+
+def delete_summary(user_id: str):
+    _db().execute("DELETE FROM patient_summary WHERE user_id = ?", (user_id,))
+
+def _when(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+def render_context(summary: dict, n_events: int = PATIENT_SUMMARY_EVENTS) -> str:
+    """Prompt context: latest metrics, the latest record of each type, then recent headlines."""
+    ctx = "Recent Health History:\n"
+    if summary["metrics"]:
+        metrics = sorted(summary["metrics"].items(), key=lambda m: m[1]["timestamp"], reverse=True)
+        ctx += "Latest metrics: " + ", ".join(f"{name} {m['value']:g}" for name, m in metrics) + "\n"
+    for report_type, latest in sorted(summary["latest"].items(), key=lambda l: l[1]["timestamp"], reverse=True):
+        ctx += f"---\n[{report_type.title()} - {_when(latest['timestamp'])}]\n{latest['text'].strip()}\n"
+    events = summary["events"][:n_events]
+    if events:
+        ctx += "---\nRecent events:\n"
+        ctx += "".join(f"- {_when(e['timestamp'])} {e['report_type']}: {e['headline']}\n" for e in events)
+    return ctx
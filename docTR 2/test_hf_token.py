@@ -1,5 +1,5 @@
-from huggingface_hub import login
-from utils.config import HUGGINGFACE_TOKEN
-
-login(token=HUGGINGFACE_TOKEN)
+from huggingface_hub import login
+from utils.config import HUGGINGFACE_TOKEN
+
+login(token=HUGGINGFACE_TOKEN)
 print("Token login successful")
\ No newline at end of file
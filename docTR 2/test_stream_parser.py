@@ -0,0 +1,64 @@
+from prognosis.stream_parser import SectionStreamParser, HEALTH_SECTIONS, WORKOUT_SECTIONS, parse_sections
+
+HEALTH_RESPONSE = """**Nutrition Guidance**:
+Keep BMI: below 25 by eating mostly whole foods. Weight Status: is tracked weekly.
+
+### **3-Day Meal Plan**:
+Day 1:
+- Breakfast: Oats with berries (350 kcal)
+- Lunch: Lentil salad (500 kcal)
+
+**Grocery List**:
+- Grains:
+  - Oats
+* Needs Doctor: No - values are in range"""
+
+WORKOUT_RESPONSE = """**Calorie Burn Target**: 400 kcal/day
+
+**Plan Overview**:
+Three sessions a week.
+
+**Schedule**:
+- **Day 1:** Strength
+- Duration: 45 minutes
+- Estimated Calorie Burn: 350 kcal
+
+## Day 2: Cardio
+- Duration: 30 minutes
+- Estimated Calorie Burn: 300 kcal
+
+**Explanation**:
+Rest on Day 3: and stretch."""
+
+def parse_in_chunks(text, sections, days, size):
+    parser = SectionStreamParser(sections, days=days)
+    for start in range(0, len(text), size):
+        parser.feed(text[start:start + size])
+    parser.close()
+    return parser
+
+def test_chunked_parsing():
+    """Chunked parsing gives the same sections and days as parsing the whole text."""
+    for text, sections, days in ((HEALTH_RESPONSE, HEALTH_SECTIONS, False), (WORKOUT_RESPONSE, WORKOUT_SECTIONS, True)):
+        whole = parse_sections(text, sections, days=days)
+        for size in (1, 2, 3, 5, 7, 16, 64):
+            chunked = parse_in_chunks(text, sections, days, size)
+            assert chunked.sections == whole.sections, size
+            assert chunked.days == whole.days, size
+
+def test_headers_only_at_line_start():
+    """Labels quoted inside a section do not start a new one."""
+    health = parse_sections(HEALTH_RESPONSE, HEALTH_SECTIONS).sections
+    assert "Keep BMI: below 25" in health["nutrition_guidance"]
+    assert "bmi" not in health and "weight_status" not in health
+    assert health["meal_plan"].startswith("Day 1:")
+    assert health["needs_doctor"].startswith("No")
+
+    workout = parse_sections(WORKOUT_RESPONSE, WORKOUT_SECTIONS, days=True)
+    assert [day["number"] for day in workout.days] == [1, 2]
+    assert workout.sections["explanation"] == "Rest on Day 3: and stretch."
+    print("Sections:", sorted(health), sorted(workout.sections))
+
+if __name__ == "__main__":
+    test_chunked_parsing()
+    test_headers_only_at_line_start()
@@ -1,20 +1,131 @@
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# API keys
-HUGGINGFACE_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
-
-# Model paths
-MEDCLIP_MODEL = "RyanWangZf/MedCLIP"
-SENTENCE_TRANSFORMER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
-OCR_MODEL = "microsoft/donut-base"
-OPENBIOLLM_MODEL = "aaditya/Llama3-OpenBioLLM-70B"
-DOCTOR_COLLECTION_NAME = "doctor_collection"  
-
-# Chroma settings
-CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./data/chroma")
-
-# Device (CPU-only)
-DEVICE = "cpu"
\ No newline at end of file
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# API keys
+HUGGINGFACE_TOKEN = os.getenv("HUGGINGFACE_TOKEN")
+
+# Model paths
+MEDCLIP_MODEL = "RyanWangZf/MedCLIP"
+SENTENCE_TRANSFORMER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+OCR_MODEL = "microsoft/donut-base"
+OPENBIOLLM_MODEL = "aaditya/Llama3-OpenBioLLM-70B"
+DOCTOR_COLLECTION_NAME = "doctor_collection"  
+
+# Chroma settings
+CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./data/chroma")
+# SQLite side tables (history routing, ...), kept next to the collections they describe
+METADATA_DB_PATH = os.getenv("METADATA_DB_PATH", os.path.join(CHROMA_PERSIST_DIR, "metadata.db"))
+
+# Device (CPU-only)
+DEVICE = "cpu"
+
+# Doctor directory search
+GEOHASH_PRECISION = 4  # ~20km x 40km cells
+DOCTOR_SEARCH_RADIUS_KM = 50
+DOCTOR_CANDIDATE_LIMIT = 2000
+DOCTOR_SEMANTIC_WEIGHT = 1.0
+DOCTOR_DISTANCE_WEIGHT = 0.5
+DOCTOR_SPECIALTY_BONUS = 0.5
+# Doctor search results cached per (condition, location); also dropped when the directory changes
+DOCTOR_SEARCH_CACHE_SIZE = 512
+DOCTOR_SEARCH_CACHE_TTL = int(os.getenv("DOCTOR_SEARCH_CACHE_TTL", "600"))  # seconds
+PROVIDER_IMPORT_BATCH_SIZE = 1024
+
+# Embedding runtime: "torch" (sentence-transformers) or "onnx" (int8 ONNX graph)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./data/onnx/all-MiniLM-L6-v2")
+ONNX_MAX_SEQ_LENGTH = 256
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0"))  # 0 = onnxruntime default
+
+# Health history partitioning: users are hashed into this many collections.
+# Changing it only affects new users; existing ones keep their routed partition.
+HISTORY_PARTITIONS = int(os.getenv("HISTORY_PARTITIONS", "16"))
+HISTORY_FANOUT_WORKERS = 8
+
+# History compaction (python -m storage.history_compaction)
+HISTORY_RAW_RETENTION_DAYS = int(os.getenv("HISTORY_RAW_RETENTION_DAYS", "90"))  # older raw entries are rolled up by month
+HISTORY_MAX_RECORDS_PER_USER = int(os.getenv("HISTORY_MAX_RECORDS_PER_USER", "200"))
+HISTORY_ARCHIVE_DIR = os.getenv("HISTORY_ARCHIVE_DIR", "./data/history_archive")  # empty = delete rolled-up entries
+HISTORY_REBUILD_THRESHOLD = 0.2  # rebuild a collection's index once this share of it was deleted
+HISTORY_REBUILD_GRACE_SECONDS = int(os.getenv("HISTORY_REBUILD_GRACE_SECONDS", "3600"))  # keep a replaced collection this long
+
+# Near-duplicate history writes: max SimHash bit distance treated as the same entry (0 disables, at most 3)
+HISTORY_DEDUPE_MAX_DISTANCE = int(os.getenv("HISTORY_DEDUPE_MAX_DISTANCE", "3"))
+
+# Parquet analytics export (python -m storage.history_export)
+HISTORY_EXPORT_DIR = os.getenv("HISTORY_EXPORT_DIR", "./data/history_parquet")
+HISTORY_EXPORT_BATCH_SIZE = 5000
+
+# Optional blob storage of history documents: bodies go to zstd files, Chroma keeps ids/metadata/vectors
+HISTORY_BLOB_STORE = os.getenv("HISTORY_BLOB_STORE", "false").lower() in ("1", "true", "yes")
+HISTORY_BLOB_DIR = os.getenv("HISTORY_BLOB_DIR", "./data/history_blobs")
+HISTORY_BLOB_LEVEL = 3  # zstd compression level
+
+# HNSW index profiles (benchmarks/hnsw_profiles.py measures recall/latency per profile).
+# max_neighbors is HNSW's M. space and M/ef_construction only apply when a
+# collection is created (rebuild to change them); ef_search is updated in place.
+HNSW_PROFILES = {
+    "fast": {"space": "l2", "max_neighbors": 12, "ef_construction": 64, "ef_search": 32},
+    "balanced": {"space": "l2", "max_neighbors": 16, "ef_construction": 100, "ef_search": 100},  # Chroma defaults
+    "accurate": {"space": "l2", "max_neighbors": 32, "ef_construction": 200, "ef_search": 256}
+}
+HISTORY_HNSW_PROFILE = os.getenv("HISTORY_HNSW_PROFILE", "balanced")
+DOCTOR_HNSW_PROFILE = os.getenv("DOCTOR_HNSW_PROFILE", "balanced")
+
+# Materialized per-patient summary used as chat/plan context
+PATIENT_SUMMARY_EVENTS = 10  # event headlines kept
+PATIENT_SUMMARY_SNIPPET_CHARS = 1500  # of the latest record per report type
+
+# Recency-aware history retrieval (search_health_history)
+HISTORY_CANDIDATE_POOL = 50  # nearest records re-ranked per query
+HISTORY_RECENCY_HALF_LIFE_DAYS = float(os.getenv("HISTORY_RECENCY_HALF_LIFE_DAYS", "30"))
+HISTORY_RECENCY_WEIGHT = float(os.getenv("HISTORY_RECENCY_WEIGHT", "0.3"))
+
+# Appointment scheduling
+APPOINTMENT_SLOT_MINUTES = 30
+APPOINTMENT_DAY_START_HOUR = 9
+APPOINTMENT_DAY_END_HOUR = 17
+APPOINTMENT_HORIZON_DAYS = 28  # availability generated this far ahead
+APPOINTMENT_LEAD_MINUTES = 60  # earliest bookable slot from now
+
+# Symptom triage (prognosis/triage.py): symptom vocabulary embeddings are cached here
+TRIAGE_INDEX_PATH = os.getenv("TRIAGE_INDEX_PATH", "./data/triage/symptom_index.npz")
+TRIAGE_MATCH_THRESHOLD = 0.55  # min cosine similarity for a free-text phrase to match a symptom
+TRIAGE_DEFAULT_SEVERITY = 3  # 1-5, for symptoms typed in free text
+
+# Shared LLM client (prognosis/llm_client.py)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "nebius")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # in-flight requests per process
+LLM_ACQUIRE_TIMEOUT_S = 30  # wait this long for a free slot before giving up
+LLM_POOL_CONNECTIONS = 16
+LLM_KEEPALIVE_S = 120  # idle connections kept open this long
+LLM_TIMEOUT_S = 120
+LLM_FAILURE_THRESHOLD = 3  # consecutive failures that pause calls
+LLM_COOLDOWN_S = 30
+# Plan output of process_health_data/process_workout_data: "markdown" (sections), "json"
+# (JSON schema in the prompt) or "grammar" (also sent as response_format, if the provider supports it)
+STRUCTURED_OUTPUT = os.getenv("STRUCTURED_OUTPUT", "json").lower()
+
+# Plan response cache (prognosis/response_cache.py): exact prompt hash, plus an optional
+# semantic tier for the same profile buckets with a similarly worded goal
+RESPONSE_CACHE_MAX_ENTRIES = 256
+RESPONSE_CACHE_MAX_BYTES = 8 * 1024 * 1024
+RESPONSE_CACHE_TTL_S = int(os.getenv("RESPONSE_CACHE_TTL_S", "3600"))
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_SIMILARITY = 0.92  # min cosine similarity of goal descriptions
+
+# Prompt context budgets (prognosis/prompt_templates.py), in estimated tokens (4 chars each);
+# goal, medical history, lab results and saved history are trimmed to fit.
+# PROMPT_TOKENIZER only reports the real token count in the logs
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", OPENBIOLLM_MODEL)
+HEALTH_CONTEXT_TOKENS = int(os.getenv("HEALTH_CONTEXT_TOKENS", "1200"))
+WORKOUT_CONTEXT_TOKENS = int(os.getenv("WORKOUT_CONTEXT_TOKENS", "500"))
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "900"))
+
+# Chat memory (prognosis/conversation_memory.py): recent exchanges verbatim, older ones
+# folded into a rolling summary in the background
+CHAT_MEMORY_TURNS = int(os.getenv("CHAT_MEMORY_TURNS", "4"))  # exchanges kept verbatim
+CHAT_TURN_TOKENS = 200  # per remembered message
+CHAT_SUMMARY_TOKENS = 250
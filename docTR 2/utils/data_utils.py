@@ -1,8 +1,17 @@
-def combine_context(form_data, symptoms, report_text, image_labels):
-    """Combine patient inputs into a single context string."""
-    context = f"Patient Info: {form_data}\nSymptoms: {symptoms}\nReport: {report_text}\nImage Labels: {image_labels}"
-    return context
-
-def clean_text(text):
-    """Clean extracted text (e.g., remove extra whitespace)."""
-    return " ".join(text.strip().split())
\ No newline at end of file
+import re
+
+# "BMI: 27.4", "Calorie Target: 2100 kcal", "Intensity: 3/5" at the start of a line
+METRIC_PATTERN = re.compile(r"^\s*([A-Za-z][A-Za-z /()-]{0,40}?)\s*:\s*(-?\d+(?:\.\d+)?)", re.MULTILINE)
+
+def combine_context(form_data, symptoms, report_text, image_labels):
+    """Combine patient inputs into a single context string."""
+    context = f"Patient Info: {form_data}\nSymptoms: {symptoms}\nReport: {report_text}\nImage Labels: {image_labels}"
+    return context
+
+def clean_text(text):
+    """Clean extracted text (e.g., remove extra whitespace)."""
+    return " ".join(text.strip().split())
+
+def extract_metrics(text):
+    """Numeric "Name: value" lines of a saved record, as [(name, value)] in order."""
+    return [(name.strip(), float(value)) for name, value in METRIC_PATTERN.findall(text or "")]
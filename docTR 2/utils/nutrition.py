@@ -0,0 +1,106 @@
+import numpy as np
+
+# Mifflin-St Jeor multipliers, matched on the first word of the Step 1 activity level
+ACTIVITY_FACTORS = {
+    "sedentary": 1.2,
+    "lightly": 1.375,
+    "moderately": 1.55,
+    "very": 1.725,
+    "extra": 1.9
+}
+# Sex constant of the Mifflin-St Jeor equation; other answers use the midpoint
+SEX_OFFSETS = {"male": 5.0, "female": -161.0}
+DEFAULT_SEX_OFFSET = -78.0
+GOAL_CALORIE_ADJUSTMENT = {"lose": -500, "gain": 300, "maintain": 0}
+MIN_CALORIE_TARGET = 1200
+
+# Share of calories from protein, carbs and fats by goal type
+MACRO_SPLITS = {
+    "lose": (0.30, 0.40, 0.30),
+    "gain": (0.25, 0.50, 0.25),
+    "maintain": (0.25, 0.50, 0.25)
+}
+MACRO_NAMES = ("protein", "carbs", "fats")
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0])
+
+BMI_CUTOFFS = (18.5, 25.0, 30.0)
+WEIGHT_STATUSES = ("Underweight", "Normal weight", "Overweight", "Obese")
+
+def _goal_type(goal_type) -> str:
+    goal_type = str(goal_type or "").lower()
+    return goal_type if goal_type in GOAL_CALORIE_ADJUSTMENT else "maintain"
+
+def _lookup(table: dict, keys, default: float):
+    """Vector of table values for one or many string keys."""
+    return np.vectorize(lambda key: table.get(key, default), otypes=[float])(keys)
+
+def bmi(weight, height):
+    """Body mass index for weights in kg and heights in m; 0 where height is missing."""
+    weight, height = np.asarray(weight, dtype=float), np.asarray(height, dtype=float)
+    safe = np.where(height > 0, height, 1.0)
+    return np.where(height > 0, weight / safe ** 2, 0.0)
+
+def weight_status(bmi_value):
+    """WHO category of one BMI (str) or an array of them."""
+    statuses = np.asarray(WEIGHT_STATUSES)[np.digitize(bmi_value, BMI_CUTOFFS)]
+    return str(statuses) if np.ndim(statuses) == 0 else statuses
+
+def activity_factor(activity_level):
+    levels = np.vectorize(lambda level: str(level or "").split(" ")[0].lower(), otypes=[object])(activity_level)
+    return _lookup(ACTIVITY_FACTORS, levels, ACTIVITY_FACTORS["sedentary"])
+
+def bmr(weight, height, age, gender):
+    """Basal metabolic rate (kcal/day), Mifflin-St Jeor."""
+    offsets = _lookup(SEX_OFFSETS, np.vectorize(lambda g: str(g or "").lower(), otypes=[object])(gender),
+                      DEFAULT_SEX_OFFSET)
+    return (10 * np.asarray(weight, dtype=float) + 625 * np.asarray(height, dtype=float)
+            - 5 * np.asarray(age, dtype=float) + offsets)
+
+def tdee(weight, height, age, gender, activity_level):
+    """Total daily energy expenditure (kcal/day)."""
+    return bmr(weight, height, age, gender) * activity_factor(activity_level)
+
+def calorie_target(tdee_value, goal_type):
+    """Goal-adjusted daily intake, rounded to 10 kcal and never below MIN_CALORIE_TARGET."""
+    goals = np.vectorize(_goal_type, otypes=[object])(goal_type)
+    target = np.asarray(tdee_value, dtype=float) + _lookup(GOAL_CALORIE_ADJUSTMENT, goals, 0)
+    return np.round(np.maximum(target, MIN_CALORIE_TARGET), -1)
+
+def macro_grams(calories, goal_type):
+    """Grams of protein, carbs and fats (last axis) for the given calorie targets."""
+    goals = np.atleast_1d(np.vectorize(_goal_type, otypes=[object])(goal_type))
+    splits = np.array([MACRO_SPLITS[goal] for goal in goals.ravel()]).reshape(goals.shape + (3,))
+    grams = np.asarray(calories, dtype=float)[..., None] * splits / KCAL_PER_GRAM
+    return np.round(grams).reshape(np.shape(calories) + (3,))
+
+def nutrition_targets(profile: dict, goal: dict) -> dict:
+    """
+    BMI, weight status, energy needs and macros for one Step 1 profile and
+    Step 4 goal, in the keys of a health recommendation.
+    """
+    weight, height = float(profile.get("weight") or 0), float(profile.get("height") or 0)
+    age = float(profile.get("age") or 0)
+    goal_type = _goal_type(goal.get("type"))
+
+    bmi_value = float(bmi(weight, height))
+    energy = float(tdee(weight, height, age, profile.get("gender"), profile.get("activity_level")))
+    calories = int(calorie_target(energy, goal_type))
+    grams = macro_grams(calories, goal_type)
+
+    macros = {}
+    for name, gram, share in zip(MACRO_NAMES, grams, MACRO_SPLITS[goal_type]):
+        macros[f"{name}_grams"] = float(gram)
+        macros[f"{name}_percent"] = share * 100
+    macro_breakdown = "\n".join(
+        f"{name.title()}: {macros[f'{name}_grams']:.0f}g ({macros[f'{name}_percent']:.0f}% of calories)"
+        for name in MACRO_NAMES
+    )
+    return {
+        "bmi": round(bmi_value, 1),
+        "weight_status": weight_status(bmi_value),
+        "bmr": int(round(float(bmr(weight, height, age, profile.get("gender"))))),
+        "tdee": int(round(energy)),
+        "calorie_target": calories,
+        "macros": macros,
+        "macro_breakdown": macro_breakdown
+    }